@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ChatbotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'chatbot'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from . import jobs  # noqa: F401  임베딩 횟수를 /metrics collector로 등록
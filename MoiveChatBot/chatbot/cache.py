@@ -0,0 +1,321 @@
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from .metrics import register_collector
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 질문 정규화: 유니코드 NFKC, 소문자, 공백 하나로"""
+    text = unicodedata.normalize("NFKC", text or "")
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class QueryEmbeddingCache:
+    """
+    질문 임베딩 캐시 (같은 질문이면 upstage_embed 호출 생략)
+    - 1차: 프로세스 내 LRU (TTL + 바이트 상한)
+    - 2차(선택): Django cache (locmem/file/Redis 등) -> 프로세스 간 공유
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=60 * 60, django_cache=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.django_cache = django_cache
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, vector)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+
+    @staticmethod
+    def make_key(text: str, model: str) -> str:
+        digest = hashlib.sha1(f"{model}\0{normalize_query(text)}".encode("utf-8")).hexdigest()
+        return f"chatbot:qemb:{digest}"
+
+    def _shared(self):
+        return caches[self.django_cache] if self.django_cache else None
+
+    def _pop(self, key) -> None:
+        _, vec = self._entries.pop(key)
+        self._bytes -= vec.nbytes
+
+    def _put_local(self, key, vec: np.ndarray) -> None:
+        if vec.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, vec)
+            self._bytes += vec.nbytes
+            while self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, vec = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return vec
+                self._pop(key)
+        return None
+
+    def _shared_hit(self, key, blob) -> np.ndarray:
+        vec = np.frombuffer(blob, dtype=np.float32)
+        self._put_local(key, vec)
+        with self._lock:
+            self.hits += 1
+            self.shared_hits += 1
+        return vec
+
+    def _miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def get(self, text: str, model: str):
+        key = self.make_key(text, model)
+        vec = self._get_local(key)
+        if vec is not None:
+            return vec
+
+        shared = self._shared()
+        if shared is not None:
+            blob = shared.get(key)
+            if blob is not None:
+                return self._shared_hit(key, blob)
+
+        self._miss()
+        return None
+
+    async def aget(self, text: str, model: str):
+        """get의 async 버전 (공유 캐시 조회만 await)"""
+        key = self.make_key(text, model)
+        vec = self._get_local(key)
+        if vec is not None:
+            return vec
+
+        shared = self._shared()
+        if shared is not None:
+            blob = await shared.aget(key)
+            if blob is not None:
+                return self._shared_hit(key, blob)
+
+        self._miss()
+        return None
+
+    def _local_vector(self, key, vector) -> np.ndarray:
+        vec = np.array(vector, dtype=np.float32)
+        vec.flags.writeable = False  # 여러 요청이 같은 배열을 공유하므로 읽기 전용
+        self._put_local(key, vec)
+        return vec
+
+    def set(self, text: str, model: str, vector) -> np.ndarray:
+        key = self.make_key(text, model)
+        vec = self._local_vector(key, vector)
+
+        shared = self._shared()
+        if shared is not None:
+            shared.set(key, vec.tobytes(), timeout=self.ttl)
+        return vec
+
+    async def aset(self, text: str, model: str, vector) -> np.ndarray:
+        key = self.make_key(text, model)
+        vec = self._local_vector(key, vector)
+
+        shared = self._shared()
+        if shared is not None:
+            await shared.aset(key, vec.tobytes(), timeout=self.ttl)
+        return vec
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "shared_hits": self.shared_hits,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+def _embedding_cache_from_settings() -> QueryEmbeddingCache:
+    """
+    settings.CHATBOT_EMBED_CACHE 예시:
+        {"MAX_BYTES": 32 * 1024 * 1024, "TTL": 3600, "DJANGO_CACHE": "default"}
+    """
+    conf = getattr(settings, "CHATBOT_EMBED_CACHE", {})
+    return QueryEmbeddingCache(
+        max_bytes=conf.get("MAX_BYTES", 32 * 1024 * 1024),
+        ttl=conf.get("TTL", 60 * 60),
+        django_cache=conf.get("DJANGO_CACHE"),
+    )
+
+
+query_embedding_cache = _embedding_cache_from_settings()
+
+
+class SemanticAnswerCache:
+    """
+    의미 기반 답변 캐시.
+    새 질문 임베딩이 캐시된 질문과 코사인 유사도 threshold 이상이고,
+    검색된 top-k 영화 목록(각 영화의 updated_at 포함)이 같으면 이전 upstage_chat 답변을 재사용한다.
+    - LRU + TTL, 최대 max_entries개
+    - 답변 근거에 들어간 영화가 수정/삭제되면 그 답변은 버림 (같은 프로세스는 post_save 시그널로 바로,
+      다른 프로세스에서 수정된 경우는 검색 결과의 updated_at이 달라져서 재사용되지 않음)
+    """
+
+    def __init__(self, threshold=0.95, max_entries=512, ttl=30 * 60):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, qvec, versions, answer)
+        self._by_movie = {}  # movie_id -> set(key)
+        self._next_key = 0
+        self.lookups = 0
+        self.hits = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _versions(movies) -> tuple:
+        """검색 결과 키: ((movie_id, updated_at), ...) 순서 그대로"""
+        return tuple((movie.pk, movie.updated_at) for movie in movies)
+
+    def _drop(self, key) -> None:
+        _, _, versions, _ = self._entries.pop(key)
+        for movie_id, _ in versions:
+            keys = self._by_movie.get(movie_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_movie[movie_id]
+
+    def lookup(self, query_vector, movies):
+        """movies: 이번 검색 결과 Movie 목록 (순서대로)"""
+        versions = self._versions(movies)
+        q = np.asarray(query_vector, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+
+        with self._lock:
+            self.lookups += 1
+            if norm == 0.0:
+                return None
+            q = q / norm
+            now = time.monotonic()
+
+            best_key, best_sim = None, self.threshold
+            for key, (expires_at, cached_q, cached_versions, _) in list(self._entries.items()):
+                if expires_at <= now:
+                    self._drop(key)
+                    continue
+                if cached_versions != versions or cached_q.shape != q.shape:
+                    continue
+                sim = float(cached_q @ q)
+                if sim >= best_sim:
+                    best_key, best_sim = key, sim
+
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return self._entries[best_key][3]
+
+    def store(self, query_vector, movies, answer: str) -> None:
+        versions = self._versions(movies)
+        q = np.asarray(query_vector, dtype=np.float32)
+        norm = float(np.linalg.norm(q))
+        if norm == 0.0:
+            return
+        q = q / norm
+
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            self._entries[key] = (time.monotonic() + self.ttl, q, versions, answer)
+            for movie_id, _ in versions:
+                self._by_movie.setdefault(movie_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    async def alookup(self, query_vector, movies):
+        """lookup의 async 버전 (락을 잡고 항목을 전부 훑으므로 이벤트 루프가 아니라 스레드에서)"""
+        return await sync_to_async(self.lookup)(query_vector, movies)
+
+    async def astore(self, query_vector, movies, answer: str) -> None:
+        await sync_to_async(self.store)(query_vector, movies, answer)
+
+    def invalidate_movie(self, movie_id: int) -> None:
+        with self._lock:
+            for key in list(self._by_movie.get(movie_id, ())):
+                self._drop(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_movie.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            }
+
+
+def _answer_cache_from_settings() -> SemanticAnswerCache:
+    """
+    settings.CHATBOT_ANSWER_CACHE 예시:
+        {"THRESHOLD": 0.95, "MAX_ENTRIES": 512, "TTL": 1800}
+    """
+    conf = getattr(settings, "CHATBOT_ANSWER_CACHE", {})
+    return SemanticAnswerCache(
+        threshold=conf.get("THRESHOLD", 0.95),
+        max_entries=conf.get("MAX_ENTRIES", 512),
+        ttl=conf.get("TTL", 30 * 60),
+    )
+
+
+semantic_answer_cache = _answer_cache_from_settings()
+
+
+def _cache_metrics() -> list[tuple]:
+    embed = query_embedding_cache.stats()
+    answer = semantic_answer_cache.stats()
+    return [
+        ("chatbot_query_embedding_cache_hits_total", "counter", {}, embed["hits"]),
+        ("chatbot_query_embedding_cache_shared_hits_total", "counter", {}, embed["shared_hits"]),
+        ("chatbot_query_embedding_cache_misses_total", "counter", {}, embed["misses"]),
+        ("chatbot_query_embedding_cache_bytes", "gauge", {}, embed["bytes"]),
+        ("chatbot_answer_cache_lookups_total", "counter", {}, answer["lookups"]),
+        ("chatbot_answer_cache_hits_total", "counter", {}, answer["hits"]),
+        ("chatbot_answer_cache_invalidations_total", "counter", {}, answer["invalidations"]),
+        ("chatbot_answer_cache_entries", "gauge", {}, answer["entries"]),
+    ]
+
+
+register_collector(_cache_metrics)
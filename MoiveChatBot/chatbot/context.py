@@ -0,0 +1,121 @@
+import math
+import re
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import cache
+
+from movies.models import Movie
+
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+
+def _conf(name: str, default):
+    return getattr(settings, "CHATBOT_CONTEXT", {}).get(name, default)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    대략적인 토큰 수 (토크나이저 없이 빠르게)
+    한글은 글자당 1토큰 정도, 나머지는 4글자당 1토큰 정도로 계산
+    """
+    hangul = len(_HANGUL_RE.findall(text))
+    return hangul + math.ceil((len(text) - hangul) / 4)
+
+
+def _chars_within_tokens(text: str, max_tokens: int) -> int:
+    """공백을 정리한 text 앞에서부터 estimate_tokens 기준 max_tokens 안에 들어가는 글자 수"""
+    text = " ".join(text.split())  # _shorten과 같은 기준으로 셈
+    hangul = other = 0
+    for i, ch in enumerate(text):
+        if _HANGUL_RE.match(ch):
+            hangul += 1
+        else:
+            other += 1
+        if hangul + math.ceil(other / 4) > max_tokens:
+            return i
+    return len(text)
+
+
+def _shorten(text: str, max_chars: int) -> str:
+    """max_chars 안에서 문장 경계(., !, ?, 줄바꿈)에서 자르고 … 붙임"""
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    boundary = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "), cut.rfind("다 "))
+    if boundary > max_chars // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + "…"
+
+
+def build_movie_snippet(movie: Movie, review_chars: int = None) -> str:
+    """프롬프트에 넣을 영화 한 편의 요약 (리뷰는 review_chars 글자까지)"""
+    if review_chars is None:
+        review_chars = _conf("REVIEW_CHARS", 300)
+    review = _shorten(movie.review, review_chars) if movie.review else "-"
+    return (
+        f"- {movie.title} ({movie.release_year}, {movie.genre}, 별점 {movie.rating})\n"
+        f"  감독: {movie.director or '-'}\n"
+        f"  배우: {movie.actors or '-'}\n"
+        f"  리뷰: {review}"
+    )
+
+
+def _snippet_key(movie: Movie) -> str:
+    # updated_at을 키에 넣어서 수정되면 자연스럽게 새 키를 쓰게 함
+    version = int(movie.updated_at.timestamp() * 1_000_000) if movie.updated_at else 0
+    return f"chatbot:snippet:{movie.pk}:{version}:{_conf('REVIEW_CHARS', 300)}"
+
+
+def cache_movie_snippet(movie: Movie) -> str:
+    """영화 저장 시 호출: 요약을 미리 만들어 캐시에 넣어둠"""
+    snippet = build_movie_snippet(movie)
+    cache.set(_snippet_key(movie), snippet, timeout=_conf("SNIPPET_TTL", 7 * 24 * 60 * 60))
+    return snippet
+
+
+def _dedupe_key(movie: Movie) -> tuple:
+    title = unicodedata.normalize("NFKC", movie.title).lower()
+    return re.sub(r"[\W_]+", "", title), movie.release_year
+
+
+def build_context(top, max_tokens: int = None) -> str:
+    """
+    검색 결과(top: [(movie, score)])를 토큰 예산 안에서 프롬프트용 텍스트로 묶음
+    - 제목+개봉년도가 같은 영화(TMDB/직접 등록 중복 등)는 점수 높은 것 하나만
+    - 요약은 저장 시 캐시해둔 것을 get_many 한 번으로 가져옴
+    - 예산을 넘으면 리뷰를 더 줄여보고, 그래도 안 되면 그 영화는 뺌
+    """
+    if max_tokens is None:
+        max_tokens = _conf("MAX_TOKENS", 1200)
+
+    movies = []
+    seen = set()
+    for movie, _ in top:
+        key = _dedupe_key(movie)
+        if key in seen:
+            continue
+        seen.add(key)
+        movies.append(movie)
+
+    cached = cache.get_many([_snippet_key(m) for m in movies])
+
+    lines = []
+    used = 0
+    for movie in movies:
+        snippet = cached.get(_snippet_key(movie)) or cache_movie_snippet(movie)
+        cost = estimate_tokens(snippet)
+        if used + cost > max_tokens and movie.review:
+            # 리뷰를 줄여서 남은 예산에 맞춰봄 (남은 토큰 -> 리뷰 글자 수, 끝에 붙는 … 몫으로 1토큰 남김)
+            without_review = estimate_tokens(build_movie_snippet(movie, review_chars=0))
+            room = max_tokens - used - without_review
+            if room > 20:
+                snippet = build_movie_snippet(movie, review_chars=_chars_within_tokens(movie.review, room - 1))
+                cost = estimate_tokens(snippet)
+        if used + cost > max_tokens:
+            continue
+        lines.append(snippet)
+        used += cost
+
+    return "\n".join(lines)
@@ -0,0 +1,103 @@
+import re
+from dataclasses import dataclass, field
+
+from movies.models import Movie
+
+# 장르 이름 -> 코드 (메타데이터 배열에 int8로 저장)
+GENRE_CODES = {name: i for i, (name, _) in enumerate(Movie.GENRE_CHOICES)}
+
+# 질문에 나올 법한 표현 -> GENRE_CHOICES 값
+GENRE_KEYWORDS = {
+    "액션": "액션",
+    "코미디": "코미디",
+    "코메디": "코미디",
+    "드라마": "드라마",
+    "공포": "공포",
+    "호러": "공포",
+    "sf": "SF",
+    "공상과학": "SF",
+    "로맨스": "로맨스",
+    "로코": "로맨스",
+    "멜로": "로맨스",
+    "스릴러": "스릴러",
+    "애니메이션": "애니메이션",
+    "애니": "애니메이션",
+    "판타지": "판타지",
+    "다큐멘터리": "다큐멘터리",
+    "다큐": "다큐멘터리",
+}
+
+
+def _keyword_pattern(keyword: str) -> str:
+    # 영어 키워드는 단어 경계로만 ("sf"가 "transformers" 안에서 걸리지 않게)
+    # 한글은 조사가 바로 붙으므로("애니를") 부분 일치
+    if keyword.isascii():
+        return rf"(?<![a-z0-9]){re.escape(keyword)}(?![a-z0-9])"
+    return re.escape(keyword)
+
+
+# 긴 키워드부터 (같은 위치에서 "애니메이션"이 "애니"보다 먼저 잡히게)
+_GENRE_RE = re.compile("|".join(_keyword_pattern(k) for k in sorted(GENRE_KEYWORDS, key=len, reverse=True)))
+# 장르 뒤에 오는 부정 표현: "호러 말고", "애니는 빼고", "공포 영화 제외"
+_NEGATION_RE = re.compile(r"\s*(?:은|는|을|를|이|가|류|쪽|장르|영화|\s)*\s*(?:말고|빼고|제외|말구|아닌|아니고|싫)")
+
+_YEAR_AFTER_RE = re.compile(r"((?:19|20)\d{2})\s*년?\s*(?:이후|부터|이상|넘은)")
+_YEAR_BEFORE_RE = re.compile(r"((?:19|20)\d{2})\s*년?\s*(?:이전|까지|이하|전에)")
+_DECADE_RE = re.compile(r"((?:19|20)\d)0\s*년대")
+_SHORT_DECADE_RE = re.compile(r"(?<!\d)(\d)0\s*년대")  # "90년대" -> 1990, "10년대" -> 2010
+_YEAR_RE = re.compile(r"((?:19|20)\d{2})\s*년")
+_RATING_RE = re.compile(r"(?:별점|평점)\s*([1-5])\s*점?\s*(?:이상|넘는|부터)")
+_HIGH_RATING_RE = re.compile(r"(?:별점|평점)\s*(?:이\s*)?(?:높은|좋은)")
+
+
+@dataclass
+class RetrievalFilters:
+    """retrieve_top_k_movies 후보 제한 조건 (None이면 조건 없음)"""
+    genres: set = field(default_factory=set)
+    exclude_genres: set = field(default_factory=set)
+    year_min: int = None
+    year_max: int = None
+    rating_min: int = None
+
+    def __bool__(self):
+        return bool(self.genres or self.exclude_genres) or any(v is not None for v in (self.year_min, self.year_max, self.rating_min))
+
+
+def parse_query_filters(query: str) -> RetrievalFilters:
+    """
+    질문에서 장르/연도/별점 조건을 규칙 기반으로 뽑음 (LLM 호출 없이)
+    예) "2010년 이후 SF 영화" -> genres={"SF"}, year_min=2010
+        "호러 말고 코미디" -> genres={"코미디"}, exclude_genres={"공포"}
+    """
+    text = (query or "").lower()
+    filters = RetrievalFilters()
+
+    for m in _GENRE_RE.finditer(text):
+        genre = GENRE_KEYWORDS[m.group(0)]
+        if _NEGATION_RE.match(text, m.end()):
+            filters.exclude_genres.add(genre)
+        else:
+            filters.genres.add(genre)
+    filters.genres -= filters.exclude_genres
+
+    if m := _YEAR_AFTER_RE.search(text):
+        filters.year_min = int(m.group(1))
+    if m := _YEAR_BEFORE_RE.search(text):
+        filters.year_max = int(m.group(1))
+    if m := _DECADE_RE.search(text):
+        filters.year_min = int(m.group(1)) * 10
+        filters.year_max = filters.year_min + 9
+    elif m := _SHORT_DECADE_RE.search(text):
+        decade = int(m.group(1)) * 10
+        filters.year_min = (1900 if decade >= 30 else 2000) + decade
+        filters.year_max = filters.year_min + 9
+    if filters.year_min is None and filters.year_max is None:
+        if m := _YEAR_RE.search(text):
+            filters.year_min = filters.year_max = int(m.group(1))
+
+    if m := _RATING_RE.search(text):
+        filters.rating_min = int(m.group(1))
+    elif _HIGH_RATING_RE.search(text):
+        filters.rating_min = 4
+
+    return filters
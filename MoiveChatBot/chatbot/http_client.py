@@ -0,0 +1,277 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from requests.adapters import HTTPAdapter
+
+from .metrics import NULL_HISTOGRAM, histogram, metrics_enabled
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# POST(chat 등)는 같은 요청이 두 번 처리/과금될 수 있어서 서버가 처리하지 않았다고 확실한 응답만 재시도
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+NON_IDEMPOTENT_RETRY_STATUS = {429, 503}
+
+
+def _retry_statuses(method: str) -> set:
+    return RETRY_STATUS if method.upper() in IDEMPOTENT_METHODS else NON_IDEMPOTENT_RETRY_STATUS
+
+
+def _latency_histogram(upstream: str):
+    # CHATBOT_METRICS["ENABLED"]가 꺼져 있으면 요청 trace와 마찬가지로 기록하지 않음
+    return histogram("upstream_request_seconds", upstream=upstream) if metrics_enabled() else NULL_HISTOGRAM
+
+
+class UpstreamClient:
+    """
+    외부 API(upstream)별 공용 HTTP 클라이언트.
+    - 연결 풀을 쓰는 requests.Session 하나를 재사용 (매 요청 TCP+TLS 핸드셰이크 방지)
+    - timeout은 (connect, read)로 분리
+    - 429/5xx/연결 오류는 지터를 섞은 지수 백오프로 재시도 (Retry-After 헤더가 있으면 따름)
+      POST는 연결 실패와 429/503만 재시도 (read timeout은 서버가 이미 처리 중일 수 있어서 재시도 안 함)
+    - upstream별 latency 히스토그램 기록 (CHATBOT_METRICS가 켜져 있을 때)
+    """
+
+    def __init__(self, name, base_url, headers=None, **options):
+        self.name = name
+        self._headers = headers  # dict 또는 dict를 돌려주는 함수 (처음 세션 만들 때 한 번만 호출)
+        self._session = None
+        self._lock = threading.Lock()
+        self.configure(base_url, **options)
+
+    def configure(self, base_url, pool_size=10, connect_timeout=3.05, read_timeout=30,
+                  max_retries=3, backoff_base=0.5, backoff_max=8.0) -> None:
+        """주소/timeout/재시도 설정 적용. 세션은 버리고 다음 요청 때 새 설정으로 다시 만듦"""
+        with self._lock:
+            self.base_url = base_url.rstrip("/")
+            self.pool_size = pool_size
+            self.connect_timeout = connect_timeout
+            self.read_timeout = read_timeout
+            self.max_retries = max_retries
+            self.backoff_base = backoff_base
+            self.backoff_max = backoff_max
+            session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    headers = self._headers() if callable(self._headers) else self._headers
+                    session.headers.update(headers or {})
+                    self._session = session
+        return self._session
+
+    def _sleep_before_retry(self, attempt: int, response=None) -> None:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            # full jitter: 0 ~ base * 2^attempt
+            delay = random.uniform(0, self.backoff_base * 2 ** attempt)
+        time.sleep(min(delay, self.backoff_max))
+
+    def request(self, method: str, path: str, read_timeout=None, **kwargs) -> requests.Response:
+        url = f"{self.base_url}{path}"
+        timeout = (self.connect_timeout, read_timeout or self.read_timeout)
+        latency = _latency_histogram(self.name)
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        retry_statuses = _retry_statuses(method)
+
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                r = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                latency.observe(time.perf_counter() - start)
+                # ConnectTimeout은 ConnectionError이기도 함 -> ReadTimeout만 남음
+                read_timed_out = isinstance(e, requests.Timeout) and not isinstance(e, requests.ConnectionError)
+                if attempt == self.max_retries or (read_timed_out and not idempotent):
+                    raise
+                self._sleep_before_retry(attempt)
+                continue
+
+            latency.observe(time.perf_counter() - start)
+            if r.status_code in retry_statuses and attempt < self.max_retries:
+                self._sleep_before_retry(attempt, r)
+                continue
+            r.raise_for_status()
+            return r
+
+    def get(self, path: str, **kwargs) -> requests.Response:
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path: str, **kwargs) -> requests.Response:
+        return self.request("POST", path, **kwargs)
+
+
+class AsyncUpstreamClient:
+    """
+    UpstreamClient의 async 버전 (httpx.AsyncClient).
+    ASGI에서 응답을 기다리는 동안 스레드를 잡고 있지 않으므로 동시 요청 수백 개도 워커 하나로 처리 가능.
+    httpx.AsyncClient는 이벤트 루프에 묶이므로 루프마다 하나씩 만들어 둔다.
+    WSGI에서 async 뷰는 async_to_sync가 요청마다 새 루프(asyncio.run)를 만들고 닫으므로,
+    루프가 끝날 때 남은 task를 취소하는 시점에 그 루프의 클라이언트도 같이 닫는다 (소켓 누수 방지)
+    """
+
+    def __init__(self, sync_client: UpstreamClient):
+        self.sync = sync_client
+        self._clients = weakref.WeakKeyDictionary()  # event loop -> (httpx.AsyncClient, 닫기 task)
+
+    @property
+    def name(self) -> str:
+        return self.sync.name
+
+    def reset(self) -> None:
+        """설정이 바뀌면 루프별 httpx 클라이언트를 버림 (다음 요청 때 새 설정으로 만듦)"""
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(loop)
+        if entry is None:
+            c = self.sync
+            headers = c._headers() if callable(c._headers) else c._headers
+            client = httpx.AsyncClient(
+                base_url=c.base_url,
+                headers=headers or {},
+                limits=httpx.Limits(max_connections=c.pool_size, max_keepalive_connections=c.pool_size),
+                timeout=httpx.Timeout(c.read_timeout, connect=c.connect_timeout),
+            )
+            closer = loop.create_task(self._close_with_loop(self._clients, loop, client))
+            entry = self._clients[loop] = (client, closer)
+        return entry[0]
+
+    @staticmethod
+    async def _close_with_loop(clients, loop, client: httpx.AsyncClient) -> None:
+        """루프가 끝날 때까지 기다렸다가(취소되면) 같은 루프 안에서 클라이언트를 닫음"""
+        try:
+            await asyncio.Event().wait()
+        finally:
+            clients.pop(loop, None)
+            await client.aclose()
+
+    async def _sleep_before_retry(self, attempt: int, response=None) -> None:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        else:
+            delay = random.uniform(0, self.sync.backoff_base * 2 ** attempt)
+        await asyncio.sleep(min(delay, self.sync.backoff_max))
+
+    def _timeout(self, read_timeout):
+        return httpx.Timeout(read_timeout or self.sync.read_timeout, connect=self.sync.connect_timeout)
+
+    async def request(self, method: str, path: str, read_timeout=None, **kwargs) -> httpx.Response:
+        client = self._client()
+        latency = _latency_histogram(self.name)
+        # POST는 요청을 보내기 전에 실패한 경우(연결)만 재시도
+        retry_errors = httpx.TransportError if method.upper() in IDEMPOTENT_METHODS else (
+            httpx.ConnectError, httpx.ConnectTimeout)
+        retry_statuses = _retry_statuses(method)
+
+        for attempt in range(self.sync.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                r = await client.request(method, path, timeout=self._timeout(read_timeout), **kwargs)
+            except retry_errors:
+                latency.observe(time.perf_counter() - start)
+                if attempt == self.sync.max_retries:
+                    raise
+                await self._sleep_before_retry(attempt)
+                continue
+
+            latency.observe(time.perf_counter() - start)
+            if r.status_code in retry_statuses and attempt < self.sync.max_retries:
+                await self._sleep_before_retry(attempt, r)
+                continue
+            r.raise_for_status()
+            return r
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def stream_lines(self, method: str, path: str, read_timeout=None, **kwargs):
+        """
+        스트리밍 응답을 줄 단위로 내보냄 (SSE 등).
+        응답이 시작되기 전(연결/429/5xx)까지만 재시도하고, 스트림 도중 끊기면 그대로 예외
+        """
+        client = self._client()
+        latency = _latency_histogram(self.name)
+        retry_statuses = _retry_statuses(method)
+
+        for attempt in range(self.sync.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                async with client.stream(method, path, timeout=self._timeout(read_timeout), **kwargs) as r:
+                    # 스트림은 첫 응답(헤더)까지의 시간을 기록
+                    latency.observe(time.perf_counter() - start)
+                    if r.status_code in retry_statuses and attempt < self.sync.max_retries:
+                        await self._sleep_before_retry(attempt, r)
+                        continue
+                    r.raise_for_status()
+                    async for line in r.aiter_lines():
+                        yield line
+                    return
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                latency.observe(time.perf_counter() - start)
+                if attempt == self.sync.max_retries:
+                    raise
+                await self._sleep_before_retry(attempt)
+
+
+def _client_options(name: str) -> dict:
+    """
+    settings.UPSTREAM_HTTP[name] 예시:
+        {"BASE_URL": "http://127.0.0.1:8765", "POOL_SIZE": 20, "CONNECT_TIMEOUT": 3.05,
+         "READ_TIMEOUT": 30, "MAX_RETRIES": 3}
+    테스트에서는 override_settings(UPSTREAM_HTTP=...)로 BASE_URL만 로컬 스텁 서버로 바꾸면 됨
+    (setting_changed를 받아 클라이언트 설정을 다시 읽음)
+    """
+    conf = getattr(settings, "UPSTREAM_HTTP", {}).get(name, {})
+    return {
+        "base_url": conf["BASE_URL"],
+        "pool_size": conf.get("POOL_SIZE", 10),
+        "connect_timeout": conf.get("CONNECT_TIMEOUT", 3.05),
+        "read_timeout": conf.get("READ_TIMEOUT", 30),
+        "max_retries": conf.get("MAX_RETRIES", 3),
+        "backoff_base": conf.get("BACKOFF_BASE", 0.5),
+    }
+
+
+def _client_from_settings(name: str, headers=None) -> UpstreamClient:
+    return UpstreamClient(name, headers=headers, **_client_options(name))
+
+
+def _upstage_headers() -> dict:
+    from .upstage_utils import _get_upstage_key
+    return {"Authorization": f"Bearer {_get_upstage_key()}"}
+
+
+upstage_client = _client_from_settings("upstage", headers=_upstage_headers)
+tmdb_client = _client_from_settings("tmdb")
+async_upstage_client = AsyncUpstreamClient(upstage_client)
+
+
+@receiver(setting_changed)
+def reload_upstream_settings(setting, **kwargs):
+    """override_settings(UPSTREAM_HTTP=...) 등으로 설정이 바뀌면 같은 클라이언트 객체에 다시 적용"""
+    if setting != "UPSTREAM_HTTP":
+        return
+    conf = getattr(settings, "UPSTREAM_HTTP", {})
+    for client in (upstage_client, tmdb_client):
+        if client.name in conf:  # 일부 upstream만 덮어쓴 경우 나머지는 그대로
+            client.configure(**_client_options(client.name))
+    async_upstage_client.reset()
@@ -0,0 +1,124 @@
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from movies.models import Movie
+from .metrics import register_collector
+from .models import EmbeddingJob
+from .upstage_utils import build_or_update_movie_embedding
+
+
+def _conf(name: str, default):
+    return getattr(settings, "CHATBOT_EMBEDDING_JOBS", {}).get(name, default)
+
+
+def enqueue_movie_embedding(movie: Movie) -> None:
+    """
+    임베딩 작업 예약 (요청 처리 중엔 DB에 한 줄 쓰기만 함)
+    이미 대기 중인 작업이 있으면 실행 시각만 뒤로 미뤄서 연속 수정을 한 번으로 합침
+    """
+    EmbeddingJob.objects.update_or_create(
+        movie=movie,
+        defaults={
+            "status": "pending",
+            "attempts": 0,
+            "run_after": timezone.now() + timedelta(seconds=_conf("DEBOUNCE", 5)),
+            "last_error": "",
+        },
+    )
+
+
+def enqueue_movie_embeddings(movie_ids, batch_size: int = 500) -> None:
+    """enqueue_movie_embedding의 일괄 버전 (import_tmdb처럼 bulk_create로 저장한 영화용)"""
+    run_after = timezone.now() + timedelta(seconds=_conf("DEBOUNCE", 5))
+    EmbeddingJob.objects.bulk_create(
+        [EmbeddingJob(movie_id=movie_id, status="pending", attempts=0, run_after=run_after) for movie_id in movie_ids],
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["movie"],
+        update_fields=["status", "attempts", "run_after", "last_error", "updated_at"],
+    )
+
+
+def count_embedding_results(movie_ids, result: str, batch_size: int = 500) -> None:
+    """
+    run_job 밖(reindex_embeddings)에서 임베딩했거나(result="embedded") 건너뛴(result="skipped") 영화도
+    /metrics의 chatbot_movie_embeddings_total 누적 횟수에 더함. 작업 행이 없는 영화는 done 상태 행을 만들어서 셈
+    """
+    movie_ids = list(movie_ids)
+    now = timezone.now()
+    for i in range(0, len(movie_ids), batch_size):
+        chunk = movie_ids[i:i + batch_size]
+        EmbeddingJob.objects.bulk_create(
+            [EmbeddingJob(movie_id=movie_id, status="done", run_after=now) for movie_id in chunk],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        EmbeddingJob.objects.filter(movie_id__in=chunk).update(**{result: F(result) + 1})
+
+
+def claim_jobs(limit: int = 10) -> list[EmbeddingJob]:
+    """
+    실행할 작업을 running으로 바꾸면서 가져옴 (여러 워커가 동시에 돌아도 한 작업은 한 워커만)
+    워커가 죽어서 오래 running에 멈춘 작업도 다시 가져감
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=_conf("STALE_AFTER", 10 * 60))
+    candidates = (
+        EmbeddingJob.objects
+        .filter(Q(status="pending", run_after__lte=now) | Q(status="running", updated_at__lt=stale))
+        .order_by("run_after")
+        .values_list("pk", "status")[:limit]
+    )
+
+    claimed = []
+    for pk, status in candidates:
+        if EmbeddingJob.objects.filter(pk=pk, status=status).update(status="running", updated_at=now):
+            claimed.append(pk)
+    return list(EmbeddingJob.objects.filter(pk__in=claimed).select_related("movie"))
+
+
+def _backoff(attempts: int) -> timedelta:
+    base = _conf("BACKOFF_BASE", 10)
+    delay = min(base * 2 ** (attempts - 1), _conf("BACKOFF_MAX", 60 * 60))
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def run_job(job: EmbeddingJob) -> bool:
+    """작업 하나 실행. 실패하면 지수 백오프로 재시도 예약, 횟수를 넘기면 failed"""
+    try:
+        embedded = build_or_update_movie_embedding(job.movie)
+    except Exception as e:
+        attempts = job.attempts + 1
+        failed = attempts >= _conf("MAX_ATTEMPTS", 5)
+        # 실행 중에 다시 예약됐으면(status가 pending으로 바뀜) 그 예약을 살려둠
+        EmbeddingJob.objects.filter(pk=job.pk, status="running").update(
+            status="failed" if failed else "pending",
+            attempts=attempts,
+            run_after=timezone.now() + _backoff(attempts),
+            last_error=str(e),
+            updated_at=timezone.now(),
+        )
+        return False
+
+    counter = "embedded" if embedded else "skipped"
+    EmbeddingJob.objects.filter(pk=job.pk).update(**{counter: F(counter) + 1})
+    EmbeddingJob.objects.filter(pk=job.pk, status="running").update(
+        status="done", last_error="", updated_at=timezone.now(),
+    )
+    return True
+
+
+def _embedding_metrics() -> list[tuple]:
+    # 영화가 삭제되면 그 행의 횟수도 같이 빠짐 (Prometheus는 감소를 리셋으로 처리)
+    totals = EmbeddingJob.objects.aggregate(embedded=Sum("embedded"), skipped=Sum("skipped"))
+    return [
+        ("chatbot_movie_embeddings_total", "counter", {"result": result}, totals[result] or 0)
+        for result in ("embedded", "skipped")
+    ]
+
+
+register_collector(_embedding_metrics)
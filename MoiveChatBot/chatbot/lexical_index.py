@@ -0,0 +1,323 @@
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from movies.models import Movie
+from .filters import GENRE_CODES, RetrievalFilters
+
+_WORD_RE = re.compile(r"[가-힣]+|[a-z0-9]+|[^\W_가-힣a-z0-9]+")
+_HANGUL_RE = re.compile(r"[가-힣]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    한국어 친화 토크나이저: 단어 그대로 + 한글 단어는 글자 2-gram도 추가
+    ("액션영화" -> 액션영화, 액션, 션영, 영화) 조사가 붙거나 띄어쓰기가 달라도 매칭되도록
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    tokens = []
+    for word in _WORD_RE.findall(text):
+        tokens.append(word)
+        if len(word) > 2 and _HANGUL_RE.fullmatch(word):
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+class BM25Index:
+    """
+    movie_to_text 결과에 대한 BM25 역색인 (프로세스 전역, 영화 저장/삭제 시 부분 갱신)
+    모든 영화를 들고 있으므로 장르/연도/별점 메타데이터 배열도 같이 관리해서 검색 전 후보 필터링에 씀
+    - postings: term -> {문서 위치: tf}
+    - 검색할 때는 term별 postings를 numpy 배열로 굳혀서(캐시) 점수를 벡터 연산으로 누적
+    - 이미 있는 영화를 다시 넣으면 같은 위치를 덮어쓰고, 삭제로 빈 위치는 다음에 추가되는 영화가 재사용
+      (수정이 반복돼도 배열/점수 배열 크기가 늘지 않음)
+    - 전체 문서의 max_df 비율 이상에 나오는 흔한 단어("영화", "제목" 등)는 점수에 거의 영향이 없고
+      postings만 길어서, 다른 단어가 있으면 건너뜀
+    """
+
+    def __init__(self, k1=1.2, b=0.75, max_df=0.5, refresh_interval=None):
+        self.k1 = k1
+        self.b = b
+        self.max_df = max_df
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pos = {}  # movie_id -> 위치
+        self._doc_ids = np.empty(0, dtype=np.int64)
+        self._doc_len = np.empty(0, dtype=np.float32)
+        self._genre = np.empty(0, dtype=np.int8)
+        self._year = np.empty(0, dtype=np.int32)
+        self._rating = np.empty(0, dtype=np.int8)
+        self._doc_terms = []  # 위치 -> Counter (삭제/갱신 때 postings에서 빼기 위해)
+        self._free = []  # 삭제로 비어서 재사용할 위치
+        self._size = 0
+        self._postings = {}
+        self._frozen = {}
+        self._total_len = 0
+        self._alive = 0
+        self._synced_at = None
+        self._checked_at = 0.0
+
+    # ----- 문서 추가/삭제 -----
+    def _grow(self) -> None:
+        capacity = max(1024, len(self._doc_ids) * 2)
+        doc_ids = np.full(capacity, -1, dtype=np.int64)
+        doc_ids[:self._size] = self._doc_ids[:self._size]
+        self._doc_ids = doc_ids
+        self._doc_len = self._grown(self._doc_len, capacity, 0)
+        self._genre = self._grown(self._genre, capacity, -1)
+        self._year = self._grown(self._year, capacity, 0)
+        self._rating = self._grown(self._rating, capacity, 0)
+
+    def _grown(self, arr: np.ndarray, capacity: int, fill) -> np.ndarray:
+        out = np.full(capacity, fill, dtype=arr.dtype)
+        out[:self._size] = arr[:self._size]
+        return out
+
+    def _clear_slot(self, pos: int) -> None:
+        """pos 위치 문서를 postings/통계에서 빼고 비움 (위치는 호출한 쪽이 재사용하거나 _free에 넣음)"""
+        for term in self._doc_terms[pos]:
+            postings = self._postings[term]
+            del postings[pos]
+            if not postings:
+                del self._postings[term]
+            self._frozen.pop(term, None)
+        self._total_len -= int(self._doc_len[pos])
+        self._doc_terms[pos] = Counter()
+        self._doc_len[pos] = 0
+        self._doc_ids[pos] = -1
+        self._genre[pos] = -1
+        self._alive -= 1
+
+    def _remove_locked(self, movie_id: int) -> None:
+        pos = self._pos.pop(movie_id, None)
+        if pos is None:
+            return
+        self._clear_slot(pos)
+        self._free.append(pos)
+
+    def _add_locked(self, movie: Movie, text: str) -> None:
+        movie_id = movie.pk
+        pos = self._pos.get(movie_id)
+        if pos is not None:
+            self._clear_slot(pos)  # 같은 영화: 제자리 덮어쓰기
+        elif self._free:
+            pos = self._free.pop()
+        else:
+            if self._size == len(self._doc_ids):
+                self._grow()
+            pos = self._size
+            self._size += 1
+            self._doc_terms.append(Counter())
+
+        terms = Counter(tokenize(text))
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[pos] = tf
+            self._frozen.pop(term, None)
+
+        length = sum(terms.values())
+        self._pos[movie_id] = pos
+        self._doc_ids[pos] = movie_id
+        self._doc_len[pos] = length
+        self._genre[pos] = GENRE_CODES.get(movie.genre, -1)
+        self._year[pos] = movie.release_year or 0
+        self._rating[pos] = movie.rating or 0
+        self._doc_terms[pos] = terms
+        self._total_len += length
+        self._alive += 1
+
+    def upsert(self, movie: Movie) -> None:
+        from .upstage_utils import movie_to_text
+
+        with self._lock:
+            if self._loaded:
+                self._add_locked(movie, movie_to_text(movie))
+
+    def remove(self, movie_id: int) -> None:
+        with self._lock:
+            if self._loaded:
+                self._remove_locked(movie_id)
+
+    # ----- 로딩/갱신 -----
+    def _load(self) -> None:
+        from .upstage_utils import movie_to_text
+
+        self._reset()
+        synced_at = None
+        for movie in Movie.objects.all().iterator(chunk_size=2000):
+            self._add_locked(movie, movie_to_text(movie))
+            if synced_at is None or movie.updated_at > synced_at:
+                synced_at = movie.updated_at
+        self._synced_at = synced_at
+        self._checked_at = time.monotonic()
+        self._loaded = True
+
+    def _refresh(self) -> None:
+        """다른 프로세스에서 바뀐 영화 반영 (updated_at 기준), 개수가 안 맞으면 전체 재로딩"""
+        from .upstage_utils import movie_to_text
+
+        changed = Movie.objects.all()
+        if self._synced_at is not None:
+            changed = changed.filter(updated_at__gt=self._synced_at)
+        for movie in changed:
+            self._add_locked(movie, movie_to_text(movie))
+            if self._synced_at is None or movie.updated_at > self._synced_at:
+                self._synced_at = movie.updated_at
+        if Movie.objects.count() != self._alive:
+            self._load()
+
+    def _needs_blocking_work(self) -> bool:
+        if not self._loaded:
+            return True
+        return bool(self.refresh_interval) and time.monotonic() - self._checked_at >= self.refresh_interval
+
+    def _ensure_fresh(self) -> None:
+        if not self._needs_blocking_work():
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            elif self._needs_blocking_work():
+                self._checked_at = time.monotonic()
+                self._refresh()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+            self._reset()
+
+    # ----- 검색 -----
+    def _postings_array(self, term: str):
+        arrays = self._frozen.get(term)
+        if arrays is None:
+            postings = self._postings[term]
+            arrays = (
+                np.fromiter(postings.keys(), dtype=np.int64, count=len(postings)),
+                np.fromiter(postings.values(), dtype=np.float32, count=len(postings)),
+            )
+            self._frozen[term] = arrays
+        return arrays
+
+    def _filter_mask(self, filters: RetrievalFilters) -> np.ndarray:
+        """위치별로 조건을 만족하는지 (장르/연도/별점 배열에 대한 벡터 연산)"""
+        size = self._size
+        mask = self._doc_ids[:size] >= 0
+        if filters.genres:
+            codes = [GENRE_CODES[g] for g in filters.genres if g in GENRE_CODES]
+            mask &= np.isin(self._genre[:size], codes)
+        if filters.exclude_genres:
+            codes = [GENRE_CODES[g] for g in filters.exclude_genres if g in GENRE_CODES]
+            mask &= ~np.isin(self._genre[:size], codes)
+        if filters.year_min is not None:
+            mask &= self._year[:size] >= filters.year_min
+        if filters.year_max is not None:
+            mask &= self._year[:size] <= filters.year_max
+        if filters.rating_min is not None:
+            mask &= self._rating[:size] >= filters.rating_min
+        return mask
+
+    def filter_ids(self, filters: RetrievalFilters) -> np.ndarray:
+        """조건에 맞는 movie_id 배열 (정렬됨)"""
+        self._ensure_fresh()
+        return self._filter_ids(filters)
+
+    def _filter_ids(self, filters: RetrievalFilters, blocking=True) -> np.ndarray:
+        """blocking=False면 락을 바로 못 잡을 때 None"""
+        if not self._lock.acquire(blocking=blocking):
+            return None
+        try:
+            return np.sort(self._doc_ids[:self._size][self._filter_mask(filters)])
+        finally:
+            self._lock.release()
+
+    async def afilter_ids(self, filters: RetrievalFilters) -> np.ndarray:
+        # 다른 스레드가 다시 읽는 중(수 초 걸릴 수 있음)이면 이벤트 루프에서 기다리지 않고 스레드로 넘김
+        if not self._needs_blocking_work():
+            ids = self._filter_ids(filters, blocking=False)
+            if ids is not None:
+                return ids
+        return await sync_to_async(self.filter_ids)(filters)
+
+    def _search(self, query: str, k: int, filters: RetrievalFilters = None,
+                blocking=True) -> list[tuple[int, float]]:
+        """blocking=False면 락을 바로 못 잡을 때 None"""
+        query_terms = dict.fromkeys(tokenize(query))
+        if not self._lock.acquire(blocking=blocking):
+            return None
+        try:
+            terms = [t for t in query_terms if t in self._postings]
+            if not terms or self._alive == 0 or k <= 0:
+                return []
+            mask = self._filter_mask(filters) if filters else None
+
+            n = self._alive
+            rare = [t for t in terms if len(self._postings[t]) <= self.max_df * n]
+            terms = rare or terms
+
+            avgdl = self._total_len / n
+            parts = []
+            for term in terms:
+                positions, tf = self._postings_array(term)
+                df = len(positions)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                dl = self._doc_len[positions]
+                parts.append((positions, idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * dl / avgdl))))
+            size = self._size
+            # 락을 놓은 뒤 다른 스레드가 위치를 비우거나 재사용해도 이 검색은 지금의 id로 끝나도록 복사
+            doc_ids = self._doc_ids[:size].copy()
+        finally:
+            self._lock.release()
+
+        total = sum(len(positions) for positions, _ in parts)
+        if total * 8 < size:
+            # 후보가 적으면 전체 크기 배열 없이 후보끼리만 합산
+            positions = np.concatenate([p for p, _ in parts])
+            candidates, inverse = np.unique(positions, return_inverse=True)
+            cand_scores = np.bincount(inverse, weights=np.concatenate([c for _, c in parts]))
+        else:
+            scores = np.zeros(size, dtype=np.float32)
+            for positions, contrib in parts:
+                scores[positions] += contrib
+            candidates = np.flatnonzero(scores)
+            cand_scores = scores[candidates]
+
+        if mask is not None:
+            keep = mask[candidates]
+            candidates, cand_scores = candidates[keep], cand_scores[keep]
+
+        k = min(k, len(candidates))
+        if k == 0:
+            return []
+        top = np.argpartition(cand_scores, -k)[-k:]
+        top = top[np.argsort(cand_scores[top])[::-1]]
+        return [(int(doc_ids[candidates[i]]), float(cand_scores[i])) for i in top]
+
+    def search(self, query: str, k: int = 20, filters: RetrievalFilters = None) -> list[tuple[int, float]]:
+        """BM25 점수 상위 k개의 (movie_id, score)"""
+        self._ensure_fresh()
+        return self._search(query, k, filters)
+
+    async def asearch(self, query: str, k: int = 20, filters: RetrievalFilters = None) -> list[tuple[int, float]]:
+        if not self._needs_blocking_work():
+            hits = self._search(query, k, filters, blocking=False)
+            if hits is not None:
+                return hits
+        return await sync_to_async(self.search)(query, k, filters)
+
+
+def _lexical_index_from_settings() -> BM25Index:
+    conf = getattr(settings, "CHATBOT_HYBRID", {})
+    return BM25Index(refresh_interval=conf.get("REFRESH_INTERVAL", 30))
+
+
+lexical_index = _lexical_index_from_settings()
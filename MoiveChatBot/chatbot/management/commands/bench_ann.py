@@ -0,0 +1,93 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from chatbot.upstage_utils import cosine_similarity
+from chatbot.vector_index import IVFMovieIndex, MovieVectorIndex
+
+
+class Command(BaseCommand):
+    help = "합성 임베딩으로 IVF(ANN) 검색의 recall / latency를 exact 검색과 비교"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--n", type=int, default=100_000, help="영화(벡터) 수")
+        parser.add_argument("--dim", type=int, default=256, help="임베딩 차원")
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--k", type=int, default=5)
+        parser.add_argument("--nlist", type=int, default=None, help="기본값: sqrt(n)")
+        parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+        parser.add_argument("--clusters", type=int, default=200, help="합성 데이터의 주제(클러스터) 수")
+        parser.add_argument("--topics-per-vector", type=int, default=3,
+                            help="벡터 하나에 섞는 주제 수 (여러 주제에 걸친 영화처럼 클러스터 경계를 흐림)")
+        parser.add_argument("--noise", type=float, default=1.0,
+                            help="주제 벡터 대비 잡음 크기 (클수록 클러스터가 겹쳐서 어려워짐)")
+        parser.add_argument("--python-queries", type=int, default=3,
+                            help="기존 순수 파이썬 cosine_similarity 경로로 잴 질문 수 (0이면 생략)")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **opts):
+        n, dim, k = opts["n"], opts["dim"], opts["k"]
+        rng = np.random.default_rng(opts["seed"])
+
+        # 실제 임베딩처럼 주제별로 뭉치되, 여러 주제가 섞이고 잡음이 커서 클러스터끼리 겹치는 분포
+        # (주제 하나 + 작은 잡음이면 nprobe=1로도 recall이 1.0이라 nprobe 비교가 안 됨)
+        topics = rng.normal(size=(opts["clusters"], dim)).astype(np.float32)
+
+        def sample(m):
+            labels = rng.integers(0, opts["clusters"], size=(m, opts["topics_per_vector"]))
+            weights = rng.dirichlet(np.ones(opts["topics_per_vector"]), size=m).astype(np.float32)
+            mixed = np.einsum("mt,mtd->md", weights, topics[labels])
+            return mixed + opts["noise"] * rng.normal(size=(m, dim)).astype(np.float32)
+
+        vectors = sample(n)
+        queries = sample(opts["queries"])
+        ids = np.arange(1, n + 1)
+
+        self.stdout.write(
+            f"corpus: n={n}, dim={dim}, queries={len(queries)}, k={k}, "
+            f"clusters={opts['clusters']}, topics/vector={opts['topics_per_vector']}, noise={opts['noise']}"
+        )
+
+        # 1) 기존 경로: 순수 파이썬 cosine_similarity 루프
+        if opts["python_queries"]:
+            rows = vectors.tolist()
+            elapsed = []
+            for q in queries[:opts["python_queries"]].tolist():
+                start = time.perf_counter()
+                scored = [(i, cosine_similarity(q, v)) for i, v in enumerate(rows)]
+                scored.sort(key=lambda x: x[1], reverse=True)
+                elapsed.append(time.perf_counter() - start)
+            self.stdout.write(f"python cosine loop : {np.mean(elapsed) * 1000:9.2f} ms/query")
+
+        # 2) exact (NumPy brute-force) = recall 기준값
+        exact = MovieVectorIndex()
+        exact.build(ids, vectors)
+        truth, exact_ms = self._run(exact.search, queries, k)
+        self.stdout.write(f"exact numpy        : {exact_ms:9.3f} ms/query  recall@{k}=1.000")
+
+        # 3) IVF, nprobe 별 recall/latency
+        ivf = IVFMovieIndex(nlist=opts["nlist"], min_train_size=0, seed=opts["seed"])
+        start = time.perf_counter()
+        ivf.build(ids, vectors)
+        ivf.search(queries[0], k)  # 학습 트리거
+        self.stdout.write(f"ivf train          : {(time.perf_counter() - start):9.2f} s  (nlist={len(ivf._centroids)})")
+
+        recalls = []
+        for nprobe in opts["nprobe"]:
+            results, ms = self._run(lambda q, k: ivf.search(q, k, nprobe=nprobe), queries, k)
+            recall = np.mean([len(set(r) & set(t)) / len(t) for r, t in zip(results, truth)])
+            recalls.append(recall)
+            self.stdout.write(f"ivf nprobe={nprobe:<7d} : {ms:9.3f} ms/query  recall@{k}={recall:.3f}")
+        if recalls and min(recalls) == 1.0:
+            self.stdout.write(self.style.WARNING(
+                "모든 nprobe에서 recall이 1.0: 데이터가 너무 쉬움 (--noise / --topics-per-vector를 키울 것)"
+            ))
+
+    def _run(self, search, queries, k):
+        results = []
+        start = time.perf_counter()
+        for q in queries:
+            results.append([movie_id for movie_id, _ in search(q, k)])
+        ms = (time.perf_counter() - start) * 1000 / len(queries)
+        return results, ms
@@ -0,0 +1,218 @@
+import json
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+from unittest import mock
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+
+from movies.models import Movie
+from movies.testing import seed_movies, test_database
+from chatbot.cache import query_embedding_cache, semantic_answer_cache
+from chatbot.lexical_index import lexical_index
+from chatbot.metrics import percentiles
+from chatbot.models import MovieEmbedding
+from chatbot.upstage_stub import fake_answer, fake_embedding
+from chatbot.upstage_utils import embedding_fields, movie_text_hash, movie_to_text, retrieve_top_k_movies
+from chatbot.vector_index import movie_index
+
+_TITLE_WORDS = ["밤", "바다", "기억", "도시", "전쟁", "사랑", "비밀", "여름", "그림자", "별",
+                "Last", "Night", "Storm", "Dream", "City", "Ghost", "Road", "Fire"]
+_NAMES = ["김민수", "이서연", "박지훈", "최유진", "정하늘", "강도윤", "윤서준", "한지민",
+          "Tom Park", "Emma Stone", "Ryan Lee", "Anna Kim"]
+_REVIEW_PARTS = ["연출이 좋았다.", "배우들의 연기가 인상적이었다.", "결말이 아쉬웠다.", "음악이 기억에 남는다.",
+                 "중반부가 조금 지루했다.", "다시 보고 싶은 영화.", "가족과 보기 좋다.", "긴장감이 끝까지 유지된다."]
+_QUESTION_TEMPLATES = [
+    "{genre} 영화 추천해줘",
+    "{year}년 이후 {genre} 영화 중에 볼만한 거",
+    "{name} 나오는 영화 있어?",
+    "{word} 같은 분위기의 영화",
+    "별점 4점 이상 {genre} 영화",
+    "{decade}년대 영화 추천",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "테스트 DB에 합성 영화/임베딩 N개를 넣고, Upstage 호출을 결정적 로컬 가짜로 바꿔서 "
+        "retrieve_top_k_movies / chatbot_response의 처리량과 p50/p95/p99를 측정해 JSON으로 저장.\n"
+        "예) python manage.py bench_chatbot --sizes 1000 10000 100000 --output bench.json\n"
+        "    python manage.py bench_chatbot --baseline bench.json   # 이전 결과 대비 느려졌으면 실패"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000], help="영화 수")
+        parser.add_argument("--queries", type=int, default=200, help="크기별 측정 질문 수")
+        parser.add_argument("--chat-requests", type=int, default=100, help="크기별 chatbot_response 요청 수")
+        parser.add_argument("--dim", type=int, default=256, help="가짜 임베딩 차원")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", default="bench_chatbot.json")
+        parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+        parser.add_argument("--tolerance", type=float, default=0.2,
+                            help="baseline 대비 p95가 이 비율 넘게 늘면 회귀로 판단")
+
+    def handle(self, *args, **opts):
+        sizes = sorted(set(opts["sizes"]))
+        rng = random.Random(opts["seed"])
+        dim = opts["dim"]
+
+        def embed(text, model=None):
+            return fake_embedding(text, dim)
+
+        def chat(system, user):
+            return fake_answer(user)
+
+        # 요청마다 찍히는 trace 로그는 끄고 히스토그램만 유지
+        metrics_conf = {**getattr(settings, "CHATBOT_METRICS", {}), "LOG": False}
+
+        try:
+            with test_database(), \
+                    mock.patch("chatbot.upstage_utils.upstage_embed", embed), \
+                    mock.patch("chatbot.upstage_utils.upstage_chat", chat), \
+                    mock.patch("chatbot.views.upstage_chat", chat), \
+                    override_settings(CHATBOT_METRICS=metrics_conf):
+                results = [self._bench_size(n, rng, dim, opts) for n in sizes]
+        finally:
+            self._reset_state()
+
+        report = {"meta": self._meta(opts), "results": results}
+        with open(opts["output"], "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"결과 저장: {opts['output']}"))
+
+        if opts["baseline"]:
+            self._compare(report, opts["baseline"], opts["tolerance"])
+
+    # ----- 데이터 준비 -----
+    def _seed(self, n: int, rng: random.Random, dim: int) -> float:
+        """영화 수가 n이 될 때까지 추가 (크기를 키워가며 재사용). 임베딩도 청크마다 같이 넣음"""
+        def fields(rng, i):
+            return {
+                "title": f"{rng.choice(_TITLE_WORDS)} {rng.choice(_TITLE_WORDS)} {i}",
+                "release_year": rng.randint(1970, 2024),
+                "director": rng.choice(_NAMES),
+                "actors": ", ".join(rng.sample(_NAMES, 2)),
+                "review": " ".join(rng.choices(_REVIEW_PARTS, k=rng.randint(1, 4))),
+                "is_tmdb": False,
+            }
+
+        def add_embeddings(movies):
+            MovieEmbedding.objects.bulk_create([
+                MovieEmbedding(movie=m, **embedding_fields(fake_embedding(movie_to_text(m), dim), movie_text_hash(m)))
+                for m in movies
+            ])
+
+        start = time.perf_counter()
+        seed_movies(n, rng, fields=fields, chunk=2000, after_chunk=add_embeddings)
+        return time.perf_counter() - start
+
+    def _questions(self, count: int, rng: random.Random) -> list[str]:
+        genres = [g for g, _ in Movie.GENRE_CHOICES]
+        # 끝에 번호를 붙여서 질문 임베딩/답변 캐시에 걸리지 않게 함
+        return [
+            rng.choice(_QUESTION_TEMPLATES).format(
+                genre=rng.choice(genres), year=rng.randint(1980, 2020), name=rng.choice(_NAMES),
+                word=rng.choice(_TITLE_WORDS), decade=rng.choice([8, 9, 19, 20]) * 10,
+            ) + f" #{i}"
+            for i in range(count)
+        ]
+
+    def _reset_state(self) -> None:
+        movie_index.invalidate()
+        lexical_index.invalidate()
+        query_embedding_cache.clear()
+        semantic_answer_cache.clear()
+
+    # ----- 측정 -----
+    def _bench_size(self, n: int, rng: random.Random, dim: int, opts) -> dict:
+        seed_seconds = self._seed(n, rng, dim)
+        self._reset_state()
+
+        start = time.perf_counter()
+        retrieve_top_k_movies("워밍업", k=5)  # 벡터/BM25 인덱스 로딩
+        load_seconds = time.perf_counter() - start
+
+        retrieve = self._measure(lambda q: retrieve_top_k_movies(q, k=5), self._questions(opts["queries"], rng))
+
+        client = Client()
+        chat = self._measure(
+            lambda q: client.post("/chatbot/response/", {"message": q}),
+            self._questions(opts["chat_requests"], rng),
+        )
+
+        result = {
+            "n": n,
+            "seed_seconds": round(seed_seconds, 3),
+            "index_load_seconds": round(load_seconds, 4),
+            "retrieve_top_k_movies": retrieve,
+            "chatbot_response": chat,
+        }
+        self.stdout.write(
+            f"n={n:<7d} load={load_seconds * 1000:8.1f}ms  "
+            f"retrieve {retrieve['qps']:8.1f} q/s p50={retrieve['p50_ms']:7.2f} p95={retrieve['p95_ms']:7.2f} "
+            f"p99={retrieve['p99_ms']:7.2f}ms  |  "
+            f"response {chat['qps']:7.1f} req/s p50={chat['p50_ms']:7.2f} p95={chat['p95_ms']:7.2f} "
+            f"p99={chat['p99_ms']:7.2f}ms"
+        )
+        return result
+
+    def _measure(self, fn, questions) -> dict:
+        latencies = []
+        started = time.perf_counter()
+        for q in questions:
+            start = time.perf_counter()
+            fn(q)
+            latencies.append(time.perf_counter() - start)
+        elapsed = time.perf_counter() - started
+        p = percentiles(latencies)
+        return {
+            "count": len(latencies),
+            "qps": round(len(latencies) / elapsed, 2),
+            **{f"{name}_ms": round(value * 1000, 3) for name, value in p.items()},
+        }
+
+    def _meta(self, opts) -> dict:
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except OSError:
+            commit = ""
+        return {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "db_vendor": connection.vendor,
+            "vector_index": getattr(settings, "CHATBOT_VECTOR_INDEX", {}).get("BACKEND", "exact"),
+            "embedding_dtype": getattr(settings, "CHATBOT_EMBEDDING_DTYPE", "f32"),
+            "hybrid": getattr(settings, "CHATBOT_HYBRID", {}).get("ENABLED", True),
+            "dim": opts["dim"],
+            "seed": opts["seed"],
+        }
+
+    def _compare(self, report: dict, baseline_path: str, tolerance: float) -> None:
+        """같은 n끼리 p95를 비교해서 tolerance 넘게 느려진 항목이 있으면 CommandError"""
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = {r["n"]: r for r in json.load(f)["results"]}
+
+        regressions = []
+        for result in report["results"]:
+            before = baseline.get(result["n"])
+            if before is None:
+                continue
+            for name in ("retrieve_top_k_movies", "chatbot_response"):
+                old, new = before[name]["p95_ms"], result[name]["p95_ms"]
+                change = (new - old) / old if old else 0.0
+                self.stdout.write(f"n={result['n']:<7d} {name:<22} p95 {old:8.2f} -> {new:8.2f}ms ({change:+.0%})")
+                if change > tolerance:
+                    regressions.append(f"n={result['n']} {name} p95 {change:+.0%}")
+
+        if regressions:
+            raise CommandError("성능 회귀: " + ", ".join(regressions))
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import httpx
+from django.core.management.base import BaseCommand
+
+from chatbot.metrics import percentiles
+
+# 비교 대상: (이름, 서버 주소 옵션, 기본 경로)
+TARGETS = {
+    "wsgi": ("wsgi_url", "/chatbot/response/"),
+    "asgi": ("asgi_url", "/chatbot/response/async/"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "챗봇 요청을 동시에 보내서 WSGI 서버의 sync 뷰(/chatbot/response/)와 "
+        "ASGI 서버(uvicorn)의 async 뷰(/chatbot/response/async/) 처리량/지연시간을 비교.\n"
+        "같은 앱을 WSGI 서버와 ASGI 서버로 각각 띄워야 함 (uvicorn 하나에서 sync 뷰를 부르면 "
+        "sync_to_async 스레드로 도는 것이라 WSGI 비교가 아님).\n"
+        "예) UPSTAGE_BASE_URL=http://127.0.0.1:8765 gunicorn config.wsgi --threads 32 --bind 127.0.0.1:8000\n"
+        "      (gunicorn이 없으면 python manage.py runserver 8000 --noreload)\n"
+        "    UPSTAGE_BASE_URL=http://127.0.0.1:8765 uvicorn config.asgi:application --port 8001\n"
+        "    python manage.py loadtest_chatbot --wsgi-url http://127.0.0.1:8000 "
+        "--asgi-url http://127.0.0.1:8001 --concurrency 200"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wsgi-url", default="http://127.0.0.1:8000", help="WSGI 서버 주소 (gunicorn/runserver)")
+        parser.add_argument("--asgi-url", default="http://127.0.0.1:8001", help="ASGI 서버 주소 (uvicorn)")
+        parser.add_argument("--targets", nargs="+", choices=list(TARGETS), default=list(TARGETS))
+        parser.add_argument("--concurrency", type=int, default=100, help="동시에 진행 중인 요청 수")
+        parser.add_argument("--requests", type=int, default=500, help="대상별 총 요청 수")
+        parser.add_argument("--repeat-question", action="store_true",
+                            help="같은 질문만 보냄 (기본은 캐시를 피하려고 매번 다른 질문)")
+        parser.add_argument("--timeout", type=float, default=60.0)
+
+    def handle(self, *args, **opts):
+        asyncio.run(self._main(opts))
+
+    async def _main(self, opts):
+        limits = httpx.Limits(max_connections=opts["concurrency"], max_keepalive_connections=opts["concurrency"])
+        for name in opts["targets"]:
+            url_option, path = TARGETS[name]
+            base_url = opts[url_option]
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=opts["timeout"]) as client:
+                # CSRF 쿠키 받아오기 (서버마다)
+                await client.get("/chatbot/")
+                token = client.cookies.get("csrftoken", "")
+                headers = {"X-CSRFToken": token, "Referer": base_url + "/chatbot/"}
+                await self._run_path(client, f"{name} {path}", path, headers, opts)
+
+    async def _run_path(self, client, label, path, headers, opts):
+        sem = asyncio.Semaphore(opts["concurrency"])
+        latencies = []
+        errors = 0
+
+        async def one(i):
+            nonlocal errors
+            message = "요즘 볼만한 액션 영화 추천해줘" if opts["repeat_question"] else f"영화 추천해줘 #{i}"
+            async with sem:
+                start = time.perf_counter()
+                try:
+                    r = await client.post(path, data={"message": message}, headers=headers)
+                    r.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(opts["requests"])))
+        elapsed = time.perf_counter() - started
+
+        p = percentiles(latencies)
+        self.stdout.write(
+            f"{label:<33} ok={len(latencies):<5} err={errors:<4} "
+            f"{len(latencies) / elapsed:8.1f} req/s  "
+            f"p50={p['p50'] * 1000:7.1f}ms p95={p['p95'] * 1000:7.1f}ms p99={p['p99'] * 1000:7.1f}ms"
+        )
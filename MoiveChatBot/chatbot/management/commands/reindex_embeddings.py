@@ -0,0 +1,133 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from movies.models import Movie
+from chatbot.jobs import count_embedding_results
+from chatbot.models import MovieEmbedding
+from chatbot.upstage_utils import (
+    EMBED_PASSAGE_MODEL,
+    embedding_fields,
+    movie_text_hash,
+    movie_to_text,
+    upstage_embed_batch,
+)
+from chatbot.vector_index import movie_index
+
+
+class Command(BaseCommand):
+    help = (
+        "모든 영화 임베딩을 배치 + 병렬 요청으로 (재)생성. "
+        "텍스트 해시와 모델이 같은 영화는 건너뛰고, 체크포인트로 중간부터 이어서 실행 가능"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=32, help="요청 하나에 넣을 영화 수")
+        parser.add_argument("--workers", type=int, default=4, help="동시에 보낼 요청 수")
+        parser.add_argument("--checkpoint", default=str(Path(settings.BASE_DIR) / ".reindex_embeddings.json"))
+        parser.add_argument("--resume", action="store_true", help="체크포인트 이후 영화부터 이어서")
+        parser.add_argument("--force", action="store_true", help="해시가 같아도 전부 다시 임베딩")
+
+    def handle(self, *args, **opts):
+        checkpoint = Path(opts["checkpoint"])
+        batch_size = opts["batch_size"]
+        wave_size = batch_size * opts["workers"]
+
+        start_pk = 0
+        if opts["resume"] and checkpoint.exists():
+            start_pk = json.loads(checkpoint.read_text())["last_pk"]
+            self.stdout.write(f"체크포인트에서 이어서 시작: pk > {start_pk}")
+
+        # movie_id -> (content_hash, model)
+        existing = {
+            movie_id: (content_hash, model)
+            for movie_id, content_hash, model in MovieEmbedding.objects.values_list("movie_id", "content_hash", "model")
+        }
+        movies = Movie.objects.filter(pk__gt=start_pk).order_by("pk")
+
+        done = skipped = 0
+        started = time.perf_counter()
+        pending = []
+        skipped_ids = []  # /metrics 건너뜀 횟수에 더할 영화 (wave 단위로 모아서 기록)
+
+        with ThreadPoolExecutor(max_workers=opts["workers"]) as pool:
+            for movie in movies.iterator(chunk_size=wave_size):
+                content_hash = movie_text_hash(movie)
+                if not opts["force"] and existing.get(movie.pk) == (content_hash, EMBED_PASSAGE_MODEL):
+                    skipped += 1
+                    skipped_ids.append(movie.pk)
+                    if len(skipped_ids) >= wave_size:
+                        count_embedding_results(skipped_ids, "skipped")
+                        skipped_ids = []
+                    continue
+                pending.append((movie, content_hash))
+
+                if len(pending) >= wave_size:
+                    done += self._run_wave(pool, pending, batch_size, existing, checkpoint)
+                    pending = []
+
+            if pending:
+                done += self._run_wave(pool, pending, batch_size, existing, checkpoint)
+        if skipped_ids:
+            count_embedding_results(skipped_ids, "skipped")
+
+        # 끝까지 돌았으면 체크포인트는 필요 없음
+        if checkpoint.exists():
+            checkpoint.unlink()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"임베딩 {done}개 저장, {skipped}개 변경 없음(건너뜀), {elapsed:.1f}s"
+        ))
+        # 이 명령은 웹 프로세스와 메모리를 공유하지 않으므로 여기서 인덱스를 비워도 소용없음
+        if movie_index.refresh_interval:
+            self.stdout.write(f"웹 프로세스의 벡터 인덱스는 refresh_interval({movie_index.refresh_interval}초) 안에 반영됨")
+        else:
+            self.stdout.write(self.style.WARNING(
+                "CHATBOT_VECTOR_INDEX에 refresh_interval이 없어서 웹 프로세스를 재시작해야 새 임베딩이 반영됨"
+            ))
+
+    def _run_wave(self, pool, pending, batch_size, existing, checkpoint) -> int:
+        """pending을 batch_size씩 나눠 병렬로 임베딩하고, 결과를 한꺼번에 저장한 뒤 체크포인트 기록"""
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        results = pool.map(
+            lambda batch: upstage_embed_batch([movie_to_text(movie) for movie, _ in batch], model=EMBED_PASSAGE_MODEL),
+            batches,
+        )
+
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        for batch, vectors in zip(batches, results):
+            for (movie, content_hash), vec in zip(batch, vectors):
+                emb = MovieEmbedding(movie=movie, updated_at=now, **embedding_fields(vec, content_hash))
+                if movie.pk in existing:
+                    to_update.append(emb)
+                else:
+                    to_create.append(emb)
+
+        if to_update:
+            # bulk_update는 pk로 찾으므로 기존 행의 id를 채워줌
+            ids = dict(MovieEmbedding.objects.filter(movie__in=[e.movie for e in to_update]).values_list("movie_id", "id"))
+            for emb in to_update:
+                emb.pk = ids[emb.movie_id]
+            MovieEmbedding.objects.bulk_update(
+                to_update, ["vector", "dtype", "scale", "content_hash", "model", "updated_at"], batch_size=500,
+            )
+        if to_create:
+            MovieEmbedding.objects.bulk_create(to_create, batch_size=500)
+
+        for movie, content_hash in pending:
+            existing[movie.pk] = (content_hash, EMBED_PASSAGE_MODEL)
+        count_embedding_results([movie.pk for movie, _ in pending], "embedded")
+
+        last_pk = pending[-1][0].pk
+        checkpoint.write_text(json.dumps({"last_pk": last_pk}))
+        self.stdout.write(f"  ... pk {last_pk}까지 완료 ({len(pending)}개)")
+        return len(pending)
+
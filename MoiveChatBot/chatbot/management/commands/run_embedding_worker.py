@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from chatbot.jobs import claim_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "EmbeddingJob 큐를 처리하는 워커 (영화 등록/수정 후 임베딩 생성)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="지금 실행 가능한 작업만 처리하고 종료")
+        parser.add_argument("--batch", type=int, default=10, help="한 번에 가져올 작업 수")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="작업이 없을 때 대기 시간(초)")
+
+    def handle(self, *args, **opts):
+        self.stdout.write("임베딩 워커 시작")
+        while True:
+            jobs = claim_jobs(limit=opts["batch"])
+            for job in jobs:
+                ok = run_job(job)
+                status = "완료" if ok else "실패(재시도 예약)"
+                self.stdout.write(f"  movie_id={job.movie_id} {status}")
+
+            if not jobs:
+                if opts["once"]:
+                    break
+                time.sleep(opts["poll_interval"])
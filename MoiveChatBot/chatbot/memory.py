@@ -0,0 +1,142 @@
+import re
+
+from django.conf import settings
+
+from movies.models import Movie
+from .context import estimate_tokens
+
+SESSION_KEY = "chatbot_conversation"
+
+# 직전에 보여준 영화들에 대해 묻는 표현 -> 검색 생략하고 같은 영화로 답변
+_SAME_MARKERS = (
+    "그 영화", "그영화", "이 영화", "그거", "그건", "그중", "그 중", "위에", "방금", "아까",
+    "첫 번째", "첫번째", "두 번째", "두번째", "세 번째", "세번째", "마지막 거",
+    "그 감독", "그 배우", "줄거리", "러닝타임", "몇 분", "누가 나와",
+)
+# 이어지는 질문이지만 다른 영화를 원하는 표현 -> 직전 질문을 붙여서 다시 검색
+_RELATED_MARKERS = ("비슷한", "다른 거", "다른 영화", "더 추천", "말고")
+
+SAME, RELATED, NEW = "same", "related", "new"
+
+
+def _conf(name: str, default):
+    return getattr(settings, "CHATBOT_MEMORY", {}).get(name, default)
+
+
+def _shorten(text: str, max_chars: int) -> str:
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + "…"
+
+
+def _first_sentence(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    m = re.search(r"[.!?](\s|$)", text)
+    if m:
+        text = text[:m.end()].strip()
+    return _shorten(text, max_chars)
+
+
+class ConversationMemory:
+    """
+    세션에 저장하는 대화 상태 (JSON 직렬화 가능한 값만)
+    - turns: 최근 MAX_TURNS개의 질문/답변 (질문은 QUESTION_CHARS, 답변은 ANSWER_CHARS 글자까지만)
+    - summary: 밀려난 턴을 한 줄씩 요약해 이어붙인 것 (SUMMARY_CHARS 글자 상한, 오래된 줄부터 버림)
+    - movies: 직전 답변의 근거 영화 [(id, title)]
+    - query: 직전 검색에 쓴 질문
+    요약은 LLM을 부르지 않고 질문 + 답변 첫 문장으로 만들어서 왕복 요청을 늘리지 않음
+    """
+
+    def __init__(self, turns=None, summary: str = "", movies=None, query: str = ""):
+        self.turns = turns or []
+        self.summary = summary
+        self.movies = movies or []
+        self.query = query
+
+    @classmethod
+    def from_session(cls, session) -> "ConversationMemory":
+        if not _conf("ENABLED", True):
+            return cls()
+        data = session.get(SESSION_KEY) or {}
+        return cls(
+            turns=data.get("turns"),
+            summary=data.get("summary", ""),
+            movies=data.get("movies"),
+            query=data.get("query", ""),
+        )
+
+    def save(self, session) -> None:
+        if not _conf("ENABLED", True):
+            return
+        session[SESSION_KEY] = {
+            "turns": self.turns,
+            "summary": self.summary,
+            "movies": self.movies,
+            "query": self.query,
+        }
+
+    # ----- 이어지는 질문 판단 -----
+    def classify(self, message: str) -> str:
+        """SAME: 직전 영화들에 대한 질문, RELATED: 이어지지만 새로 검색, NEW: 새 주제"""
+        if not self.movies:
+            return NEW
+        text = message.lower()
+        if any(marker in text for marker in _RELATED_MARKERS):
+            return RELATED
+        if any(marker in text for marker in _SAME_MARKERS):
+            return SAME
+        if any(title.lower() in text for _, title in self.movies if len(title) >= 2):
+            return SAME
+        return NEW
+
+    def retrieval_query(self, message: str, kind: str) -> str:
+        if kind == RELATED and self.query:
+            return f"{self.query} {message}"[-_conf("QUERY_CHARS", 200):]
+        return message
+
+    def movie_ids(self) -> list[int]:
+        return [movie_id for movie_id, _ in self.movies]
+
+    def top_movies(self) -> list[tuple[Movie, float]]:
+        """직전 검색 결과를 같은 순서로 (삭제된 영화는 빠짐)"""
+        movies = Movie.objects.in_bulk(self.movie_ids())
+        return [(movies[movie_id], 0.0) for movie_id in self.movie_ids() if movie_id in movies]
+
+    async def atop_movies(self) -> list[tuple[Movie, float]]:
+        movies = {m.pk: m async for m in Movie.objects.filter(pk__in=self.movie_ids())}
+        return [(movies[movie_id], 0.0) for movie_id in self.movie_ids() if movie_id in movies]
+
+    # ----- 기록 -----
+    def add_turn(self, message: str, answer: str, movies, kind: str) -> None:
+        """movies: 이번 답변의 근거 영화 [(id, title)], kind: classify 결과"""
+        # 세션(쿠키/DB)에 매번 저장되므로 아주 긴 질문도 그대로 쌓이지 않게 자름
+        self.turns.append({
+            "q": _shorten(message, _conf("QUESTION_CHARS", 200)),
+            "a": _shorten(answer, _conf("ANSWER_CHARS", 300)),
+        })
+        self.movies = [list(movie) for movie in movies]
+        if kind != SAME:
+            self.query = self.retrieval_query(message, kind)
+
+        max_turns = _conf("MAX_TURNS", 4)
+        while len(self.turns) > max_turns:
+            old = self.turns.pop(0)
+            self._summarize(old)
+
+    def _summarize(self, turn: dict) -> None:
+        lines = self.summary.splitlines() if self.summary else []
+        lines.append(f"- {turn['q']} → {_first_sentence(turn['a'], 80)}")
+        max_chars = _conf("SUMMARY_CHARS", 500)
+        while lines and len("\n".join(lines)) > max_chars:
+            lines.pop(0)
+        self.summary = "\n".join(lines)
+
+    def history_text(self) -> str:
+        """프롬프트용 이전 대화 (MAX_TOKENS 넘으면 오래된 턴부터 뺌)"""
+        budget = _conf("MAX_TOKENS", 500)
+        summary = f"(요약)\n{self.summary}\n" if self.summary else ""
+        turns = [f"사용자: {t['q']}\n챗봇: {t['a']}" for t in self.turns]
+        while turns and estimate_tokens(summary + "\n".join(turns)) > budget:
+            turns.pop(0)
+        text = summary + "\n".join(turns)
+        if estimate_tokens(text) > budget:
+            text = "\n".join(turns)
+        return text.strip()
@@ -0,0 +1,251 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+
+logger = logging.getLogger("chatbot.trace")
+
+# 기본 latency 구간 (초)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """누적 버킷 히스토그램 (Prometheus histogram과 같은 모양)"""
+
+    def __init__(self, name: str, labels: dict, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative = []
+            total = 0
+            for bound, n in zip(self.buckets + (float("inf"),), self._counts):
+                total += n
+                cumulative.append((bound, total))
+            return {"buckets": cumulative, "count": self.count, "sum": self.sum}
+
+
+class Gauge:
+    """마지막으로 설정한 값 하나 (코퍼스 크기 등)"""
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+_registry = {}
+_gauges = {}
+_collectors = []
+_registry_lock = threading.Lock()
+
+
+def histogram(name: str, buckets=DEFAULT_BUCKETS, **labels) -> Histogram:
+    """이름 + 라벨 조합별로 하나씩 만들어 재사용"""
+    key = (name, tuple(sorted(labels.items())))
+    h = _registry.get(key)
+    if h is None:
+        with _registry_lock:
+            h = _registry.setdefault(key, Histogram(name, labels, buckets))
+    return h
+
+
+def gauge(name: str, **labels) -> Gauge:
+    key = (name, tuple(sorted(labels.items())))
+    g = _gauges.get(key)
+    if g is None:
+        with _registry_lock:
+            g = _gauges.setdefault(key, Gauge(name, labels))
+    return g
+
+
+def register_collector(collect) -> None:
+    """
+    render_prometheus 때마다 호출할 함수 등록 (캐시 적중 수처럼 다른 모듈이 이미 세고 있는 값 내보내기용)
+    collect() -> [(이름, "counter" 또는 "gauge", 라벨 dict, 값), ...] (같은 이름은 붙여서 반환)
+    """
+    with _registry_lock:
+        if collect not in _collectors:
+            _collectors.append(collect)
+
+
+def all_histograms() -> list[Histogram]:
+    with _registry_lock:
+        return list(_registry.values())
+
+
+def _label_text(labels: dict, **extra) -> str:
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in items.items())
+    return "{" + body + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus() -> str:
+    """등록된 히스토그램/게이지와 collector 값을 Prometheus text exposition 형식으로"""
+    with _registry_lock:
+        histograms = sorted(_registry.values(), key=lambda h: h.name)
+        gauges = sorted(_gauges.values(), key=lambda g: g.name)
+        collectors = list(_collectors)
+
+    lines = []
+    typed = set()
+    for h in histograms:
+        if h.name not in typed:
+            lines.append(f"# TYPE {h.name} histogram")
+            typed.add(h.name)
+        snap = h.snapshot()
+        for bound, total in snap["buckets"]:
+            le = "+Inf" if bound == float("inf") else repr(float(bound))
+            lines.append(f"{h.name}_bucket{_label_text(h.labels, le=le)} {total}")
+        lines.append(f"{h.name}_sum{_label_text(h.labels)} {snap['sum']}")
+        lines.append(f"{h.name}_count{_label_text(h.labels)} {snap['count']}")
+    for g in gauges:
+        if g.name not in typed:
+            lines.append(f"# TYPE {g.name} gauge")
+            typed.add(g.name)
+        lines.append(f"{g.name}{_label_text(g.labels)} {g.value}")
+    for collect in collectors:
+        for name, kind, labels, value in collect():
+            if name not in typed:
+                lines.append(f"# TYPE {name} {kind}")
+                typed.add(name)
+            lines.append(f"{name}{_label_text(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# ----- 챗봇 요청 단계별 시간 측정 -----
+STAGE_BUCKETS = DEFAULT_BUCKETS
+PROMPT_CHAR_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000)
+
+
+class RequestTrace:
+    """
+    챗봇 요청 하나의 단계별(embed / retrieve / chat) 소요 시간과 부가 정보.
+    finish() 때 히스토그램에 기록하고, 설정에 따라 JSON 한 줄로 로그를 남김
+    """
+
+    def __init__(self, view: str, log: bool):
+        self.view = view
+        self.log = log
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.fields = {}
+
+    def stage(self, name: str):
+        return _StageTimer(self, name)
+
+    def note(self, **fields) -> None:
+        self.fields.update(fields)
+
+    def finish(self, **fields) -> None:
+        self.fields.update(fields)
+        total = time.perf_counter() - self.started
+        for name, seconds in self.stages.items():
+            histogram("chatbot_stage_seconds", view=self.view, stage=name).observe(seconds)
+        histogram("chatbot_request_seconds", view=self.view).observe(total)
+        if "prompt_chars" in self.fields:
+            histogram("chatbot_prompt_chars", buckets=PROMPT_CHAR_BUCKETS, view=self.view).observe(
+                self.fields["prompt_chars"]
+            )
+        if "corpus_size" in self.fields:
+            gauge("chatbot_retrieval_corpus_size").set(self.fields["corpus_size"])
+        if self.log:
+            logger.info(json.dumps({
+                "event": "chatbot_request",
+                "view": self.view,
+                "total_ms": round(total * 1000, 2),
+                **{f"{name}_ms": round(seconds * 1000, 2) for name, seconds in self.stages.items()},
+                **self.fields,
+            }, ensure_ascii=False))
+
+
+class _StageTimer:
+    __slots__ = ("trace", "name", "started")
+
+    def __init__(self, trace: RequestTrace, name: str):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        stages = self.trace.stages
+        stages[self.name] = stages.get(self.name, 0.0) + time.perf_counter() - self.started
+        return False
+
+
+class _NullTrace:
+    """측정을 끈 경우: 아무것도 안 하는 같은 인터페이스 (요청마다 객체도 안 만듦)"""
+    _stage = nullcontext()
+
+    def stage(self, name: str):
+        return self._stage
+
+    def note(self, **fields) -> None:
+        pass
+
+    def finish(self, **fields) -> None:
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class _NullHistogram:
+    """측정을 끈 경우의 히스토그램 (observe가 아무것도 안 함)"""
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+NULL_HISTOGRAM = _NullHistogram()
+
+
+def metrics_enabled() -> bool:
+    return getattr(settings, "CHATBOT_METRICS", {}).get("ENABLED", True)
+
+
+def start_trace(view: str):
+    if not metrics_enabled():
+        return NULL_TRACE
+    return RequestTrace(view, log=getattr(settings, "CHATBOT_METRICS", {}).get("LOG", True))
+
+
+def percentiles(values, points=(50, 95, 99)) -> dict:
+    """벤치마크 결과용 p50/p95/p99 (nearest-rank)"""
+    ordered = sorted(values)
+    if not ordered:
+        return {f"p{p}": 0.0 for p in points}
+    result = {}
+    for p in points:
+        rank = max(1, -(-p * len(ordered) // 100))  # ceil
+        result[f"p{p}"] = ordered[rank - 1]
+    return result
@@ -0,0 +1,73 @@
+from django.db import migrations, models
+import numpy as np
+
+
+def json_to_binary(apps, schema_editor):
+    MovieEmbedding = apps.get_model("chatbot", "MovieEmbedding")
+    batch = []
+    for emb in MovieEmbedding.objects.only("id", "vector").iterator(chunk_size=500):
+        emb.vector_blob = np.asarray(emb.vector, dtype=np.float32).tobytes()
+        emb.dtype = "f32"
+        emb.scale = 1.0
+        batch.append(emb)
+        if len(batch) >= 500:
+            MovieEmbedding.objects.bulk_update(batch, ["vector_blob", "dtype", "scale"])
+            batch = []
+    if batch:
+        MovieEmbedding.objects.bulk_update(batch, ["vector_blob", "dtype", "scale"])
+
+
+def binary_to_json(apps, schema_editor):
+    MovieEmbedding = apps.get_model("chatbot", "MovieEmbedding")
+    dtypes = {"f32": np.float32, "f16": np.float16, "i8": np.int8}
+    batch = []
+    for emb in MovieEmbedding.objects.iterator(chunk_size=500):
+        arr = np.frombuffer(emb.vector_blob, dtype=dtypes[emb.dtype]).astype(np.float32) * emb.scale
+        emb.vector = arr.tolist()
+        batch.append(emb)
+        if len(batch) >= 500:
+            MovieEmbedding.objects.bulk_update(batch, ["vector"])
+            batch = []
+    if batch:
+        MovieEmbedding.objects.bulk_update(batch, ["vector"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movieembedding',
+            name='vector_blob',
+            field=models.BinaryField(default=b''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='movieembedding',
+            name='dtype',
+            field=models.CharField(choices=[('f32', 'float32'), ('f16', 'float16'), ('i8', 'int8 (scale 양자화)')], default='f32', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='movieembedding',
+            name='scale',
+            field=models.FloatField(default=1.0),
+        ),
+        migrations.AlterField(
+            model_name='movieembedding',
+            name='vector',
+            field=models.JSONField(null=True),
+        ),
+        migrations.RunPython(json_to_binary, binary_to_json),
+        migrations.RemoveField(
+            model_name='movieembedding',
+            name='vector',
+        ),
+        migrations.RenameField(
+            model_name='movieembedding',
+            old_name='vector_blob',
+            new_name='vector',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0002_movieembedding_binary_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movieembedding',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
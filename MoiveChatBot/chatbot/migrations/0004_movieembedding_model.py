@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0003_movieembedding_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movieembedding',
+            name='model',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
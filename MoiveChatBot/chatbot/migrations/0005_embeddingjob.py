@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0003_delete_movieembedding'),
+        ('chatbot', '0004_movieembedding_model'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmbeddingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', '대기'), ('running', '실행 중'), ('done', '완료'), ('failed', '실패')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('run_after', models.DateTimeField()),
+                ('last_error', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='embedding_job', to='movies.movie')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'run_after'], name='chatbot_emb_status_45ba02_idx')],
+            },
+        ),
+    ]
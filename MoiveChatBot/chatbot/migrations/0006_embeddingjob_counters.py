@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0005_embeddingjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='embeddingjob',
+            name='embedded',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='embeddingjob',
+            name='skipped',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,19 +1,105 @@
+import numpy as np
 from django.db import models
 from movies.models import Movie
 
 
+# 저장 포맷별 numpy dtype
+VECTOR_DTYPES = {
+    "f32": np.float32,
+    "f16": np.float16,
+    "i8": np.int8,
+}
+
+
+def encode_vector(vec, dtype: str = "f32") -> tuple[bytes, float]:
+    """
+    list[float] -> (packed bytes, scale)
+    i8은 최대 절댓값이 127이 되도록 scale을 두고 양자화
+    """
+    arr = np.asarray(vec, dtype=np.float32)
+    if dtype == "i8":
+        peak = float(np.abs(arr).max()) if arr.size else 0.0
+        scale = peak / 127.0 if peak else 1.0
+        packed = np.round(arr / scale).astype(np.int8)
+        return packed.tobytes(), scale
+    return arr.astype(VECTOR_DTYPES[dtype]).tobytes(), 1.0
+
+
+def decode_vector(blob, dtype: str = "f32", scale: float = 1.0) -> np.ndarray:
+    """packed bytes -> np.ndarray (f32는 복사 없이 버퍼를 그대로 사용)"""
+    arr = np.frombuffer(blob, dtype=VECTOR_DTYPES[dtype])
+    if dtype == "f32":
+        return arr
+    arr = arr.astype(np.float32)
+    if scale != 1.0:
+        arr *= scale
+    return arr
+
+
 class MovieEmbedding(models.Model):
     """
     영화 하나당 하나의 임베딩 벡터를 저장
     (RAG 검색용)
     """
+    DTYPE_CHOICES = [
+        ("f32", "float32"),
+        ("f16", "float16"),
+        ("i8", "int8 (scale 양자화)"),
+    ]
+
     movie = models.OneToOneField(
         Movie,
         on_delete=models.CASCADE,
         related_name="embedding"
     )
-    vector = models.JSONField()  # list[float]
+    vector = models.BinaryField()  # packed float32 / float16 / int8
+    dtype = models.CharField(max_length=3, choices=DTYPE_CHOICES, default="f32")
+    scale = models.FloatField(default=1.0)  # i8일 때만 사용
+    content_hash = models.CharField(max_length=64, blank=True)  # movie_to_text(movie)의 sha256
+    model = models.CharField(max_length=100, blank=True)  # 임베딩에 쓴 모델 이름
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Embedding(movie_id={self.movie.id}, title={self.movie.title})"
+
+    def set_vector(self, vec, dtype: str = "f32") -> None:
+        self.vector, self.scale = encode_vector(vec, dtype)
+        self.dtype = dtype
+
+    def get_vector(self) -> np.ndarray:
+        return decode_vector(self.vector, self.dtype, self.scale)
+
+
+class EmbeddingJob(models.Model):
+    """
+    영화별 임베딩 작업 상태 (DB 기반 작업 큐, run_embedding_worker가 처리)
+    영화당 한 행만 두어서 짧은 시간에 여러 번 수정해도 작업은 한 번만 실행됨(debounce)
+    """
+    STATUS_CHOICES = [
+        ("pending", "대기"),
+        ("running", "실행 중"),
+        ("done", "완료"),
+        ("failed", "실패"),
+    ]
+
+    movie = models.OneToOneField(
+        Movie,
+        on_delete=models.CASCADE,
+        related_name="embedding_job"
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+    # /metrics용 누적 횟수 (워커는 다른 프로세스라 메모리가 아니라 DB에 남김)
+    embedded = models.PositiveIntegerField(default=0)   # 새로 임베딩한 횟수
+    skipped = models.PositiveIntegerField(default=0)    # 텍스트/모델이 그대로라 API 호출 없이 끝낸 횟수
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+        ]
+
+    def __str__(self):
+        return f"EmbeddingJob(movie_id={self.movie_id}, status={self.status})"
@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from movies.models import Movie
+from .cache import semantic_answer_cache
+from .context import cache_movie_snippet
+from .lexical_index import lexical_index
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+def invalidate_movie_caches(sender, instance, **kwargs):
+    # 영화 정보가 바뀌면 그 영화를 근거로 만든 캐시 답변은 더 이상 믿을 수 없음
+    semantic_answer_cache.invalidate_movie(instance.pk)
+
+
+@receiver(post_save, sender=Movie)
+def update_lexical_index(sender, instance, **kwargs):
+    lexical_index.upsert(instance)
+
+
+@receiver(post_save, sender=Movie)
+def precompute_movie_snippet(sender, instance, **kwargs):
+    # 프롬프트용 요약은 요청마다 만들지 않고 저장할 때 한 번
+    cache_movie_snippet(instance)
+
+
+@receiver(post_delete, sender=Movie)
+def remove_from_lexical_index(sender, instance, **kwargs):
+    lexical_index.remove(instance.pk)
@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .cache import normalize_query
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    같은 키의 계산이 진행 중이면 새로 시작하지 않고 그 결과를 같이 받음 (single-flight).
+    - 프로세스 내: 스레드(WSGI)는 Event로, async(ASGI)는 이벤트 루프별 Task로 합침
+    - 프로세스 간(선택): Django cache의 add()를 락으로 써서 한 프로세스만 계산하고,
+      나머지는 결과 키가 생길 때까지 poll_interval마다 확인 (락이 사라지거나 wait_timeout이 지나면 직접 계산)
+    예외도 결과처럼 기다리던 요청 모두에게 전달됨.
+    namespace는 같은 질문이라도 합치는 단위(답변 전체 / 검색만)가 다르면 키가 섞이지 않게 구분
+    """
+
+    def __init__(self, namespace="answer", enabled=True, django_cache=None, lock_ttl=60, result_ttl=5,
+                 wait_timeout=30, poll_interval=0.05):
+        self.namespace = namespace
+        self.enabled = enabled
+        self.django_cache = django_cache
+        self.lock_ttl = lock_ttl
+        self.result_ttl = result_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> _Call
+        self._async_calls = weakref.WeakKeyDictionary()  # loop -> {key: Task}
+        self.leaders = 0
+        self.coalesced = 0
+        self.shared_hits = 0
+
+    def make_key(self, text: str) -> str:
+        digest = hashlib.sha1(normalize_query(text).encode("utf-8")).hexdigest()
+        return f"chatbot:flight:{self.namespace}:{digest}"
+
+    def _shared(self):
+        return caches[self.django_cache] if self.django_cache else None
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    # ----- sync -----
+    def do(self, text: str, fn):
+        """fn()을 실행하거나, 같은 질문으로 이미 실행 중인 fn의 결과를 기다려서 반환"""
+        if not self.enabled:
+            return fn()
+
+        key = self.make_key(text)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._shared_do(key, fn)
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def _shared_do(self, key: str, fn):
+        shared = self._shared()
+        if shared is None:
+            return fn()
+
+        lock_key, result_key = f"{key}:lock", f"{key}:result"
+        if shared.add(lock_key, 1, timeout=self.lock_ttl):
+            try:
+                result = fn()
+                shared.set(result_key, result, timeout=self.result_ttl)
+                return result
+            finally:
+                shared.delete(lock_key)
+
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            result = shared.get(result_key)
+            if result is not None:
+                self._count("shared_hits")
+                return result
+            if shared.get(lock_key) is None:
+                break
+        # 결과를 set한 직후 락을 지웠을 수도 있으니 한 번 더 확인
+        result = shared.get(result_key)
+        if result is not None:
+            self._count("shared_hits")
+            return result
+        return fn()
+
+    # ----- async -----
+    async def ado(self, text: str, coro_fn):
+        """do의 async 버전. 계산은 별도 Task로 돌려서 먼저 온 요청이 끊겨도 나머지는 결과를 받음"""
+        if not self.enabled:
+            return await coro_fn()
+
+        key = self.make_key(text)
+        loop = asyncio.get_running_loop()
+        calls = self._async_calls.setdefault(loop, {})
+        task = calls.get(key)
+        if task is None:
+            task = loop.create_task(self._ashared_do(key, coro_fn))
+            calls[key] = task
+            task.add_done_callback(lambda _: calls.pop(key, None))
+            self._count("leaders")
+        else:
+            self._count("coalesced")
+        return await asyncio.shield(task)
+
+    async def _ashared_do(self, key: str, coro_fn):
+        shared = self._shared()
+        if shared is None:
+            return await coro_fn()
+
+        lock_key, result_key = f"{key}:lock", f"{key}:result"
+        if await shared.aadd(lock_key, 1, timeout=self.lock_ttl):
+            try:
+                result = await coro_fn()
+                await shared.aset(result_key, result, timeout=self.result_ttl)
+                return result
+            finally:
+                await shared.adelete(lock_key)
+
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            result = await shared.aget(result_key)
+            if result is not None:
+                self._count("shared_hits")
+                return result
+            if await shared.aget(lock_key) is None:
+                break
+        result = await shared.aget(result_key)
+        if result is not None:
+            self._count("shared_hits")
+            return result
+        return await coro_fn()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "shared_hits": self.shared_hits,
+            }
+
+
+def _single_flight_from_settings(namespace: str) -> SingleFlight:
+    """
+    settings.CHATBOT_SINGLE_FLIGHT 예시:
+        {"ENABLED": True, "DJANGO_CACHE": "default", "LOCK_TTL": 60, "RESULT_TTL": 5}
+    """
+    conf = getattr(settings, "CHATBOT_SINGLE_FLIGHT", {})
+    return SingleFlight(
+        namespace,
+        enabled=conf.get("ENABLED", True),
+        django_cache=conf.get("DJANGO_CACHE"),
+        lock_ttl=conf.get("LOCK_TTL", 60),
+        result_ttl=conf.get("RESULT_TTL", 5),
+        wait_timeout=conf.get("WAIT_TIMEOUT", 30),
+        poll_interval=conf.get("POLL_INTERVAL", 0.05),
+    )
+
+
+# chatbot_response(_async): 답변 전체를 합침
+answer_flight = _single_flight_from_settings("answer")
+# chatbot_stream: 답변은 요청마다 스트리밍하므로 임베딩 + 검색만 합침
+retrieval_flight = _single_flight_from_settings("retrieve")
@@ -1,3 +1,281 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
 
-# Create your tests here.
+import requests
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+
+from movies.catalogue import mark_catalogue_ready
+from movies.models import Movie
+from .cache import query_embedding_cache, semantic_answer_cache
+from .lexical_index import lexical_index
+from .memory import SESSION_KEY
+from .singleflight import SingleFlight, answer_flight
+from .upstage_stub import UpstageStubServer, fake_answer
+from .upstage_utils import build_or_update_movie_embedding, embed_query
+from .vector_index import movie_index
+
+MOVIES = [
+    {"title": "기생충", "release_year": 2019, "genre": "드라마", "director": "봉준호", "actors": "송강호, 이선균",
+     "runtime": 132, "review": "반지하 가족이 부잣집에 스며드는 이야기"},
+    {"title": "아이언맨", "release_year": 2008, "genre": "액션", "director": "존 파브로", "actors": "로버트 다우니 주니어",
+     "runtime": 126, "review": "슈트를 만든 억만장자"},
+    {"title": "라라랜드", "release_year": 2016, "genre": "로맨스", "director": "데이미언 셔젤", "actors": "라이언 고슬링, 엠마 스톤",
+     "runtime": 128, "review": "꿈을 좇는 두 사람"},
+    {"title": "컨저링", "release_year": 2013, "genre": "공포", "director": "제임스 완", "actors": "베라 파미가",
+     "runtime": 112, "review": "외딴 집의 악령"},
+]
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    """SSE 응답 -> [(event, data)] (event 줄이 없으면 "message")"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = "message", None
+        for line in block.splitlines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        events.append((event, data))
+    return events
+
+
+class ChatbotStubTestCase(TestCase):
+    """
+    로컬 Upstage 스텁 서버(UpstageStubServer)를 upstream으로 두고 챗봇 뷰를 끝까지 돌리는 테스트 기반.
+    영화 임베딩은 스텁의 /embeddings로 만들어 DB에 넣고, 메모리 인덱스/캐시는 테스트마다 비움
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.stub = UpstageStubServer().start()
+        cls.addClassCleanup(cls.stub.stop)
+        upstream = override_settings(
+            UPSTAGE_API_KEY="test-key",
+            # 재시도 대기를 짧게 (Retry-After가 없으면 0 ~ BACKOFF_BASE * 2^attempt 초)
+            UPSTREAM_HTTP={"upstage": {"BASE_URL": cls.stub.base_url, "MAX_RETRIES": 3, "BACKOFF_BASE": 0.01}},
+        )
+        upstream.enable()
+        cls.addClassCleanup(upstream.disable)
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.movies = {}
+        for fields in MOVIES:
+            movie = Movie.objects.create(**fields)
+            build_or_update_movie_embedding(movie)
+            cls.movies[movie.title] = movie
+        # 첫 요청 때 카탈로그 채우기 스레드가 (테스트 트랜잭션 밖의 연결로) 뜨지 않게
+        mark_catalogue_ready()
+
+    def setUp(self):
+        # 모듈 전역 인덱스/캐시는 테스트 트랜잭션과 상관없이 남으므로 이 테스트의 DB에서 다시 읽게 함
+        movie_index.invalidate()
+        lexical_index.invalidate()
+        semantic_answer_cache.clear()
+        query_embedding_cache.clear()
+        cache.clear()
+        self.stub.requests.clear()
+
+    def requests_to(self, path: str) -> list[dict]:
+        return [payload for p, payload in self.stub.requests if p.endswith(path)]
+
+    def ask(self, message: str, client=None) -> str:
+        response = (client or self.client).post(reverse("chatbot_response"), {"message": message})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["answer"]
+
+    async def aask_stream(self, message: str, client=None) -> tuple[list[str], str]:
+        """chatbot_stream -> (delta 조각들, done 이벤트의 answer)"""
+        response = await (client or AsyncClient()).post(reverse("chatbot_stream"), {"message": message})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode("utf-8")
+        events = _events(body)
+        self.assertEqual(events[-1][0], "done", body)
+        deltas = [data["delta"] for event, data in events if event == "message"]
+        return deltas, events[-1][1]["answer"]
+
+
+class RetrievalTests(ChatbotStubTestCase):
+    def test_answer_is_grounded_on_retrieved_movies(self):
+        answer = self.ask("봉준호 감독 기생충 같은 영화 알려줘")
+
+        # 질문 임베딩 한 번 + 채팅 한 번
+        self.assertEqual(len(self.requests_to("/embeddings")), 1)
+        (chat,) = self.requests_to("/chat/completions")
+        user = chat["messages"][-1]["content"]
+        self.assertEqual(answer, fake_answer(user))
+
+        # 제목/감독이 그대로 맞는 영화가 [검색 결과] 맨 앞 (벡터 + BM25 RRF)
+        context = user.split("[검색 결과]")[1].split("[사용자 질문]")[0]
+        positions = {title: context.find(title) for title in self.movies if title in context}
+        self.assertEqual(min(positions, key=positions.get), "기생충")
+        self.assertIn("봉준호 감독 기생충 같은 영화 알려줘", user.split("[사용자 질문]")[1])
+
+    def test_query_filters_limit_candidates(self):
+        self.ask("2010년 이후 공포 영화 추천해줘")
+        (chat,) = self.requests_to("/chat/completions")
+        context = chat["messages"][-1]["content"].split("[검색 결과]")[1].split("[사용자 질문]")[0]
+        self.assertIn("컨저링", context)
+        for title in ("기생충", "아이언맨", "라라랜드"):
+            self.assertNotIn(title, context)
+
+
+class StreamingTests(ChatbotStubTestCase):
+    def test_stream_and_json_give_the_same_answer(self):
+        message = "로맨스 영화 하나 추천해줘"
+        json_answer = self.ask(message)
+
+        # 답변 캐시를 비워서 스트림도 upstream에 실제로 stream=true로 물어보게 함
+        semantic_answer_cache.clear()
+        deltas, stream_answer = async_to_sync(self.aask_stream)(message)
+
+        self.assertEqual(stream_answer, json_answer)
+        self.assertEqual("".join(deltas), json_answer)
+        self.assertGreater(len(deltas), 1)
+        chats = self.requests_to("/chat/completions")
+        self.assertEqual([chat["stream"] for chat in chats], [False, True])
+        # 같은 질문/검색 결과라 프롬프트도 같음
+        self.assertEqual(chats[0]["messages"], chats[1]["messages"])
+
+    def test_stream_reuses_cached_answer(self):
+        message = "액션 영화 추천해줘"
+        json_answer = self.ask(message)
+        deltas, stream_answer = async_to_sync(self.aask_stream)(message)
+        self.assertEqual((deltas, stream_answer), ([json_answer], json_answer))
+        self.assertEqual(len(self.requests_to("/chat/completions")), 1)
+
+    def test_chat_page_streams_only_under_asgi(self):
+        self.assertNotContains(self.client.get(reverse("chatbot")), "data-stream-url")
+        async def aget():
+            return await AsyncClient().get(reverse("chatbot"))
+
+        response = async_to_sync(aget)()
+        self.assertContains(response, f'data-stream-url="{reverse("chatbot_stream")}"')
+
+
+class RetryTests(ChatbotStubTestCase):
+    def test_json_view_retries_429_and_503(self):
+        for status in (429, 503):
+            with self.subTest(status=status):
+                self.stub.requests.clear()
+                self.stub.fail_next(status, 2)
+                answer = self.ask(f"{status} 뒤에도 답해줘")
+
+                # 실패한 두 번과 성공한 한 번이 같은 요청(같은 경로/본문)
+                path, payload = self.stub.requests[0]
+                self.assertEqual(self.stub.requests[:3], [(path, payload)] * 3)
+                chat = self.requests_to("/chat/completions")[-1]
+                self.assertEqual(answer, fake_answer(chat["messages"][-1]["content"]))
+
+    def test_post_is_not_retried_on_500(self):
+        # POST(임베딩/채팅)는 서버가 이미 처리했을 수도 있는 500은 재시도하지 않음 (중복 과금 방지)
+        self.stub.fail_next(500)
+        with self.assertRaises(requests.HTTPError):
+            self.ask("500이면 바로 실패")
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_stream_retries_before_first_token(self):
+        message = "스트림 재시도"
+        embed_query(message)  # 질문 임베딩은 캐시해두고 채팅 스트림 요청만 실패시킴
+        self.stub.requests.clear()
+        self.stub.fail_next(503, 3)
+        deltas, answer = async_to_sync(self.aask_stream)(message)
+        self.assertEqual("".join(deltas), answer)
+        chats = self.requests_to("/chat/completions")
+        self.assertEqual(len(chats), 4)  # 실패 3 + 성공 1
+        self.assertEqual(len(self.stub.requests), 4)
+
+
+class MemoryTests(ChatbotStubTestCase):
+    def test_follow_up_about_same_movies_skips_retrieval(self):
+        self.ask("봉준호 감독 영화 추천해줘")
+        self.assertEqual(len(self.requests_to("/embeddings")), 1)
+
+        self.ask("그 영화 러닝타임은?")
+        # 직전 영화들에 대한 질문이라 임베딩/검색 없이 채팅만, 프롬프트에 이전 대화가 들어감
+        self.assertEqual(len(self.requests_to("/embeddings")), 1)
+        follow_up = self.requests_to("/chat/completions")[-1]["messages"][-1]["content"]
+        self.assertIn("[이전 대화]", follow_up)
+        self.assertIn("사용자: 봉준호 감독 영화 추천해줘", follow_up)
+        self.assertIn("기생충", follow_up)
+
+        turns = self.client.session[SESSION_KEY]["turns"]
+        self.assertEqual([turn["q"] for turn in turns], ["봉준호 감독 영화 추천해줘", "그 영화 러닝타임은?"])
+
+    def test_sessions_do_not_share_memory(self):
+        self.ask("봉준호 감독 영화 추천해줘")
+        other = self.client_class()
+        self.ask("그 영화 러닝타임은?", client=other)
+        # 다른 세션에선 이어지는 질문이 아니라 새 질문이라 다시 검색
+        self.assertEqual(len(self.requests_to("/embeddings")), 2)
+        self.assertNotIn("[이전 대화]", self.requests_to("/chat/completions")[-1]["messages"][-1]["content"])
+
+    def test_stored_question_is_truncated(self):
+        self.ask("영화 " * 500)
+        (turn,) = self.client.session[SESSION_KEY]["turns"]
+        self.assertLessEqual(len(turn["q"]), 201)
+
+
+class SingleFlightTests(ChatbotStubTestCase):
+    async def test_concurrent_same_question_calls_upstream_once(self):
+        before = answer_flight.stats()
+        message = "동시에 들어온 같은 질문"
+
+        async def ask():
+            response = await AsyncClient().post(reverse("chatbot_response_async"), {"message": message})
+            return response.json()["answer"]
+
+        answers = await asyncio.gather(*(ask() for _ in range(5)))
+
+        self.assertEqual(len(set(answers)), 1)
+        self.assertEqual(len(self.requests_to("/chat/completions")), 1)
+        self.assertEqual(len(self.requests_to("/embeddings")), 1)
+        after = answer_flight.stats()
+        self.assertEqual(after["leaders"] - before["leaders"], 1)
+        self.assertEqual(after["coalesced"] - before["coalesced"], 4)
+
+    def test_threads_share_one_call_and_its_error(self):
+        flight = SingleFlight("test")
+        gate = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            gate.wait(5)
+            if len(calls) == 1:
+                raise ValueError("upstream down")
+            return "ok"
+
+        results = []
+
+        def worker():
+            try:
+                results.append(flight.do("같은 질문", compute))
+            except ValueError as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        # 모든 스레드가 첫 계산에 붙을 때까지 기다렸다가 끝냄
+        for _ in range(500):
+            if flight.stats()["coalesced"] == 3:
+                break
+            time.sleep(0.01)
+        gate.set()
+        for t in threads:
+            t.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        # 끝난 뒤 같은 질문은 새로 계산
+        self.assertEqual(flight.do("같은 질문", compute), "ok")
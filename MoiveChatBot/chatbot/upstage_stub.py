@@ -0,0 +1,122 @@
+"""
+테스트/벤치마크용 로컬 Upstage 스텁 서버.
+
+    with UpstageStubServer() as stub:
+        with override_settings(UPSTREAM_HTTP={"upstage": {"BASE_URL": stub.base_url}}):
+            ...
+
+- /embeddings: 텍스트 해시로 만든 결정적(deterministic) 벡터 반환 (input이 리스트면 배치)
+- /chat/completions: 마지막 user 메시지 길이를 담은 고정 답변 반환 (stream=true면 SSE로 단어씩)
+- fail_next(status, n): 다음 n개 요청을 해당 상태 코드로 실패시킴 (재시도 테스트용)
+"""
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def fake_embedding(text: str, dim: int = 64) -> list[float]:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    return np.random.default_rng(seed).normal(size=dim).astype(np.float32).tolist()
+
+
+def fake_answer(user: str) -> str:
+    return f"(stub) 질문을 받았어요. 컨텍스트 {len(user)}자"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _send_stream(self, answer: str) -> None:
+        """stream=true 응답: 단어마다 "data: {...}" 한 줄씩, 끝나면 연결 종료"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for i, word in enumerate(answer.split(" ")):
+            # 이어 붙이면 stream=false 답변과 똑같아지도록 단어 사이에만 공백
+            chunk = {"choices": [{"delta": {"content": word if i == 0 else " " + word}}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        stub.requests.append((self.path, payload))
+
+        status = stub._take_failure()
+        if status:
+            self._send_json(status, {"error": "stub failure"})
+            return
+
+        if self.path.endswith("/embeddings"):
+            inputs = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+            data = [
+                {"index": i, "embedding": fake_embedding(text, stub.dim)}
+                for i, text in enumerate(inputs)
+            ]
+            self._send_json(200, {"data": data, "model": payload.get("model")})
+        elif self.path.endswith("/chat/completions"):
+            user = payload["messages"][-1]["content"]
+            if payload.get("stream"):
+                self._send_stream(fake_answer(user))
+                return
+            self._send_json(200, {"choices": [{"message": {"role": "assistant", "content": fake_answer(user)}}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+
+class UpstageStubServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, dim: int = 64):
+        self.dim = dim
+        self.requests = []
+        self._failures = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fail_next(self, status: int, n: int = 1) -> None:
+        with self._lock:
+            self._failures.extend([status] * n)
+
+    def _take_failure(self):
+        with self._lock:
+            return self._failures.pop(0) if self._failures else None
+
+    def start(self) -> "UpstageStubServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -1,11 +1,17 @@
 import os
 import math
-import requests
+import hashlib
+import json
 from django.conf import settings
 from movies.models import Movie
-from .models import MovieEmbedding
+from .cache import query_embedding_cache
+from .http_client import async_upstage_client, upstage_client
+from .filters import RetrievalFilters, parse_query_filters
+from .lexical_index import lexical_index
+from .models import MovieEmbedding, encode_vector
+from .vector_index import movie_index
 
-UPSTAGE_BASE_URL = "https://api.upstage.ai/v1"  # :contentReference[oaicite:1]{index=1}
+# Upstage API 주소/타임아웃/연결 풀은 settings.UPSTREAM_HTTP["upstage"] 참고
 
 # 임베딩 모델(문서/질문 분리 권장) :contentReference[oaicite:2]{index=2}
 EMBED_QUERY_MODEL = "solar-embedding-1-large-query"
@@ -36,20 +42,57 @@ def movie_to_text(movie: Movie) -> str:
     )
 
 
+def movie_text_hash(movie: Movie) -> str:
+    """임베딩 대상 텍스트의 해시 (텍스트가 안 바뀌었으면 다시 임베딩할 필요 없음)"""
+    return hashlib.sha256(movie_to_text(movie).encode("utf-8")).hexdigest()
+
+
 def upstage_embed(text: str, model: str) -> list[float]:
-    url = f"{UPSTAGE_BASE_URL}/embeddings"  # :contentReference[oaicite:4]{index=4}
-    headers = {
-        "Authorization": f"Bearer {_get_upstage_key()}",
-        "Content-Type": "application/json",
-    }
     payload = {"model": model, "input": text}
-    r = requests.post(url, headers=headers, json=payload, timeout=20)
-    r.raise_for_status()
+    r = upstage_client.post("/embeddings", json=payload, read_timeout=20)
     data = r.json()
     # OpenAI 스타일: data[0].embedding
     return data["data"][0]["embedding"]
 
 
+async def aupstage_embed(text: str, model: str) -> list[float]:
+    payload = {"model": model, "input": text}
+    r = await async_upstage_client.post("/embeddings", json=payload, read_timeout=20)
+    return r.json()["data"][0]["embedding"]
+
+
+def upstage_embed_batch(texts: list[str], model: str) -> list[list[float]]:
+    """여러 문서를 HTTP 요청 한 번으로 임베딩 (input에 리스트 전달)"""
+    payload = {"model": model, "input": texts}
+    r = upstage_client.post("/embeddings", json=payload, read_timeout=60)
+    data = r.json()
+    # 응답 순서가 보장되지 않을 수 있어서 index 기준으로 정렬
+    items = sorted(data["data"], key=lambda d: d.get("index", 0))
+    return [item["embedding"] for item in items]
+
+
+def embedding_fields(vec, content_hash: str = "", model: str = EMBED_PASSAGE_MODEL) -> dict:
+    """MovieEmbedding 저장용 필드 값 (설정된 포맷으로 인코딩)"""
+    dtype = getattr(settings, "CHATBOT_EMBEDDING_DTYPE", "f32")
+    blob, scale = encode_vector(vec, dtype)
+    return {"vector": blob, "dtype": dtype, "scale": scale, "content_hash": content_hash, "model": model}
+
+
+def embed_query(query: str):
+    """질문 임베딩 (같은 질문은 캐시에서 바로 반환)"""
+    vec = query_embedding_cache.get(query, EMBED_QUERY_MODEL)
+    if vec is None:
+        vec = query_embedding_cache.set(query, EMBED_QUERY_MODEL, upstage_embed(query, model=EMBED_QUERY_MODEL))
+    return vec
+
+
+async def aembed_query(query: str):
+    vec = await query_embedding_cache.aget(query, EMBED_QUERY_MODEL)
+    if vec is None:
+        vec = await query_embedding_cache.aset(query, EMBED_QUERY_MODEL, await aupstage_embed(query, model=EMBED_QUERY_MODEL))
+    return vec
+
+
 def cosine_similarity(a: list[float], b: list[float]) -> float:
     # 순수 파이썬 코사인 유사도(NumPy 없이)
     dot = 0.0
@@ -64,33 +107,106 @@ def cosine_similarity(a: list[float], b: list[float]) -> float:
     return dot / (math.sqrt(na) * math.sqrt(nb))
 
 
-def build_or_update_movie_embedding(movie: Movie) -> None:
+def build_or_update_movie_embedding(movie: Movie) -> bool:
+    """
+    임베딩 텍스트의 해시와 모델이 저장된 값과 같으면 API 호출 없이 건너뜀.
+    실제로 새로 임베딩했으면 True
+    """
     text = movie_to_text(movie)
+    content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    stored = MovieEmbedding.objects.filter(movie=movie).values_list("content_hash", "model").first()
+    if stored == (content_hash, EMBED_PASSAGE_MODEL):
+        return False
+
     vec = upstage_embed(text, model=EMBED_PASSAGE_MODEL)
-    MovieEmbedding.objects.update_or_create(movie=movie, defaults={"vector": vec})
+    MovieEmbedding.objects.update_or_create(movie=movie, defaults=embedding_fields(vec, content_hash))
+    movie_index.upsert(movie.id, vec)
+    return True
 
 
-def retrieve_top_k_movies(query: str, k: int = 5) -> list[tuple[Movie, float]]:
-    qvec = upstage_embed(query, model=EMBED_QUERY_MODEL)
+def _hybrid_conf() -> dict:
+    conf = getattr(settings, "CHATBOT_HYBRID", {})
+    return {
+        "enabled": conf.get("ENABLED", True),
+        "rrf_k": conf.get("RRF_K", 60),
+        "candidates": conf.get("CANDIDATES", 20),
+    }
 
-    scored: list[tuple[Movie, float]] = []
-    qs = MovieEmbedding.objects.select_related("movie").all()
 
-    for emb in qs:
-        sim = cosine_similarity(qvec, emb.vector)
-        scored.append((emb.movie, sim))
+def reciprocal_rank_fusion(rankings: list[list[tuple[int, float]]], k: int = 60) -> list[tuple[int, float]]:
+    """
+    여러 순위 목록을 RRF로 합침: score(d) = Σ 1 / (k + rank)
+    점수 척도가 다른 BM25와 코사인 유사도를 정규화 없이 섞을 수 있음
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, (movie_id, _) in enumerate(ranking, start=1):
+            fused[movie_id] = fused.get(movie_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda x: x[1], reverse=True)
 
-    scored.sort(key=lambda x: x[1], reverse=True)
-    return scored[:k]
 
+def _fuse(query_hits, lexical_hits, k: int, conf: dict) -> list[tuple[int, float]]:
+    if not conf["enabled"]:
+        return query_hits[:k]
+    return reciprocal_rank_fusion([query_hits, lexical_hits], k=conf["rrf_k"])[:k]
 
-def upstage_chat(system: str, user: str) -> str:
-    url = f"{UPSTAGE_BASE_URL}/chat/completions"  # :contentReference[oaicite:5]{index=5}
-    headers = {
-        "Authorization": f"Bearer {_get_upstage_key()}",
-        "Content-Type": "application/json",
-    }
-    payload = {
+
+def query_filters(text: str) -> RetrievalFilters:
+    """질문에서 규칙 기반으로 뽑은 조건 (settings.CHATBOT_QUERY_FILTERS가 꺼져 있으면 빈 조건)"""
+    if getattr(settings, "CHATBOT_QUERY_FILTERS", True):
+        return parse_query_filters(text)
+    return RetrievalFilters()
+
+
+def _resolve_filters(query: str, filters):
+    """filters를 안 주면 질문에서 추출"""
+    if filters is None:
+        filters = query_filters(query)
+    return filters or None
+
+
+def retrieve_top_k_movies(query: str, k: int = 5, query_vector=None,
+                          filters: RetrievalFilters = None) -> list[tuple[Movie, float]]:
+    """
+    벡터 검색(의미) + BM25(제목/배우 이름 같은 정확한 단어)를 RRF로 합친 상위 k개.
+    하이브리드를 끄면 점수는 코사인 유사도, 켜면 RRF 점수.
+    장르/연도/별점 조건이 있으면 유사도 계산 전에 후보를 먼저 줄임
+    """
+    qvec = embed_query(query) if query_vector is None else query_vector
+    conf = _hybrid_conf()
+    n = max(k, conf["candidates"]) if conf["enabled"] else k
+    filters = _resolve_filters(query, filters)
+    allowed_ids = lexical_index.filter_ids(filters) if filters else None
+
+    # 전체 임베딩을 매번 DB에서 읽지 않고, 메모리 인덱스에서 행렬-벡터 곱 한 번으로 점수 계산
+    hits = movie_index.search(qvec, n, allowed_ids=allowed_ids)
+    lexical_hits = lexical_index.search(query, n, filters) if conf["enabled"] else []
+    hits = _fuse(hits, lexical_hits, k, conf)
+    movies = Movie.objects.in_bulk([movie_id for movie_id, _ in hits])
+
+    return [(movies[movie_id], score) for movie_id, score in hits if movie_id in movies]
+
+
+async def aretrieve_top_k_movies(query: str, k: int = 5, query_vector=None,
+                                 filters: RetrievalFilters = None) -> list[tuple[Movie, float]]:
+    """retrieve_top_k_movies의 async 버전 (async HTTP + async ORM)"""
+    qvec = await aembed_query(query) if query_vector is None else query_vector
+    conf = _hybrid_conf()
+    n = max(k, conf["candidates"]) if conf["enabled"] else k
+    filters = _resolve_filters(query, filters)
+    allowed_ids = await lexical_index.afilter_ids(filters) if filters else None
+
+    hits = await movie_index.asearch(qvec, n, allowed_ids=allowed_ids)
+    lexical_hits = await lexical_index.asearch(query, n, filters) if conf["enabled"] else []
+    hits = _fuse(hits, lexical_hits, k, conf)
+    movies = {m.pk: m async for m in Movie.objects.filter(pk__in=[movie_id for movie_id, _ in hits])}
+
+    return [(movies[movie_id], score) for movie_id, score in hits if movie_id in movies]
+
+
+def _chat_payload(system: str, user: str, stream: bool = False) -> dict:
+    return {
         "model": CHAT_MODEL,
         "messages": [
             {"role": "system", "content": system},
@@ -98,8 +214,35 @@ def upstage_chat(system: str, user: str) -> str:
         ],
         "temperature": 0.3,
         "max_tokens": 800,
+        "stream": stream,
     }
-    r = requests.post(url, headers=headers, json=payload, timeout=30)
-    r.raise_for_status()
+
+
+def upstage_chat(system: str, user: str) -> str:
+    payload = _chat_payload(system, user)
+    r = upstage_client.post("/chat/completions", json=payload, read_timeout=30)
     data = r.json()
     return data["choices"][0]["message"]["content"]
+
+
+async def aupstage_chat(system: str, user: str) -> str:
+    payload = _chat_payload(system, user)
+    r = await async_upstage_client.post("/chat/completions", json=payload, read_timeout=30)
+    return r.json()["choices"][0]["message"]["content"]
+
+
+async def upstage_chat_stream(system: str, user: str):
+    """
+    stream=true로 요청해서 생성되는 토큰 조각(delta)을 바로바로 내보내는 async generator
+    (OpenAI 스타일 SSE: "data: {...}" 줄들, 마지막은 "data: [DONE]")
+    """
+    payload = _chat_payload(system, user, stream=True)
+    async for line in async_upstage_client.stream_lines("POST", "/chat/completions", json=payload, read_timeout=30):
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+        if delta:
+            yield delta
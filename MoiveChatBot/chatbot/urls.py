@@ -4,4 +4,6 @@ from . import views
 urlpatterns = [
     path("", views.chatbot_page, name="chatbot"),
     path("response/", views.chatbot_response, name="chatbot_response"),
+    path("response/async/", views.chatbot_response_async, name="chatbot_response_async"),
+    path("stream/", views.chatbot_stream, name="chatbot_stream"),
 ]
@@ -0,0 +1,457 @@
+import math
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import MovieEmbedding, decode_vector
+
+
+def _normalize(vec) -> np.ndarray:
+    """float32로 바꾸고 L2 정규화 (영벡터는 그대로 0)"""
+    arr = np.asarray(vec, dtype=np.float32)
+    norm = float(np.linalg.norm(arr))
+    if norm == 0.0:
+        return arr
+    return arr / norm
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """scores에서 점수 높은 순으로 k개 위치 반환"""
+    k = min(k, len(scores))
+    if k < len(scores):
+        top = np.argpartition(scores, -k)[-k:]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(scores[top])[::-1]]
+
+
+class _Snapshot(NamedTuple):
+    matrix: np.ndarray  # L2 정규화된 임베딩 (N, D) float32 연속 행렬
+    ids: np.ndarray     # 각 행에 대응하는 movie_id (N,)
+    pos: dict           # movie_id -> 행 번호
+
+
+class MovieVectorIndex:
+    """
+    프로세스 전역 벡터 인덱스 (정확한 brute-force 검색).
+    (matrix, ids, pos)를 한 튜플(_snap)로 묶어서 속성 하나에 대입해 교체하고,
+    검색은 그 튜플을 한 번만 읽어서 씀 -> 락 없이도 행렬과 id가 서로 다른 버전으로 섞이지 않음.
+    첫 검색 때 DB에서 한 번만 읽어오고, 이후엔 upsert/remove로 부분 갱신 (새 배열을 만들어 교체, copy-on-write).
+    refresh_interval(초)을 주면 다른 프로세스(관리 명령, 워커)가 쓴 임베딩도
+    updated_at 기준으로 주기적으로 따라잡는다. 바뀐 행이 전체의 reload_fraction보다 많으면
+    부분 갱신 대신 전체를 다시 읽음 (대량 재임베딩 / import 직후).
+    """
+
+    def __init__(self, refresh_interval=None, reload_fraction=0.1):
+        self.refresh_interval = refresh_interval
+        self.reload_fraction = reload_fraction
+        self._lock = threading.RLock()
+        self._snap = None
+        self._synced_at = None
+        self._checked_at = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self._snap is not None
+
+    # 락을 잡은 쪽(갱신/학습)에서 쓰는 읽기 전용 접근자. 락 없이 읽을 땐 self._snap을 한 번만 꺼내서 쓸 것
+    @property
+    def _matrix(self):
+        snap = self._snap
+        return snap.matrix if snap is not None else None
+
+    @property
+    def _ids(self):
+        snap = self._snap
+        return snap.ids if snap is not None else None
+
+    @property
+    def _pos(self) -> dict:
+        snap = self._snap
+        return snap.pos if snap is not None else {}
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self._snap.ids)
+
+    def _set(self, matrix: np.ndarray, ids: np.ndarray) -> None:
+        ids = ids.astype(np.int64, copy=False)
+        pos = {int(mid): i for i, mid in enumerate(ids)}
+        # 대입 한 번으로 교체 (읽는 쪽은 예전 튜플이든 새 튜플이든 통째로 봄)
+        self._snap = _Snapshot(np.ascontiguousarray(matrix, dtype=np.float32), ids, pos)
+
+    # ----- 하위 클래스(ANN 백엔드)용 훅 -----
+    def _after_load(self) -> None:
+        pass
+
+    def _after_upsert(self, positions: np.ndarray, rows: np.ndarray) -> None:
+        """positions: 갱신/추가된 행 번호, rows: 그 행들의 정규화된 벡터"""
+        pass
+
+    def _after_remove(self, keep: np.ndarray) -> None:
+        pass
+
+    def build(self, ids, vectors) -> None:
+        """DB 대신 주어진 배열로 인덱스 구성 (벤치마크/테스트용)"""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            self._set(_normalize_rows(matrix), np.asarray(ids, dtype=np.int64))
+            self._after_load()
+
+    def _load(self) -> None:
+        rows = list(MovieEmbedding.objects.values_list("movie_id", "vector", "dtype", "scale", "updated_at"))
+        ids = np.asarray([row[0] for row in rows], dtype=np.int64)
+
+        if rows:
+            # BinaryField를 np.frombuffer로 바로 읽어서 미리 잡아둔 행렬에 채움
+            dim = decode_vector(*rows[0][1:4]).shape[0]
+            matrix = np.empty((len(rows), dim), dtype=np.float32)
+            for i, (_, blob, dtype, scale, _) in enumerate(rows):
+                matrix[i] = decode_vector(blob, dtype, scale)
+            matrix = _normalize_rows(matrix)
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        self._set(matrix, ids)
+        self._synced_at = max((row[4] for row in rows), default=None)
+        self._checked_at = time.monotonic()
+        self._after_load()
+
+    def _ensure_loaded(self) -> None:
+        if self._snap is not None:
+            return
+        with self._lock:
+            if self._snap is None:
+                self._load()
+
+    def _refresh(self) -> None:
+        """
+        마지막 동기화 이후 바뀐 행만 읽어 upsert_many 한 번으로 반영.
+        바뀐 행이 많거나 개수가 안 맞으면(다른 곳에서 삭제) 전체 재로딩
+        """
+        changed = MovieEmbedding.objects.values_list("movie_id", "vector", "dtype", "scale", "updated_at")
+        if self._synced_at is not None:
+            changed = changed.filter(updated_at__gt=self._synced_at)
+        rows = list(changed)
+
+        if rows:
+            snap = self._snap
+            if snap is None or len(rows) > self.reload_fraction * len(snap.ids):
+                self._load()
+                return
+            self.upsert_many(
+                [row[0] for row in rows],
+                [decode_vector(blob, dtype, scale) for _, blob, dtype, scale, _ in rows],
+            )
+            latest = max(row[4] for row in rows)
+            if self._synced_at is None or latest > self._synced_at:
+                self._synced_at = latest
+
+        if self._snap is None or MovieEmbedding.objects.count() != len(self._snap.ids):
+            self._load()
+
+    def _ensure_fresh(self) -> None:
+        self._ensure_loaded()
+        if not self.refresh_interval:
+            return
+        if time.monotonic() - self._checked_at < self.refresh_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._checked_at >= self.refresh_interval:
+                self._checked_at = time.monotonic()
+                self._refresh()
+
+    def invalidate(self) -> None:
+        """다음 검색 때 DB에서 다시 읽도록 비움"""
+        with self._lock:
+            self._snap = None
+
+    def upsert(self, movie_id: int, vector) -> None:
+        self.upsert_many([movie_id], [vector])
+
+    def upsert_many(self, movie_ids, vectors) -> None:
+        """
+        여러 행을 한 번에 반영: 기존 행은 fancy-index 대입 한 번, 새 id는 vstack 한 번
+        (행마다 행렬 전체를 복사하지 않음)
+        """
+        with self._lock:
+            # 아직 안 읽었으면 나중에 lazy load 할 때 같이 들어옴
+            snap = self._snap
+            if snap is None:
+                return
+
+            latest = dict(zip((int(m) for m in movie_ids), vectors))  # 같은 id가 여러 번이면 마지막 값
+            if not latest:
+                return
+            try:
+                rows = _normalize_rows(np.asarray(list(latest.values()), dtype=np.float32))
+            except ValueError:
+                rows = None  # 벡터끼리 차원이 다름
+            matrix, ids = snap.matrix, snap.ids
+
+            # 차원이 바뀌면(모델 변경 등) 부분 갱신 대신 전체 재로딩
+            if rows is None or rows.ndim != 2 or (len(ids) and matrix.shape[1] != rows.shape[1]):
+                self._snap = None
+                return
+
+            new_ids = np.fromiter(latest, dtype=np.int64, count=len(latest))
+            positions = np.fromiter((snap.pos.get(m, -1) for m in latest), dtype=np.int64, count=len(latest))
+            existing = positions >= 0
+
+            if len(ids) == 0:
+                matrix, ids = rows, new_ids
+                positions = np.arange(len(new_ids))
+            else:
+                added = ~existing
+                if added.any():
+                    positions[added] = np.arange(len(ids), len(ids) + int(added.sum()))
+                    matrix = np.vstack([matrix, rows[added]])  # 새 배열이라 아래 대입도 그대로 해도 됨
+                    ids = np.concatenate([ids, new_ids[added]])
+                else:
+                    matrix = matrix.copy()
+                matrix[positions[existing]] = rows[existing]
+
+            self._set(matrix, ids)
+            self._after_upsert(positions, rows)
+
+    def remove(self, movie_id: int) -> None:
+        with self._lock:
+            snap = self._snap
+            if snap is None:
+                return
+            pos = snap.pos.get(movie_id)
+            if pos is None:
+                return
+            keep = np.ones(len(snap.ids), dtype=bool)
+            keep[pos] = False
+            self._set(snap.matrix[keep], snap.ids[keep])
+            self._after_remove(keep)
+
+    def _check_query(self, query_vector, matrix: np.ndarray) -> np.ndarray:
+        q = _normalize(query_vector)
+        if q.shape[0] != matrix.shape[1]:
+            raise ValueError(f"임베딩 차원이 다릅니다: query={q.shape[0]}, index={matrix.shape[1]}")
+        return q
+
+    def search(self, query_vector, k: int = 5, **options) -> list[tuple[int, float]]:
+        """코사인 유사도 상위 k개의 (movie_id, score) 반환"""
+        self._ensure_fresh()
+        return self._search(query_vector, k, **options)
+
+    async def asearch(self, query_vector, k: int = 5, **options) -> list[tuple[int, float]]:
+        """
+        async 뷰용: DB를 읽거나 오래 걸리는 작업(첫 로딩, 주기 갱신, 학습)이 필요하거나
+        다른 스레드가 락을 잡고 있을 때만 스레드로 넘김 (이벤트 루프에서는 락을 기다리지 않음)
+        """
+        if not self._needs_blocking_work():
+            hits = self._search(query_vector, k, blocking=False, **options)
+            if hits is not None:
+                return hits
+        return await sync_to_async(self.search)(query_vector, k, **options)
+
+    def _needs_blocking_work(self) -> bool:
+        if self._snap is None:
+            return True
+        return bool(self.refresh_interval) and time.monotonic() - self._checked_at >= self.refresh_interval
+
+    def _search(self, query_vector, k: int, allowed_ids=None, blocking=True) -> list[tuple[int, float]]:
+        """blocking=False면 락을 바로 못 잡을 때 None (exact 검색은 스냅샷만 읽어서 락이 필요 없음)"""
+        snap = self._snap  # 한 번만 읽음 (그 사이 교체돼도 이 검색은 같은 스냅샷으로 끝남)
+        if snap is None or len(snap.ids) == 0 or k <= 0:
+            return []
+        matrix, ids = snap.matrix, snap.ids
+
+        q = self._check_query(query_vector, matrix)
+        if allowed_ids is None:
+            scores = matrix @ q
+            top = _top_k(scores, k)
+            return [(int(ids[i]), float(scores[i])) for i in top]
+
+        # 메타데이터 필터를 통과한 행만 점수 계산
+        rows = np.flatnonzero(np.isin(ids, allowed_ids))
+        if len(rows) == 0:
+            return []
+        scores = matrix[rows] @ q
+        top = _top_k(scores, k)
+        return [(int(ids[rows[i]]), float(scores[i])) for i in top]
+
+
+class IVFMovieIndex(MovieVectorIndex):
+    """
+    근사 최근접 이웃(ANN) 인덱스: Inverted File (IVF).
+    구면 k-means로 nlist개 중심을 학습하고, 검색 시 질문과 가까운 nprobe개 클러스터만 스캔한다.
+    - nprobe를 키우면 recall↑ / latency↑ (nprobe == nlist 이면 exact와 같음)
+    - 영화 수가 min_train_size 미만이면 그냥 exact 검색
+    - 학습 이후 데이터가 2배 이상 늘면 다음 검색 때 다시 학습
+    """
+
+    def __init__(self, nlist=None, nprobe=8, min_train_size=1000, train_iters=10, seed=0,
+                 refresh_interval=None, reload_fraction=0.1):
+        super().__init__(refresh_interval=refresh_interval, reload_fraction=reload_fraction)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.train_iters = train_iters
+        self.seed = seed
+
+        self._centroids = None
+        self._assign = None
+        self._trained_size = 0
+        self._needs_train = False
+        self._order = None
+        self._bounds = None
+
+    # ----- 학습/할당 -----
+    def _nearest_centroid(self, matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        out = np.empty(len(matrix), dtype=np.int32)
+        chunk = 65536
+        for start in range(0, len(matrix), chunk):
+            out[start:start + chunk] = np.argmax(matrix[start:start + chunk] @ centroids.T, axis=1)
+        return out
+
+    def _train(self) -> None:
+        matrix = self._matrix
+        n = len(matrix)
+        if n < self.min_train_size:
+            self._centroids = None
+            self._assign = None
+            self._trained_size = n
+            self._needs_train = False
+            return
+
+        nlist = self.nlist or max(1, int(math.sqrt(n)))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(self.seed)
+
+        # 학습은 샘플로만 (클러스터당 최대 64개)
+        sample_size = min(n, nlist * 64)
+        sample = matrix[rng.choice(n, sample_size, replace=False)]
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(self.train_iters):
+            assign = self._nearest_centroid(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            counts = np.bincount(assign, minlength=nlist)
+            empty = counts == 0
+            # 빈 클러스터는 임의의 샘플로 다시 시작
+            if empty.any():
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = _normalize_rows(sums).astype(np.float32)
+
+        self._centroids = centroids
+        self._assign = self._nearest_centroid(matrix, centroids)
+        self._trained_size = n
+        self._needs_train = False
+        self._order = None
+
+    def _rebuild_lists(self) -> None:
+        """클러스터별 행 번호 목록 (정렬된 order + 구간 경계)"""
+        order = np.argsort(self._assign, kind="stable")
+        bounds = np.searchsorted(self._assign[order], np.arange(len(self._centroids) + 1))
+        self._order = order
+        self._bounds = bounds
+
+    # ----- 훅 -----
+    def _after_load(self) -> None:
+        self._needs_train = True
+
+    def _after_upsert(self, positions: np.ndarray, rows: np.ndarray) -> None:
+        if self._needs_train:
+            return  # 다시 읽은 뒤 아직 학습 전: 할당은 학습 때 전부 새로 계산
+        n = len(self._ids)
+        if self._centroids is None:
+            if n >= self.min_train_size:
+                self._needs_train = True
+            return
+        if n >= 2 * self._trained_size:
+            self._needs_train = True
+            return
+
+        # 추가된 행만큼 늘린 새 배열에 바뀐 행들의 클러스터를 한 번에 할당
+        assign = np.empty(n, dtype=np.int32)
+        assign[:len(self._assign)] = self._assign
+        assign[positions] = self._nearest_centroid(rows, self._centroids)
+        self._assign = assign
+        self._order = None
+
+    def _after_remove(self, keep: np.ndarray) -> None:
+        if self._assign is not None and not self._needs_train:
+            self._assign = self._assign[keep]
+            self._order = None
+
+    def _needs_blocking_work(self) -> bool:
+        return super()._needs_blocking_work() or self._needs_train
+
+    def _search(self, query_vector, k: int, nprobe=None, allowed_ids=None, blocking=True) -> list[tuple[int, float]]:
+        if not self._lock.acquire(blocking=blocking):
+            return None  # 다른 스레드가 갱신/학습 중 -> asearch가 스레드에서 기다림
+        try:
+            snap = self._snap
+            if snap is None:
+                return []  # 다른 스레드가 방금 비움 (차원 변경 등)
+            if self._needs_train:
+                self._train()
+            if self._centroids is not None and self._order is None:
+                self._rebuild_lists()
+            matrix, ids = snap.matrix, snap.ids
+            centroids, order, bounds = self._centroids, self._order, self._bounds
+        finally:
+            self._lock.release()
+
+        if centroids is None:
+            return super()._search(query_vector, k, allowed_ids)
+        if len(ids) == 0 or k <= 0:
+            return []
+
+        nprobe = min(nprobe or self.nprobe, len(centroids))
+        # 필터로 남은 후보가 nprobe개 클러스터를 훑는 것보다 적으면 그냥 후보만 정확히 계산
+        if allowed_ids is not None and len(allowed_ids) * len(centroids) <= len(ids) * nprobe:
+            return super()._search(query_vector, k, allowed_ids)
+
+        q = self._check_query(query_vector, matrix)
+        probes = _top_k(centroids @ q, nprobe)
+
+        rows = np.concatenate([order[bounds[c]:bounds[c + 1]] for c in probes])
+        if allowed_ids is not None:
+            rows = rows[np.isin(ids[rows], allowed_ids)]
+        if len(rows) == 0:
+            return []
+        scores = matrix[rows] @ q
+        top = _top_k(scores, k)
+        return [(int(ids[rows[i]]), float(scores[i])) for i in top]
+
+
+INDEX_BACKENDS = {
+    "exact": MovieVectorIndex,
+    "ivf": IVFMovieIndex,
+}
+
+
+def create_index(backend: str = "exact", **options) -> MovieVectorIndex:
+    try:
+        index_class = INDEX_BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"알 수 없는 벡터 인덱스 백엔드: {backend} (가능: {', '.join(INDEX_BACKENDS)})")
+    return index_class(**options)
+
+
+def _index_from_settings() -> MovieVectorIndex:
+    """
+    settings.CHATBOT_VECTOR_INDEX 예시:
+        {"BACKEND": "ivf", "OPTIONS": {"nprobe": 16, "nlist": 1024, "refresh_interval": 30}}
+    """
+    conf = getattr(settings, "CHATBOT_VECTOR_INDEX", {})
+    return create_index(conf.get("BACKEND", "exact"), **conf.get("OPTIONS", {}))
+
+
+movie_index = _index_from_settings()
@@ -1,12 +1,85 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from django.views.decorators.http import require_POST
 
-from .upstage_utils import retrieve_top_k_movies, upstage_chat
+from .cache import semantic_answer_cache
+from .context import build_context
+from .memory import NEW, SAME, ConversationMemory
+from .metrics import render_prometheus, start_trace
+from .singleflight import answer_flight, retrieval_flight
+from .vector_index import movie_index
+from .upstage_utils import (
+    aembed_query,
+    aretrieve_top_k_movies,
+    aupstage_chat,
+    embed_query,
+    query_filters,
+    retrieve_top_k_movies,
+    upstage_chat,
+    upstage_chat_stream,
+)
+
+
+SYSTEM_PROMPT = (
+    "너는 영화 사이트의 챗봇이다. "
+    "아래 [검색 결과]를 근거로만 답해라. "
+    "근거가 부족하면 부족하다고 말하고, 가능하면 추가 질문을 해라."
+)
 
 
 def chatbot_page(request):
-    return render(request, "chatbot/chatbot.html")
+    # 토큰 스트리밍(chatbot_stream)은 ASGI 서버(uvicorn)에서만 실제로 조금씩 나감.
+    # WSGI(runserver/gunicorn)에서는 Django가 async 스트림을 끝까지 모은 뒤 보내므로 JSON 응답을 씀
+    return render(request, "chatbot/chatbot.html", {"streaming": isinstance(request, ASGIRequest)})
+
+
+def _retrieve(message: str, trace, filters=None):
+    with trace.stage("embed"):
+        qvec = embed_query(message)
+    with trace.stage("retrieve"):
+        top = retrieve_top_k_movies(message, k=5, query_vector=qvec, filters=filters)
+    trace.note(corpus_size=len(movie_index), hits=len(top))
+    return qvec, top
+
+
+async def _aretrieve(message: str, trace, filters=None):
+    with trace.stage("embed"):
+        qvec = await aembed_query(message)
+    with trace.stage("retrieve"):
+        top = await aretrieve_top_k_movies(message, k=5, query_vector=qvec, filters=filters)
+    trace.note(corpus_size=len(movie_index), hits=len(top))
+    return qvec, top
+
+
+def _build_prompt(message: str, top, history: str = "") -> tuple[str, str]:
+    past = f"[이전 대화]\n{history}\n\n" if history else ""
+    user = f"""{past}[검색 결과]
+{build_context(top)}
+
+[사용자 질문]
+{message}
+"""
+    return SYSTEM_PROMPT, user
+
+
+def _traced_prompt(message: str, top, trace, history: str = "") -> tuple[str, str]:
+    system, user = _build_prompt(message, top, history)
+    trace.note(prompt_chars=len(system) + len(user))
+    return system, user
+
+
+async def _atraced_prompt(message: str, top, trace, history: str = "") -> tuple[str, str]:
+    # build_context는 Django cache(get_many/set)를 동기로 읽으므로 이벤트 루프가 아니라 스레드에서
+    return await sync_to_async(_traced_prompt)(message, top, trace, history)
+
+
+def _movie_refs(top) -> list[tuple[int, str]]:
+    return [(m.id, m.title) for m, _ in top]
 
 
 @require_POST
@@ -15,29 +88,207 @@ def chatbot_response(request):
     if not message:
         return JsonResponse({"answer": "메시지를 입력해줘."})
 
-    top = retrieve_top_k_movies(message, k=5)
+    trace = start_trace("chatbot_response")
+    memory = ConversationMemory.from_session(request.session)
+    kind = memory.classify(message)
+    trace.note(turn=kind)
+
+    if kind == NEW:
+        # 같은 질문이 동시에 여러 개 들어오면 한 번만 계산하고 결과를 나눠 가짐
+        trace.note(answer_cache="coalesced")
+        answer, movies = answer_flight.do(message, lambda: _answer(message, trace))
+    else:
+        # 이전 대화에 이어지는 질문은 세션마다 답이 다르므로 합치거나 캐시하지 않음
+        answer, movies = _answer_follow_up(message, memory, kind, trace)
 
-    context_lines = []
-    for m, score in top:
-        context_lines.append(
-            f"- {m.title} ({m.release_year}, {m.genre}, 별점 {m.rating})\n"
-            f"  감독: {m.director or '-'}\n"
-            f"  배우: {m.actors or '-'}\n"
-            f"  리뷰: {m.review or '-'}"
-        )
+    memory.add_turn(message, answer, movies, kind)
+    memory.save(request.session)
+    trace.finish()
+    return JsonResponse({"answer": answer})
 
-    system = (
-        "너는 영화 사이트의 챗봇이다. "
-        "아래 [검색 결과]를 근거로만 답해라. "
-        "근거가 부족하면 부족하다고 말하고, 가능하면 추가 질문을 해라."
-    )
 
-    user = f"""[검색 결과]
-{chr(10).join(context_lines)}
+def _answer(message: str, trace) -> tuple[str, list]:
+    qvec, top = _retrieve(message, trace)
 
-[사용자 질문]
-{message}
-"""
+    # 비슷한 질문 + 같은 검색 결과면 이전 답변 재사용
+    top_movies = [m for m, _ in top]
+    cached = semantic_answer_cache.lookup(qvec, top_movies)
+    if cached is not None:
+        trace.note(answer_cache="hit")
+        return cached, _movie_refs(top)
+
+    system, user = _traced_prompt(message, top, trace)
+    with trace.stage("chat"):
+        answer = upstage_chat(system=system, user=user)
+    semantic_answer_cache.store(qvec, top_movies, answer)
+    trace.note(answer_cache="miss")
+    return answer, _movie_refs(top)
+
+
+def _answer_follow_up(message: str, memory: ConversationMemory, kind: str, trace) -> tuple[str, list]:
+    if kind == SAME:
+        # 직전 영화들에 대한 질문이면 임베딩/검색 없이 그 영화들로 답변
+        with trace.stage("retrieve"):
+            top = memory.top_movies()
+    else:
+        # 검색 문장은 직전 질문과 이어 붙이지만 장르/연도 조건은 이번 메시지에서만 뽑음
+        _, top = _retrieve(memory.retrieval_query(message, kind), trace, query_filters(message))
+
+    system, user = _traced_prompt(message, top, trace, memory.history_text())
+    with trace.stage("chat"):
+        answer = upstage_chat(system=system, user=user)
+    return answer, _movie_refs(top)
+
+
+async def chatbot_response_async(request):
+    """
+    chatbot_response의 async 버전 (ASGI + uvicorn에서 사용).
+    임베딩/채팅 HTTP 대기와 DB 조회 동안 스레드를 잡지 않아서 워커 하나로 동시 요청 수백 개 처리 가능
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    message = (request.POST.get("message") or "").strip()
+    if not message:
+        return JsonResponse({"answer": "메시지를 입력해줘."})
+
+    trace = start_trace("chatbot_response_async")
+    # Django 4.2 세션은 sync API뿐이라 스레드에서 읽음
+    memory = await sync_to_async(ConversationMemory.from_session)(request.session)
+    kind = memory.classify(message)
+    trace.note(turn=kind)
 
-    answer = upstage_chat(system=system, user=user)
+    if kind == NEW:
+        trace.note(answer_cache="coalesced")
+        answer, movies = await answer_flight.ado(message, lambda: _aanswer(message, trace))
+    else:
+        answer, movies = await _aanswer_follow_up(message, memory, kind, trace)
+
+    memory.add_turn(message, answer, movies, kind)
+    memory.save(request.session)
+    trace.finish()
     return JsonResponse({"answer": answer})
+
+
+async def _aanswer(message: str, trace) -> tuple[str, list]:
+    qvec, top = await _aretrieve(message, trace)
+
+    top_movies = [m for m, _ in top]
+    cached = await semantic_answer_cache.alookup(qvec, top_movies)
+    if cached is not None:
+        trace.note(answer_cache="hit")
+        return cached, _movie_refs(top)
+
+    system, user = await _atraced_prompt(message, top, trace)
+    with trace.stage("chat"):
+        answer = await aupstage_chat(system=system, user=user)
+    await semantic_answer_cache.astore(qvec, top_movies, answer)
+    trace.note(answer_cache="miss")
+    return answer, _movie_refs(top)
+
+
+async def _aanswer_follow_up(message: str, memory: ConversationMemory, kind: str, trace) -> tuple[str, list]:
+    if kind == SAME:
+        with trace.stage("retrieve"):
+            top = await memory.atop_movies()
+    else:
+        _, top = await _aretrieve(memory.retrieval_query(message, kind), trace, query_filters(message))
+
+    system, user = await _atraced_prompt(message, top, trace, memory.history_text())
+    with trace.stage("chat"):
+        answer = await aupstage_chat(system=system, user=user)
+    return answer, _movie_refs(top)
+
+
+def _sse(data: dict, event: str = None) -> str:
+    """Server-Sent Events 한 건"""
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def chatbot_stream(request):
+    """
+    답변을 토큰 단위로 SSE로 흘려보내는 async 뷰.
+    ASGI(uvicorn config.asgi:application)에서만 토큰이 오는 대로 나가고 upstage 응답을 기다리는 동안 스레드도 점유하지 않음.
+    WSGI에서는 Django가 응답 전체를 모은 뒤 보내므로 채팅 페이지는 ASGI일 때만 이 뷰를 씀
+    (Django 4.2의 require_POST는 async 뷰를 감싸지 못해서 직접 검사)
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    message = (request.POST.get("message") or "").strip()
+    if not message:
+        async def empty():
+            yield _sse({"answer": "메시지를 입력해줘."}, event="done")
+        return _event_stream(empty())
+
+    trace = start_trace("chatbot_stream")
+    session = request.session
+    memory = await sync_to_async(ConversationMemory.from_session)(session)
+    kind = memory.classify(message)
+    trace.note(turn=kind)
+
+    qvec, cached = None, None
+    if kind == SAME:
+        with trace.stage("retrieve"):
+            top = await memory.atop_movies()
+    elif kind == NEW:
+        # 같은 질문이 동시에 몰리면 임베딩/검색은 한 번만 하고 결과를 나눠 가짐 (chat 스트림은 요청마다)
+        qvec, top = await retrieval_flight.ado(message, lambda: _aretrieve(message, trace))
+    else:
+        qvec, top = await _aretrieve(memory.retrieval_query(message, kind), trace, query_filters(message))
+    top_movies = [m for m, _ in top]
+    if kind == NEW:
+        cached = await semantic_answer_cache.alookup(qvec, top_movies)
+    system, user = await _atraced_prompt(message, top, trace, memory.history_text() if kind != NEW else "")
+
+    # 응답 헤더가 나갈 때 세션 쿠키가 붙도록 미리 한 번 기록해두고, 답변이 끝나면 다시 저장
+    memory.save(session)
+
+    async def remember(answer: str):
+        memory.add_turn(message, answer, _movie_refs(top), kind)
+        memory.save(session)
+        await sync_to_async(session.save)()
+
+    async def events():
+        if cached is not None:
+            trace.finish(answer_cache="hit")
+            await remember(cached)
+            yield _sse({"delta": cached})
+            yield _sse({"answer": cached}, event="done")
+            return
+
+        parts = []
+        try:
+            # chat 단계는 첫 토큰이 아니라 마지막 토큰까지 (클라이언트 전송 대기 시간 포함)
+            with trace.stage("chat"):
+                async for delta in upstage_chat_stream(system=system, user=user):
+                    parts.append(delta)
+                    yield _sse({"delta": delta})
+        except Exception:
+            trace.finish(answer_cache="miss", error=True)
+            yield _sse({"error": "오류가 발생했어. 잠시 후 다시 시도해줘."}, event="error")
+            return
+
+        answer = "".join(parts)
+        if kind == NEW:
+            await semantic_answer_cache.astore(qvec, top_movies, answer)
+        trace.finish(answer_cache="miss")
+        await remember(answer)
+        yield _sse({"answer": answer}, event="done")
+
+    return _event_stream(events())
+
+
+def _event_stream(events) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx 버퍼링 끄기
+    return response
+
+
+def metrics(request):
+    """Prometheus가 긁어가는 /metrics (단계별 latency, upstream 요청 latency, 프롬프트 크기 등)"""
+    if not getattr(settings, "CHATBOT_METRICS", {}).get("ENABLED", True):
+        raise Http404
+    return HttpResponse(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -76,3 +76,126 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+
+# 챗봇 RAG 벡터 인덱스: "exact"(brute-force) 또는 "ivf"(근사 검색, nprobe로 recall/속도 조절)
+CHATBOT_VECTOR_INDEX = {
+    "BACKEND": os.getenv("CHATBOT_VECTOR_BACKEND", "exact"),
+    "OPTIONS": {"refresh_interval": 30},  # 다른 프로세스가 쓴 임베딩 반영 주기(초)
+}
+
+# MovieEmbedding.vector 저장 포맷: "f32" | "f16" | "i8"(scale 양자화)
+CHATBOT_EMBEDDING_DTYPE = os.getenv("CHATBOT_EMBEDDING_DTYPE", "f32")
+
+# 질문 임베딩 캐시 (DJANGO_CACHE에 CACHES 별칭을 넣으면 프로세스 간 공유)
+CHATBOT_EMBED_CACHE = {
+    "MAX_BYTES": 32 * 1024 * 1024,
+    "TTL": 60 * 60,
+    "DJANGO_CACHE": None,
+}
+
+# 의미 기반 답변 캐시: 비슷한 질문 + 같은 검색 결과면 이전 답변 재사용
+CHATBOT_ANSWER_CACHE = {
+    "THRESHOLD": 0.95,
+    "MAX_ENTRIES": 512,
+    "TTL": 30 * 60,
+}
+
+# 같은 질문 동시 요청 합치기 (single-flight)
+# DJANGO_CACHE에 CACHES 별칭을 넣으면 프로세스 간에도 락으로 합침 (Redis/Memcached 등 공유 캐시일 때만 의미 있음)
+CHATBOT_SINGLE_FLIGHT = {
+    "ENABLED": True,
+    "DJANGO_CACHE": None,
+    "LOCK_TTL": 60,        # 계산 중 프로세스가 죽어도 락이 풀리는 시간(초)
+    "RESULT_TTL": 5,       # 다른 프로세스가 결과를 가져갈 수 있게 남겨두는 시간(초)
+    "WAIT_TIMEOUT": 30,    # 이보다 오래 기다리면 직접 계산
+    "POLL_INTERVAL": 0.05,
+}
+
+# 임베딩 작업 큐 (python manage.py run_embedding_worker 로 처리)
+CHATBOT_EMBEDDING_JOBS = {
+    "DEBOUNCE": 5,          # 마지막 수정 후 이만큼(초) 기다렸다가 임베딩
+    "MAX_ATTEMPTS": 5,
+    "BACKOFF_BASE": 10,     # 재시도 간격: 10s, 20s, 40s ... (지터 ±20%)
+    "BACKOFF_MAX": 60 * 60,
+    "STALE_AFTER": 10 * 60, # running에 이만큼 멈춰 있으면 다시 가져감
+}
+
+# 외부 API 공용 HTTP 클라이언트 (chatbot/http_client.py)
+UPSTREAM_HTTP = {
+    "upstage": {
+        "BASE_URL": os.getenv("UPSTAGE_BASE_URL", "https://api.upstage.ai/v1"),
+        "POOL_SIZE": 20,
+        "CONNECT_TIMEOUT": 3.05,
+        "READ_TIMEOUT": 30,
+        "MAX_RETRIES": 3,
+    },
+    "tmdb": {
+        "BASE_URL": os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3"),
+        "POOL_SIZE": 10,
+        "CONNECT_TIMEOUT": 3.05,
+        "READ_TIMEOUT": 10,
+        "MAX_RETRIES": 3,
+    },
+}
+
+# 하이브리드 검색: 벡터 + BM25(제목/배우 등 정확한 단어)를 RRF로 합침
+CHATBOT_HYBRID = {
+    "ENABLED": True,
+    "RRF_K": 60,
+    "CANDIDATES": 20,        # 각 검색기에서 가져올 후보 수
+    "REFRESH_INTERVAL": 30,  # 다른 프로세스에서 바뀐 영화 반영 주기(초)
+}
+
+# 질문에서 장르/연도/별점 조건을 뽑아 검색 후보를 미리 줄임 ("2010년 이후 SF 영화")
+CHATBOT_QUERY_FILTERS = True
+
+# 챗봇 프롬프트 컨텍스트 예산
+CHATBOT_CONTEXT = {
+    "MAX_TOKENS": 1200,    # [검색 결과] 부분 토큰 상한 (추정치)
+    "REVIEW_CHARS": 300,   # 영화 요약에 넣을 리뷰 최대 글자 수
+}
+
+# 챗봇 요청 단계별(embed / retrieve / chat) 시간 측정
+CHATBOT_METRICS = {
+    "ENABLED": True,   # 끄면 측정/로그 없이 빈 객체만 거치고 /metrics는 404
+    "LOG": True,       # 요청마다 "chatbot.trace" 로거로 JSON 한 줄
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "chatbot.trace": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
+# 세션별 대화 기억 (이어지는 질문에 이전 대화를 붙이고, 같은 영화 얘기면 검색 생략)
+CHATBOT_MEMORY = {
+    "ENABLED": True,
+    "MAX_TURNS": 4,         # 그대로 들고 있는 최근 턴 수 (넘치면 한 줄 요약으로)
+    "QUESTION_CHARS": 200,  # 턴마다 저장하는 질문 글자 수
+    "ANSWER_CHARS": 300,    # 턴마다 저장하는 답변 글자 수
+    "SUMMARY_CHARS": 500,   # 요약 전체 글자 수 상한
+    "MAX_TOKENS": 500,      # 프롬프트에 넣는 이전 대화 토큰 상한 (추정치)
+}
+
+# 빈 DB일 때 TMDB 인기영화로 카탈로그 채우기 (첫 요청 때 백그라운드 스레드로, 목록 요청은 기다리지 않음)
+MOVIES_CATALOGUE = {
+    "BOOTSTRAP": True,
+    "RETRY_INTERVAL": 5 * 60,  # 실패했을 때 다시 시도하기까지(초)
+    "STATS_TTL": 60 * 60,      # 목록 상단 통계(CatalogueState 행)를 GROUP BY로 다시 세는 주기 (시그널로 갱신, 어긋남 보정용)
+}
+
+# 영화 목록 페이지네이션
+MOVIES_PAGINATION = {
+    "MODE": "cursor",   # "cursor": keyset(정렬값 + pk 기준), "offset": 페이지 번호(COUNT + OFFSET)
+    "PER_PAGE": 12,
+}
+
+# 영화 목록 검색 (SQLite FTS5, 다른 DB는 icontains)
+MOVIES_SEARCH = {
+    "FTS": True,  # False면 SQLite에서도 icontains (열별 관련도 가중치는 0006 마이그레이션의 rank 설정)
+}
@@ -19,11 +19,14 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from chatbot.views import metrics
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('movies.urls')),
     path("chatbot/", include("chatbot.urls")),
+    path("metrics", metrics, name="metrics"),
 
 ]
 if settings.DEBUG:
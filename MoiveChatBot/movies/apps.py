@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
 
 
 class MoviesConfig(AppConfig):
     name = 'movies'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        # 빈 DB 채우기는 첫 요청 때 백그라운드로 (migrate 같은 명령 실행 때는 안 돌도록 요청 시그널에 연결)
+        if getattr(settings, "MOVIES_CATALOGUE", {}).get("BOOTSTRAP", True):
+            from .catalogue import ensure_catalogue_bootstrap
+            request_started.connect(ensure_catalogue_bootstrap, dispatch_uid="movies_catalogue_bootstrap")
@@ -0,0 +1,118 @@
+"""
+빈 DB일 때 TMDB 인기영화로 카탈로그를 한 번 채우는 작업 (요청 처리 경로 밖에서).
+
+- 프로세스가 첫 요청을 받으면(request_started) 백그라운드 스레드로 bootstrap_catalogue 실행
+  요청 스레드는 메모리의 플래그만 보고 스레드를 띄울 뿐 DB/외부 API를 기다리지 않음
+- 한 번 채워지면 "catalogue ready" 플래그를 CatalogueState 행에 남겨서 다른 프로세스도 영화 테이블을 보지 않고 알 수 있음
+  (프로세스마다 따로인 LocMem 캐시가 아니라 DB라서 웹 프로세스도 import_tmdb가 세운 플래그를 봄)
+- 배포/cron에서는 python manage.py import_tmdb 로 미리 채워도 됨 (끝나면 같은 플래그를 세움)
+- TMDB 키가 없거나(BOOTSTRAP 꺼짐 포함) 가져오기에 실패하면 그 상태를 남겨서
+  빈 목록에 "준비 중" 대신 빈 목록/오류 안내를 보여줌 (실패는 RETRY_INTERVAL마다 다시 시도)
+"""
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.db import connection
+
+from .models import CatalogueState, Movie
+from .stats import STATE_PK
+from .tmdb import upsert_tmdb_movies
+
+logger = logging.getLogger(__name__)
+
+# 이 프로세스에서 본 카탈로그 상태
+LOADING = "loading"   # 첫 요청 후 채우는 중
+READY = "ready"       # 채워짐 (또는 이미 영화가 있음)
+SKIPPED = "skipped"   # TMDB 키가 없거나 BOOTSTRAP이 꺼져서 채우지 않음
+FAILED = "failed"     # TMDB 요청 실패 (RETRY_INTERVAL 뒤 다음 요청에서 다시 시도)
+
+_lock = threading.Lock()
+_status = LOADING
+_started_at = None
+
+
+def _conf(name: str, default):
+    return getattr(settings, "MOVIES_CATALOGUE", {}).get(name, default)
+
+
+def _is_marked_ready() -> bool:
+    return CatalogueState.objects.filter(pk=STATE_PK, ready=True).exists()
+
+
+def catalogue_status() -> str:
+    """
+    이 프로세스에서 본 카탈로그 상태 (LOADING / READY / SKIPPED / FAILED).
+    READY 뒤로는 메모리만 봄. 그 전(LOADING / FAILED)에는 DB 플래그도 확인해서 import_tmdb 같은 다른 프로세스가 채운 것도 반영
+    """
+    global _status
+    if _status in (LOADING, FAILED) and _is_marked_ready():
+        _status = READY
+    if _status == LOADING and not _conf("BOOTSTRAP", True):
+        return SKIPPED
+    return _status
+
+
+def mark_catalogue_ready() -> None:
+    global _status
+    CatalogueState.objects.update_or_create(pk=STATE_PK, defaults={"ready": True})
+    _status = READY
+
+
+def bootstrap_catalogue() -> int:
+    """
+    DB에 영화가 0개일 때만 TMDB 인기영화를 가져와 저장 (저장한 편수 반환).
+    TMDB 키가 없으면 SKIPPED로 두고 끝냄. 요청이 실패하면 ready 플래그를 세우지 않아서 나중에 다시 시도됨
+    """
+    global _status
+    if _is_marked_ready():
+        _status = READY
+        return 0
+    if Movie.objects.exists():
+        mark_catalogue_ready()
+        return 0
+
+    api_key = getattr(settings, "TMDB_API_KEY", None)
+    if not api_key:
+        _status = SKIPPED
+        return 0
+
+    from chatbot.http_client import tmdb_client
+
+    params = {"api_key": api_key, "language": "ko-KR", "page": 1}
+    r = tmdb_client.get("/movie/popular", params=params)  # 4xx/5xx면 tmdb_client가 HTTPError를 올림
+    saved = upsert_tmdb_movies(r.json().get("results", []))
+    mark_catalogue_ready()
+    return saved
+
+
+def _run_bootstrap() -> None:
+    global _status
+    try:
+        saved = bootstrap_catalogue()
+        if saved:
+            logger.info("TMDB 인기영화 %d편으로 카탈로그를 채움", saved)
+    except requests.RequestException as e:
+        # TMDB 장애/키 오류: RETRY_INTERVAL 뒤 다음 요청에서 다시 시도
+        logger.warning("카탈로그 채우기 실패: %s", e)
+        _status = FAILED
+    except Exception:
+        logger.exception("카탈로그 채우기 실패")
+        _status = FAILED
+    finally:
+        connection.close()  # 이 스레드용 DB 연결 정리
+
+
+def ensure_catalogue_bootstrap(**kwargs) -> None:
+    """request_started 수신자: 아직 준비 전이면 백그라운드로 bootstrap_catalogue 실행 (RETRY_INTERVAL마다 최대 한 번)"""
+    global _started_at
+    if _status in (READY, SKIPPED):
+        return
+    with _lock:
+        now = time.monotonic()
+        if _status in (READY, SKIPPED) or (_started_at is not None and now - _started_at < _conf("RETRY_INTERVAL", 5 * 60)):
+            return
+        _started_at = now
+    threading.Thread(target=_run_bootstrap, name="catalogue-bootstrap", daemon=True).start()
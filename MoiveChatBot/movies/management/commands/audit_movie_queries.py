@@ -0,0 +1,81 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from movies.catalogue import mark_catalogue_ready
+from movies.models import Movie
+from movies.pagination import SORT_ORDERINGS, KeysetPaginator
+from movies.stats import get_catalogue_stats
+from movies.testing import check_query_plans, seed_movies, test_database
+
+FILTERS = {"all": {}, "tmdb": {"is_tmdb": True}, "user": {"is_tmdb": False}}
+
+
+class Command(BaseCommand):
+    help = (
+        "테스트 DB에 영화 N개를 넣고 movie_list의 정렬 x 필터 x (첫 페이지 / 뒤쪽 페이지 / 상세 이전·다음) 조합마다 "
+        "쿼리 수와 실행 계획(전체 스캔 / 정렬용 임시 B-tree 없음)을 검사\n"
+        "예) python manage.py audit_movie_queries --rows 100000"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--expected-queries", type=int, default=2,
+                            help="통계가 계산된 상태에서 목록 요청 하나의 쿼리 수 (통계 행 pk 조회 + 목록)")
+        parser.add_argument("--expected-detail-queries", type=int, default=1,
+                            help="상세 요청 하나의 쿼리 수 (영화 + 이전/다음)")
+        parser.add_argument("--analyze", action="store_true", help="시드 후 ANALYZE 실행 (통계 기반 계획 확인)")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **opts):
+        with test_database():
+            failures = self._audit(opts)
+
+        if failures:
+            raise CommandError(f"{failures}개 조합이 기준을 통과하지 못함")
+        self.stdout.write(self.style.SUCCESS("모든 조합 통과"))
+
+    def _audit(self, opts) -> int:
+        start = time.perf_counter()
+        seed_movies(opts["rows"], random.Random(opts["seed"]))
+        if opts["analyze"]:
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        self.stdout.write(f"{opts['rows']}행 시드 {time.perf_counter() - start:.1f}s ({connection.vendor})")
+
+        # 평소 상태: 카탈로그 준비 완료 + 통계가 계산돼 있음
+        mark_catalogue_ready()
+        get_catalogue_stats()
+
+        client = Client()
+        failures = 0
+        for filter_type, lookup in FILTERS.items():
+            for sort, ordering in SORT_ORDERINGS.items():
+                qs = Movie.objects.filter(**lookup)
+                deep = qs.order_by(*ordering)[int(qs.count() * 0.9)]
+                cursor = KeysetPaginator(qs, 12, ordering).cursor_for(deep, "next")
+                detail = reverse("movie_detail", args=[deep.pk])
+                for page, url, expected in (
+                    ("first", f"/?filter={filter_type}&sort={sort}", opts["expected_queries"]),
+                    ("deep", f"/?filter={filter_type}&sort={sort}&cursor={cursor}", opts["expected_queries"]),
+                    ("detail", f"{detail}?filter={filter_type}&sort={sort}", opts["expected_detail_queries"]),
+                ):
+                    started = time.perf_counter()
+                    response, count, problems = check_query_plans(lambda: client.get(url))
+                    ms = (time.perf_counter() - started) * 1000
+                    ok = response.status_code == 200 and count == expected and not problems
+                    failures += not ok
+                    status = self.style.SUCCESS("ok  ") if ok else self.style.ERROR("FAIL")
+                    self.stdout.write(
+                        f"{status} filter={filter_type:<5} sort={sort:<7} page={page:<6} "
+                        f"queries={count} {ms:7.1f}ms (EXPLAIN 포함)"
+                    )
+                    for sql, found in problems.items():
+                        self.stdout.write(f"       {sql[:120]}")
+                        for problem in found:
+                            self.stdout.write(f"         - {problem}")
+        return failures
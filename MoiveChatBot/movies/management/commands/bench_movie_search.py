@@ -0,0 +1,95 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+
+from chatbot.metrics import percentiles
+from movies.models import Movie
+from movies.pagination import SORT_ORDERINGS, KeysetPaginator
+from movies.search import RELEVANCE_ORDERING, fts_available, search_movies
+from movies.testing import seed_movies, test_database
+
+# 시드용 단어: 제목은 적은 단어(매칭 많음), 리뷰는 음절 조합으로 만든 큰 어휘(매칭 적음)
+WORDS = [
+    "사랑", "전쟁", "우주", "여름", "밤", "도시", "기억", "비밀", "바다", "겨울", "마지막", "첫",
+    "괴물", "친구", "가족", "복수", "시간", "꿈", "거짓말", "행성", "탈출", "왕국", "유령", "기차",
+]
+SYLLABLES = "가나다라마바사아자차카타파하고노도로모보소오조초코토포호구누두루무부수우주"
+VOCAB = [a + b + c for a in SYLLABLES[:16] for b in SYLLABLES[16:] for c in SYLLABLES[::3]]
+SURNAMES = ["김", "이", "박", "최", "정", "강", "조", "윤", "장", "임"]
+GIVEN = ["민준", "서연", "지훈", "하은", "도윤", "수아", "예준", "지아", "시우", "유나", "현우", "채원"]
+
+
+def _person(rng: random.Random) -> str:
+    return rng.choice(SURNAMES) + rng.choice(GIVEN)
+
+
+class Command(BaseCommand):
+    help = (
+        "테스트 DB에 영화 N개를 넣고 목록 검색(첫 페이지)을 icontains와 FTS5로 각각 실행해 지연시간 비교\n"
+        "예) python manage.py bench_movie_search --rows 100000 --queries 200"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--per-page", type=int, default=12)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "sqlite":
+            raise CommandError("FTS5 비교는 SQLite에서만 의미 있음")
+        with test_database():
+            self._bench(opts)
+
+    def _fields(self, rng: random.Random, i: int) -> dict:
+        return {
+            "title": " ".join(rng.sample(WORDS, 2)) + f" {rng.randrange(1000)}",
+            "director": _person(rng),
+            "actors": ", ".join(_person(rng) for _ in range(3)),
+            "review": " ".join(rng.choices(VOCAB, k=30)),
+        }
+
+    def _queries(self, n: int, rng: random.Random) -> list[str]:
+        makers = [
+            lambda: rng.choice(WORDS),                               # 제목 단어
+            lambda: rng.choice(VOCAB),                               # 리뷰 단어
+            lambda: rng.choice(VOCAB)[:2],                           # 두 글자 접두어
+            lambda: _person(rng),                                    # 감독/배우 이름
+            lambda: rng.choice(SURNAMES) + rng.choice(GIVEN)[:1],    # 이름 접두어
+            lambda: " ".join(rng.sample(WORDS, 2)),                  # 두 단어
+        ]
+        return [rng.choice(makers)() for _ in range(n)]
+
+    def _run(self, label: str, queries, ordering_for, rank: bool, per_page: int) -> None:
+        times, hits = [], []
+        for text in queries:
+            started = time.perf_counter()
+            qs, ranked = search_movies(Movie.objects.all(), text, rank=rank)
+            ordering = RELEVANCE_ORDERING if ranked else ordering_for
+            page = KeysetPaginator(qs, per_page, ordering).get_page()
+            times.append((time.perf_counter() - started) * 1000)
+            hits.append(len(page))
+        p = percentiles(times, points=(50, 95))
+        self.stdout.write(
+            f"{label:<22} p50 {p['p50']:7.2f}ms  p95 {p['p95']:7.2f}ms  "
+            f"max {max(times):7.2f}ms  (첫 페이지 평균 {statistics.mean(hits):.1f}편)"
+        )
+
+    def _bench(self, opts) -> None:
+        rng = random.Random(opts["seed"])
+        started = time.perf_counter()
+        seed_movies(opts["rows"], rng, fields=self._fields)
+        self.stdout.write(f"{opts['rows']}행 시드 + FTS 색인 {time.perf_counter() - started:.1f}s")
+        if not fts_available():
+            raise CommandError("FTS 테이블이 없음 (movies 0006 마이그레이션 확인)")
+
+        queries = self._queries(opts["queries"], rng)
+        latest = SORT_ORDERINGS["latest"]
+        with override_settings(MOVIES_SEARCH={"FTS": False}):
+            self._run("icontains / 최신순", queries, latest, rank=False, per_page=opts["per_page"])
+        self._run("fts5 / 최신순", queries, latest, rank=False, per_page=opts["per_page"])
+        self._run("fts5 / 관련도순", queries, latest, rank=True, per_page=opts["per_page"])
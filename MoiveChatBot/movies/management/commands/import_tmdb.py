@@ -0,0 +1,127 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.http_client import tmdb_client
+from chatbot.jobs import enqueue_movie_embeddings
+from movies.catalogue import mark_catalogue_ready
+from movies.models import Movie
+from movies.tmdb import upsert_tmdb_movies
+
+TMDB_LISTS = ["popular", "top_rated", "now_playing"]
+TMDB_MAX_PAGE = 500  # TMDB 목록 API가 주는 최대 페이지
+
+
+class RateLimiter:
+    """초당 rate번까지만 통과시키는 토큰 버킷 (여러 스레드에서 공유)"""
+
+    def __init__(self, rate: float, burst: int = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class Command(BaseCommand):
+    help = (
+        "TMDB 목록(popular / top_rated / now_playing)을 여러 페이지 동시에 가져와 "
+        "tmdb_id 기준으로 일괄 upsert. 장르는 TMDB_GENRE_MAP으로 매핑\n"
+        "예) python manage.py import_tmdb --pages 20 --rate 30"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lists", nargs="+", default=TMDB_LISTS, choices=TMDB_LISTS)
+        parser.add_argument("--pages", type=int, default=5, help="목록별 최대 페이지 수 (페이지당 20편)")
+        parser.add_argument("--workers", type=int, default=8, help="동시에 보낼 요청 수")
+        parser.add_argument("--rate", type=float, default=20.0, help="초당 최대 요청 수 (TMDB 제한 ~50/s)")
+        parser.add_argument("--batch-size", type=int, default=500, help="upsert 한 번에 쓸 행 수")
+        parser.add_argument("--language", default="ko-KR")
+        parser.add_argument("--no-embed", action="store_true", help="가져온 영화의 임베딩 작업을 예약하지 않음")
+
+    def handle(self, *args, **opts):
+        api_key = getattr(settings, "TMDB_API_KEY", None)
+        if not api_key:
+            raise CommandError("TMDB_API_KEY가 설정되어 있지 않음")
+
+        limiter = RateLimiter(opts["rate"])
+        params = {"api_key": api_key, "language": opts["language"]}
+
+        def fetch(list_name: str, page: int) -> dict:
+            limiter.acquire()
+            # tmdb_client가 재시도 후에도 4xx/5xx면 HTTPError를 올림
+            return tmdb_client.get(f"/movie/{list_name}", params={**params, "page": page}).json()
+
+        started = time.perf_counter()
+        pending = []
+        tmdb_ids = set()
+        saved = pages = errors = 0
+
+        def flush():
+            nonlocal saved, pending
+            saved += upsert_tmdb_movies(pending, batch_size=opts["batch_size"])
+            tmdb_ids.update(item["id"] for item in pending if item.get("id") is not None)
+            pending = []
+
+        with ThreadPoolExecutor(max_workers=opts["workers"]) as pool:
+            # 1페이지로 목록별 전체 페이지 수를 알아낸 뒤 나머지 페이지를 한꺼번에 요청
+            first = {pool.submit(fetch, name, 1): name for name in opts["lists"]}
+            futures = {}
+            for future in as_completed(first):
+                name = first[future]
+                try:
+                    data = future.result()
+                except requests.RequestException as e:
+                    errors += 1
+                    self.stderr.write(f"{name} 1페이지 실패: {e}")
+                    continue
+                pages += 1
+                pending.extend(data.get("results", []))
+                last_page = min(opts["pages"], data.get("total_pages") or 1, TMDB_MAX_PAGE)
+                for page in range(2, last_page + 1):
+                    futures[pool.submit(fetch, name, page)] = (name, page)
+
+            # 응답이 오는 대로 모아서 batch_size마다 저장 (DB 쓰기는 이 스레드에서만)
+            for future in as_completed(futures):
+                try:
+                    data = future.result()
+                except requests.RequestException as e:
+                    errors += 1
+                    name, page = futures[future]
+                    self.stderr.write(f"{name} {page}페이지 실패: {e}")
+                    continue
+                pages += 1
+                pending.extend(data.get("results", []))
+                if len(pending) >= opts["batch_size"]:
+                    flush()
+        if pending:
+            flush()
+
+        if tmdb_ids:
+            mark_catalogue_ready()
+        if not opts["no_embed"] and tmdb_ids:
+            ids = list(tmdb_ids)
+            for i in range(0, len(ids), 500):
+                enqueue_movie_embeddings(Movie.objects.filter(tmdb_id__in=ids[i:i + 500]).values_list("pk", flat=True))
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{pages}페이지 / 영화 {len(tmdb_ids)}편 upsert ({saved}행 쓰기), 실패 {errors}건, "
+            f"{elapsed:.1f}s, {saved / elapsed if elapsed else 0:.0f} rows/s"
+        ))
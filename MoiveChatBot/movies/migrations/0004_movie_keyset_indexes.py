@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0003_delete_movieembedding'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['created_at', 'id'], name='movie_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['title', 'id'], name='movie_title_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['rating', 'id'], name='movie_rating_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['release_year', 'id'], name='movie_year_id_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0004_movie_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['is_tmdb', 'created_at', 'id'], name='movie_tmdb_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['is_tmdb', 'title', 'id'], name='movie_tmdb_title_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['is_tmdb', 'rating', 'id'], name='movie_tmdb_rating_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['is_tmdb', 'release_year', 'id'], name='movie_tmdb_year_id_idx'),
+        ),
+    ]
@@ -0,0 +1,88 @@
+"""
+SQLite FTS5 검색 테이블 (movies_movie_fts).
+
+movies_movie를 content 테이블로 쓰는 external content 방식이라 본문을 따로 복사하지 않고 색인만 가짐.
+INSERT / UPDATE / DELETE 트리거로 동기화해서 bulk_create(upsert)나 queryset.update()처럼
+시그널이 안 나가는 경로도 그대로 따라옴. SQLite가 아니면 아무것도 하지 않음 (검색은 icontains로 동작)
+"""
+from django.db import migrations, models
+import django.db.models.deletion
+
+FTS_TABLE = "movies_movie_fts"
+COLUMNS = "title, director, actors, review"
+NEW_VALUES = "new.id, new.title, new.director, new.actors, new.review"
+OLD_VALUES = "old.id, old.title, old.director, old.actors, old.review"
+
+CREATE_SQL = [
+    # prefix='2 3': 2~3글자 접두어 검색("아이"*)을 색인으로 바로 찾음
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        {COLUMNS},
+        content='movies_movie', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON movies_movie BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES ({NEW_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON movies_movie BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', {OLD_VALUES});
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF {COLUMNS} ON movies_movie BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {COLUMNS}) VALUES ('delete', {OLD_VALUES});
+        INSERT INTO {FTS_TABLE}(rowid, {COLUMNS}) VALUES ({NEW_VALUES});
+    END
+    """,
+    # 관련도(rank 열) = 열별 가중치를 준 bm25 (title, director, actors, review 순)
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 5.0, 5.0, 1.0)')",
+    # 이미 있는 영화 색인
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "sqlite":
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0005_movie_filtered_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(CREATE_SQL), _run(DROP_SQL)),
+        migrations.CreateModel(
+            name='MovieSearchIndex',
+            fields=[
+                ('movie', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='movies.movie')),
+                ('title', models.TextField()),
+                ('director', models.TextField()),
+                ('actors', models.TextField()),
+                ('review', models.TextField()),
+                ('document', models.TextField(db_column='movies_movie_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'movies_movie_fts',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0006_movie_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueState',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tmdb_count', models.IntegerField(default=0)),
+                ('user_count', models.IntegerField(default=0)),
+                ('counted_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0007_cataloguestate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cataloguestate',
+            name='ready',
+            field=models.BooleanField(default=False),
+        ),
+    ]
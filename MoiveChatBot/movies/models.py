@@ -1,8 +1,4 @@
 from django.db import models
-from django.conf import settings
-from django.views.decorators.http import require_POST
-from django.shortcuts import redirect
-import requests
 
 class Movie(models.Model):
     GENRE_CHOICES = [
@@ -37,11 +33,31 @@ class Movie(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        # 목록 정렬별 keyset 페이지네이션용 (정렬 필드, id) 복합 인덱스 (내림차순은 역방향으로 읽음)
+        # TMDB/직접추가 필터가 걸린 목록은 is_tmdb를 앞에 둔 인덱스로 같은 순서를 바로 읽음
+        # (python manage.py audit_movie_queries 로 실행 계획 확인)
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='movie_created_id_idx'),
+            models.Index(fields=['title', 'id'], name='movie_title_id_idx'),
+            models.Index(fields=['rating', 'id'], name='movie_rating_id_idx'),
+            models.Index(fields=['release_year', 'id'], name='movie_year_id_idx'),
+            models.Index(fields=['is_tmdb', 'created_at', 'id'], name='movie_tmdb_created_id_idx'),
+            models.Index(fields=['is_tmdb', 'title', 'id'], name='movie_tmdb_title_id_idx'),
+            models.Index(fields=['is_tmdb', 'rating', 'id'], name='movie_tmdb_rating_id_idx'),
+            models.Index(fields=['is_tmdb', 'release_year', 'id'], name='movie_tmdb_year_id_idx'),
+        ]
         verbose_name = '영화'
         verbose_name_plural = '영화들'
     
     def __str__(self):
         return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 통계 캐시 갱신용: DB에서 불러올 때의 TMDB 여부 (저장 시 바뀌었는지 비교)
+        instance._loaded_is_tmdb = instance.is_tmdb if "is_tmdb" in field_names else None
+        return instance
     
     def get_poster_display(self):
         """포스터 이미지 URL 반환 (업로드 이미지 또는 TMDB URL)"""
@@ -65,41 +81,35 @@ class Movie(models.Model):
             return f'{minutes}분'
         return '정보 없음'
 
-@require_POST
-def fetch_tmdb_movies(request):
-    api_key = getattr(settings, "TMDB_API_KEY", None)
-    if not api_key:
-        # settings에 키가 없으면 아무것도 안 함(또는 에러 처리)
-        return redirect("movie_list")
-
-    url = "https://api.themoviedb.org/3/movie/popular"
-    params = {"api_key": api_key, "language": "ko-KR", "page": 1}
-    r = requests.get(url, params=params, timeout=10)
-    data = r.json()
 
-    results = data.get("results", [])
-    for item in results:
-        tmdb_id = item.get("id")
-        title = item.get("title") or ""
-        release_date = item.get("release_date") or ""
-        year = int(release_date[:4]) if release_date[:4].isdigit() else 0
-        poster_path = item.get("poster_path") or ""
-        poster_url = f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else ""
+class MovieSearchIndex(models.Model):
+    """
+    SQLite FTS5 테이블 movies_movie_fts (0006 마이그레이션이 만들고 트리거로 Movie와 동기화).
+    Movie에서 join해서 MATCH / 관련도(rank)를 쓰기 위한 읽기 전용 매핑이고 직접 저장하지 않음
+    """
+    movie = models.OneToOneField(
+        Movie, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid',
+        related_name='search_index', db_constraint=False,
+    )
+    title = models.TextField()
+    director = models.TextField()
+    actors = models.TextField()
+    review = models.TextField()
+    # FTS5 숨은 열: 테이블 이름과 같은 열이 MATCH 대상, rank는 MATCH 결과의 bm25 점수(작을수록 관련도 높음)
+    document = models.TextField(db_column='movies_movie_fts')
+    rank = models.FloatField()
 
-        # TMDB는 장르명 대신 genre_ids를 주는 경우가 많아서, 일단 기본값으로 넣음
-        # (원하면 genre 매핑도 추가해줄게)
-        genre_default = "드라마"
-
-        Movie.objects.update_or_create(
-            tmdb_id=tmdb_id,
-            defaults={
-                "title": title,
-                "release_year": year if year else 2000,  # year 필수라 임시값
-                "genre": genre_default,
-                "poster_url": poster_url,
-                "is_tmdb": True,
-            },
-        )
+    class Meta:
+        managed = False
+        db_table = 'movies_movie_fts'
 
-    return redirect("movie_list")
 
+class CatalogueState(models.Model):
+    """
+    카탈로그 전체 상태를 담는 한 행(pk=1): 목록 상단 통계(TMDB 수 / 직접추가 수)와 카탈로그 준비 플래그.
+    프로세스마다 따로인 LocMem 캐시 대신 DB에 둬서 다른 워커나 import_tmdb 명령의 갱신도 바로 보임
+    """
+    tmdb_count = models.IntegerField(default=0)
+    user_count = models.IntegerField(default=0)
+    counted_at = models.DateTimeField(null=True, blank=True)  # GROUP BY로 다시 센 시각 (None이면 다음 조회 때 다시 셈)
+    ready = models.BooleanField(default=False)  # 카탈로그가 한 번 채워짐 (bootstrap 또는 import_tmdb)
@@ -0,0 +1,179 @@
+"""
+영화 목록 keyset(cursor) 페이지네이션.
+
+OFFSET은 앞 페이지 행을 전부 건너뛰어야 해서 뒤 페이지일수록 느려지고 COUNT(*)도 따로 필요하지만,
+keyset은 "직전 페이지 마지막 행의 (정렬값, pk)보다 뒤" 조건으로 인덱스에서 바로 이어 읽어서
+몇 번째 페이지든 비용이 같음. 커서는 그 값을 base64로 감싼 문자열 (구조를 URL에 노출하지 않음)
+"""
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import OuterRef, Q, Subquery
+
+# sort 파라미터 -> 정렬 (마지막은 같은 값끼리 순서를 고정하는 pk, 방향은 앞 필드와 같게 해서 인덱스 하나로 읽음)
+SORT_ORDERINGS = {
+    "latest": ("-created_at", "-pk"),
+    "title": ("title", "pk"),
+    "rating": ("-rating", "-pk"),
+    "year": ("-release_year", "-pk"),
+}
+DEFAULT_SORT = "latest"
+
+
+def _field_name(order: str) -> str:
+    return order.lstrip("-")
+
+
+def _reverse(ordering) -> tuple:
+    return tuple(order[1:] if order.startswith("-") else f"-{order}" for order in ordering)
+
+
+def encode_cursor(values, direction: str) -> str:
+    raw = json.dumps({"v": values, "d": direction}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """(values, direction), 잘못된 커서면 None"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values, direction = data["v"], data["d"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    if direction not in ("next", "prev") or not isinstance(values, list):
+        return None
+    return values, direction
+
+
+def _keyset_condition(ordering, values) -> Q:
+    """
+    ordering 순서로 values(한 행의 정렬값) "뒤"에 오는 행 조건
+    (a, b) 뒤 = a >= x AND (a > x OR (a = x AND b > y))   (내림차순 필드는 <=, <)
+    앞의 a >= x는 논리적으로 중복이지만, OR만 있으면 DB가 인덱스를 처음부터 훑기 때문에
+    (정렬 필드, id) 인덱스에서 x 위치로 바로 찾아가게 하는 범위 조건.
+    values는 값이나 식(OuterRef 등) 모두 가능
+    """
+    condition = Q()
+    equal = Q()
+    bound = None
+    for order, value in zip(ordering, values):
+        name = _field_name(order)
+        lookup = "lt" if order.startswith("-") else "gt"
+        if bound is None:
+            bound = Q(**{f"{name}__{lookup}e": value})
+        condition |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return bound & condition
+
+
+def keyset_filter(model, ordering, values) -> Q:
+    """
+    커서에서 꺼낸 값(JSON)을 필드 타입으로 바꿔서 _keyset_condition.
+    모델 필드가 아닌 이름은 annotate한 숫자 값(검색 관련도 등)으로 봄.
+    정렬 필드는 모두 NOT NULL이라 null 값은 잘못된 커서로 거름 (그대로 두면 filter에서 None 비교 오류)
+    """
+    converted = []
+    for order, raw in zip(ordering, values):
+        name = _field_name(order)
+        try:
+            field = model._meta.pk if name == "pk" else model._meta.get_field(name)
+        except FieldDoesNotExist:
+            if isinstance(raw, bool) or not isinstance(raw, (int, float)):
+                raise ValidationError(f"{name}: 숫자가 아닌 커서 값")
+            converted.append(raw)
+        else:
+            value = field.to_python(raw)
+            if value is None:
+                raise ValidationError(f"{name}: null 커서 값")
+            converted.append(value)
+    return _keyset_condition(ordering, converted)
+
+
+def with_neighbours(queryset, ordering):
+    """
+    각 행에 ordering 기준 바로 앞/뒤 행의 pk를 prev_pk / next_pk로 annotate (없으면 None).
+    행의 정렬값을 OuterRef로 건 keyset 조건 + LIMIT 1 서브쿼리 두 개라
+    목록 전체를 세지 않고 (정렬 필드, id) 인덱스에서 한 번씩만 찾아감
+    """
+    refs = [OuterRef(_field_name(order)) for order in ordering]
+
+    def neighbour(direction):
+        condition = _keyset_condition(direction, refs)
+        return Subquery(queryset.filter(condition).order_by(*direction).values("pk")[:1])
+
+    return queryset.annotate(prev_pk=neighbour(_reverse(ordering)), next_pk=neighbour(ordering))
+
+
+class KeysetPage:
+    """템플릿에서 Paginator의 Page처럼 반복/has_next/has_previous 사용"""
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+
+class KeysetPaginator:
+    def __init__(self, queryset, per_page: int, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+
+    def cursor_for(self, obj, direction: str = "next") -> str:
+        """obj 다음(next) / 이전(prev) 페이지를 가리키는 커서"""
+        values = []
+        for order in self.ordering:
+            value = getattr(obj, _field_name(order))
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        return encode_cursor(values, direction)
+
+    def _query(self, cursor: str):
+        """(정렬된 queryset, 커서 방향), 커서가 없거나 이 정렬에 맞지 않으면 첫 페이지"""
+        decoded = decode_cursor(cursor) if cursor else None
+        if decoded is not None and len(decoded[0]) == len(self.ordering):
+            values, direction = decoded
+            # 이전 페이지는 반대 방향으로 읽어서 뒤집음
+            ordering = self.ordering if direction == "next" else _reverse(self.ordering)
+            try:
+                condition = keyset_filter(self.queryset.model, ordering, values)
+                return self.queryset.filter(condition).order_by(*ordering), direction
+            except (ValidationError, TypeError, ValueError):
+                pass  # 다른 정렬의 커서 등 (타입이 안 맞는 값)
+        return self.queryset.order_by(*self.ordering), None
+
+    def get_page(self, cursor: str = None) -> KeysetPage:
+        """cursor가 없거나 잘못됐으면 첫 페이지. 쿼리는 per_page + 1개를 읽는 한 번뿐 (COUNT 없음)"""
+        qs, came_from = self._query(cursor)
+        rows = list(qs[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+
+        rows = rows[:self.per_page]
+        if came_from == "prev":
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, came_from == "next"
+
+        return KeysetPage(
+            rows,
+            has_next=has_next and bool(rows),
+            has_previous=has_previous and bool(rows),
+            next_cursor=self.cursor_for(rows[-1], "next") if rows else None,
+            previous_cursor=self.cursor_for(rows[0], "prev") if rows else None,
+        )
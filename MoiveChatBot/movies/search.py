@@ -0,0 +1,91 @@
+"""
+영화 목록 검색 (제목 / 감독 / 배우 / 리뷰).
+
+SQLite면 FTS5 테이블(movies_movie_fts, 0006 마이그레이션의 트리거로 Movie와 동기화)을 join해서 찾고
+FTS5 rank(열별 가중치 bm25)로 관련도순 정렬. 검색어의 단어마다 접두어 검색이라 "아이언"으로 "아이언맨이"도 찾음.
+unicode61 토큰은 어절 단위라 한국어 어절 중간("봉준호"의 "준호")은 못 찾으므로 FTS 결과가 없으면 icontains로 다시 찾음
+(trigram 토크나이저는 3글자 미만 검색어를 못 찾아서 두 글자 이름이 많은 한국어에 맞지 않음).
+다른 DB이거나 FTS 테이블이 없으면 예전처럼 icontains (관련도순은 최신순으로 대신함)
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, Lookup, Q
+
+from .models import MovieSearchIndex
+
+FTS_TABLE = MovieSearchIndex._meta.db_table
+
+RELEVANCE_SORT = "relevance"
+RANK_FIELD = "search_rank"
+# rank는 잘 맞을수록 작은(음수) 값이라 오름차순, 같은 점수는 pk로 순서 고정
+RELEVANCE_ORDERING = (RANK_FIELD, "pk")
+
+MAX_TERMS = 8
+_TERM_RE = re.compile(r"\w+")
+
+_fts_tables = {}  # (DB alias, DB 이름) -> FTS 테이블 존재 여부
+
+
+class Match(Lookup):
+    """document__match="..." -> movies_movie_fts MATCH '...'"""
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+MovieSearchIndex._meta.get_field("document").register_lookup(Match)
+
+
+def fts_query(text: str) -> str:
+    """검색어 -> FTS5 MATCH 식. 단어마다 "단어"* (접두어), 단어끼리는 AND. 단어가 없으면 빈 문자열"""
+    terms = _TERM_RE.findall(text.lower())[:MAX_TERMS]
+    # 따옴표로 감싸서 AND / OR / NEAR 같은 FTS 문법으로 해석되지 않게 함
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def fts_available(using: str = "default") -> bool:
+    """이 DB에서 FTS 검색을 쓸 수 있는지 (SQLite + 마이그레이션 적용됨, 결과는 DB별로 기억)"""
+    if not getattr(settings, "MOVIES_SEARCH", {}).get("FTS", True):
+        return False
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return False
+    key = (using, connection.settings_dict["NAME"])
+    if key not in _fts_tables:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _fts_tables[key] = cursor.fetchone() is not None
+    return _fts_tables[key]
+
+
+def _icontains(queryset, text: str):
+    return queryset.filter(
+        Q(title__icontains=text)
+        | Q(director__icontains=text)
+        | Q(actors__icontains=text)
+    )
+
+
+def search_movies(queryset, text: str, rank: bool = False):
+    """
+    (검색 조건을 건 queryset, 관련도 점수를 붙였는지).
+    rank=True이고 FTS를 쓰면 RANK_FIELD를 annotate해서 RELEVANCE_ORDERING으로 정렬/keyset 가능.
+    FTS 테이블을 한 번만 훑는 join이라 점수(bm25 통계)도 쿼리당 한 번 계산됨.
+    FTS로 하나도 못 찾으면(한국어 어절 중간 등) icontains로 대신함 (이때 EXISTS 쿼리 하나가 더 듦)
+    """
+    match = fts_query(text)
+    if not match or not fts_available(queryset.db):
+        return _icontains(queryset, text), False
+
+    matched = queryset.filter(search_index__document__match=match)
+    if not matched.exists():
+        return _icontains(queryset, text), False
+    queryset = matched
+    if not rank:
+        return queryset, False
+    return queryset.annotate(**{RANK_FIELD: F("search_index__rank")}), True
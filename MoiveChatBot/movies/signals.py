@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Movie
+from .stats import adjust_catalogue_stats, invalidate_catalogue_stats
+
+
+@receiver(post_save, sender=Movie)
+def update_stats_on_save(sender, instance, created, **kwargs):
+    if created:
+        adjust_catalogue_stats(instance.is_tmdb, 1)
+    else:
+        loaded = getattr(instance, "_loaded_is_tmdb", None)
+        if loaded is None:
+            # DB에서 불러온 값을 모르면 (직접 만든 인스턴스로 save 등) 다시 계산하게 둠
+            invalidate_catalogue_stats()
+        elif loaded != instance.is_tmdb:
+            adjust_catalogue_stats(loaded, -1)
+            adjust_catalogue_stats(instance.is_tmdb, 1)
+    instance._loaded_is_tmdb = instance.is_tmdb
+
+
+@receiver(post_delete, sender=Movie)
+def update_stats_on_delete(sender, instance, **kwargs):
+    adjust_catalogue_stats(instance.is_tmdb, -1)
@@ -0,0 +1,56 @@
+"""
+목록 페이지 상단 통계(전체 / TMDB / 직접추가).
+
+TMDB 수와 직접추가 수를 CatalogueState 한 행(pk=1)에 비정규화해 두고,
+영화 저장/삭제 시그널에서 F() 갱신으로 바로 반영 (전체는 둘의 합).
+모든 프로세스가 같은 행을 보므로 다른 워커나 import_tmdb 명령의 변경도 바로 보임 (목록 요청마다 pk 조회 한 번).
+행이 없거나 STATS_TTL보다 오래됐으면 GROUP BY 한 번으로 다시 계산. bulk_create처럼 시그널이 없는 경로는 invalidate 호출
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import CatalogueState, Movie
+
+STATE_PK = 1
+COUNT_FIELDS = {True: "tmdb_count", False: "user_count"}
+
+
+def _ttl():
+    # 동시 갱신으로 어긋나도 TTL이 지나면 다시 계산돼서 맞춰짐
+    return getattr(settings, "MOVIES_CATALOGUE", {}).get("STATS_TTL", 60 * 60)
+
+
+def compute_catalogue_stats() -> dict:
+    counts = {True: 0, False: 0}
+    for row in Movie.objects.order_by().values("is_tmdb").annotate(n=Count("id")):
+        counts[row["is_tmdb"]] = row["n"]
+    CatalogueState.objects.update_or_create(
+        pk=STATE_PK,
+        defaults={**{COUNT_FIELDS[k]: v for k, v in counts.items()}, "counted_at": timezone.now()},
+    )
+    return _as_dict(counts)
+
+
+def _as_dict(counts: dict) -> dict:
+    return {"total": counts[True] + counts[False], "tmdb": counts[True], "user": counts[False]}
+
+
+def get_catalogue_stats() -> dict:
+    """{"total", "tmdb", "user"} (평소엔 pk 조회 한 번)"""
+    row = CatalogueState.objects.filter(pk=STATE_PK).values(*COUNT_FIELDS.values(), "counted_at").first()
+    if row is None or row["counted_at"] is None or row["counted_at"] < timezone.now() - timedelta(seconds=_ttl()):
+        return compute_catalogue_stats()
+    return _as_dict({k: row[field] for k, field in COUNT_FIELDS.items()})
+
+
+def adjust_catalogue_stats(is_tmdb: bool, delta: int) -> None:
+    # 행이 없으면(아직 미계산) 0행 갱신으로 끝나고 다음 조회 때 새로 계산
+    field = COUNT_FIELDS[bool(is_tmdb)]
+    CatalogueState.objects.filter(pk=STATE_PK).update(**{field: F(field) + delta})
+
+
+def invalidate_catalogue_stats() -> None:
+    CatalogueState.objects.filter(pk=STATE_PK).update(counted_at=None)
@@ -0,0 +1,145 @@
+"""
+테스트/벤치마크 도우미 (tests.py와 audit_movie_queries, bench_movie_search, bench_chatbot 명령에서 사용)
+
+- test_database / seed_movies: 관리 명령이 실제 DB 대신 테스트 DB를 만들어 합성 영화로 채움
+- QueryPlanAssertionsMixin 등: 쿼리 수 / 실행 계획 검사
+
+    class MovieListQueryTests(QueryPlanAssertionsMixin, TestCase):
+        def test_latest(self):
+            self.assertQueryPlans(lambda: self.client.get("/?sort=latest"), num_queries=1)
+
+실행 계획 검사는 SELECT마다 EXPLAIN을 돌려서 전체 테이블 스캔이나 정렬용 임시 B-tree(SQLite) / Sort 노드(PostgreSQL)가
+있으면 실패로 봄. 다른 DB는 쿼리 수만 검사
+"""
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from .models import Movie
+
+_EXPLAIN_PREFIX = {
+    "sqlite": "EXPLAIN QUERY PLAN ",
+    "postgresql": "EXPLAIN ",
+}
+
+
+@contextmanager
+def test_database(using: str = "default"):
+    """with 블록 동안 테스트 DB(test_ 접두어)를 만들어 쓰고 끝나면 지움 (실제 DB는 건드리지 않음)"""
+    connection = connections[using]
+    old_name = connection.settings_dict["NAME"]
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def seed_movies(n: int, rng, fields=None, chunk: int = 5000, after_chunk=None) -> int:
+    """
+    영화 수가 n이 될 때까지 bulk_create로 추가 (시그널을 타지 않음, 추가한 편수 반환).
+    기본은 무작위 제목/개봉년도/장르/별점/TMDB 여부이고 fields(rng, i) -> dict로 필드를 덮어씀.
+    after_chunk(movies)는 저장된 청크마다 호출 (임베딩 같은 관련 행을 같이 넣을 때)
+    """
+    genres = [g for g, _ in Movie.GENRE_CHOICES]
+    start = Movie.objects.count()
+    for offset in range(start, n, chunk):
+        movies = Movie.objects.bulk_create([
+            Movie(**{
+                "title": f"영화 {rng.randrange(n)}",
+                "release_year": rng.randint(1950, 2024),
+                "genre": rng.choice(genres),
+                "rating": rng.randint(1, 5),
+                "is_tmdb": rng.random() < 0.7,
+                **(fields(rng, i) if fields else {}),
+            })
+            for i in range(offset, min(offset + chunk, n))
+        ])
+        if after_chunk is not None:
+            after_chunk(movies)
+    return max(0, n - start)
+
+
+class CaptureSQL:
+    """with 블록 안에서 실행된 (sql, params)를 그대로 모음 (파라미터가 문자열로 합쳐지기 전 값)"""
+
+    def __init__(self, using: str = "default"):
+        self.connection = connections[using]
+        self.queries = []
+        self._ctx = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._ctx = self.connection.execute_wrapper(self)
+        self._ctx.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._ctx.__exit__(*exc)
+
+    @property
+    def selects(self) -> list:
+        return [(sql, params) for sql, params in self.queries if sql.lstrip().upper().startswith("SELECT")]
+
+
+def explain(sql: str, params=(), using: str = "default") -> str:
+    """쿼리 실행 계획 텍스트 (지원하지 않는 DB면 빈 문자열)"""
+    connection = connections[using]
+    prefix = _EXPLAIN_PREFIX.get(connection.vendor)
+    if prefix is None:
+        return ""
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        rows = cursor.fetchall()
+    # SQLite: (id, parent, notused, detail), PostgreSQL: (줄,)
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def plan_problems(plan: str, vendor: str) -> list[str]:
+    """실행 계획에서 인덱스를 못 탄 흔적 목록"""
+    problems = []
+    for line in plan.splitlines():
+        text = line.strip().lstrip("->").strip()
+        if vendor == "sqlite":
+            if text.startswith("SCAN ") and "USING" not in text:
+                problems.append(f"full scan: {text}")
+            if "USE TEMP B-TREE" in text:
+                problems.append(f"temp b-tree: {text}")
+        elif vendor == "postgresql":
+            if text.startswith("Seq Scan"):
+                problems.append(f"full scan: {text}")
+            if text.startswith(("Sort ", "Incremental Sort ")):
+                problems.append(f"sort: {text}")
+    return problems
+
+
+def check_query_plans(func, using: str = "default"):
+    """func()을 실행하고 (결과, 쿼리 수, {sql: 문제 목록}) 반환"""
+    with CaptureSQL(using) as captured:
+        result = func()
+    vendor = connections[using].vendor
+    problems = {}
+    for sql, params in captured.selects:
+        found = plan_problems(explain(sql, params, using), vendor)
+        if found:
+            problems[sql] = found
+    return result, len(captured.queries), problems
+
+
+class QueryPlanAssertionsMixin:
+    """TestCase에 섞어 쓰는 assert"""
+
+    def assertQueryPlans(self, func, num_queries: int = None, using: str = "default"):
+        result, count, problems = check_query_plans(func, using)
+        if num_queries is not None:
+            self.assertEqual(count, num_queries, f"쿼리 {count}개 실행 (기대값 {num_queries})")
+        self.assertFalse(problems, "인덱스를 타지 않는 쿼리:\n" + "\n".join(
+            f"{sql}\n  " + "\n  ".join(found) for sql, found in problems.items()
+        ))
+        return result
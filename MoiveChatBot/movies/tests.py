@@ -1,3 +1,166 @@
+import random
+
 from django.test import TestCase
+from django.urls import reverse
+
+from . import catalogue
+from .catalogue import mark_catalogue_ready
+from .models import CatalogueState, Movie
+from .pagination import SORT_ORDERINGS, KeysetPaginator, encode_cursor
+from .search import search_movies
+from .stats import STATE_PK, get_catalogue_stats, invalidate_catalogue_stats
+from .testing import QueryPlanAssertionsMixin, seed_movies
+
+FILTERS = {"all": {}, "tmdb": {"is_tmdb": True}, "user": {"is_tmdb": False}}
+
+
+class MovieQueryPlanTests(QueryPlanAssertionsMixin, TestCase):
+    """목록 정렬 x 필터(통계 행 + 목록)와 상세 이전/다음(쿼리 하나)이 전체 스캔/임시 정렬 없이 끝나는지 (audit_movie_queries와 같은 기준)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_movies(120, random.Random(0))
+
+    def setUp(self):
+        # 평소 상태: 카탈로그 준비 완료 + 통계가 계산돼 있음
+        mark_catalogue_ready()
+        get_catalogue_stats()
+
+    def test_movie_list_sort_and_filter(self):
+        for filter_type in FILTERS:
+            for sort in SORT_ORDERINGS:
+                with self.subTest(filter=filter_type, sort=sort):
+                    response = self.assertQueryPlans(
+                        lambda: self.client.get(reverse("movie_list"), {"filter": filter_type, "sort": sort}),
+                        num_queries=2,  # 통계 행 pk 조회 + 목록
+                    )
+                    self.assertEqual(response.status_code, 200)
+
+    def test_movie_list_next_page(self):
+        for filter_type, lookup in FILTERS.items():
+            for sort, ordering in SORT_ORDERINGS.items():
+                with self.subTest(filter=filter_type, sort=sort):
+                    qs = Movie.objects.filter(**lookup)
+                    deep = qs.order_by(*ordering)[qs.count() // 2]
+                    cursor = KeysetPaginator(qs, 12, ordering).cursor_for(deep, "next")
+                    response = self.assertQueryPlans(
+                        lambda: self.client.get(
+                            reverse("movie_list"), {"filter": filter_type, "sort": sort, "cursor": cursor},
+                        ),
+                        num_queries=2,
+                    )
+                    self.assertEqual(response.status_code, 200)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        first = self.client.get(reverse("movie_list"))
+        for cursor in (
+            "eyJ2IjpbbnVsbCwxXSwiZCI6Im5leHQifQ",  # {"v":[null,1],"d":"next"}
+            encode_cursor([1, None], "next"),
+            encode_cursor(["not-a-date", 1], "prev"),
+            encode_cursor([1], "next"),
+            "!!!",
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(reverse("movie_list"), {"cursor": cursor})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [m.pk for m in response.context["movies"]], [m.pk for m in first.context["movies"]],
+                )
+
+    def test_movie_detail_neighbours(self):
+        for filter_type, lookup in FILTERS.items():
+            for sort, ordering in SORT_ORDERINGS.items():
+                with self.subTest(filter=filter_type, sort=sort):
+                    pks = list(Movie.objects.filter(**lookup).order_by(*ordering).values_list("pk", flat=True))
+                    i = len(pks) // 2
+                    response = self.assertQueryPlans(
+                        lambda: self.client.get(
+                            reverse("movie_detail", args=[pks[i]]), {"filter": filter_type, "sort": sort},
+                        ),
+                        num_queries=1,
+                    )
+                    self.assertEqual(response.context["prev_pk"], pks[i - 1])
+                    self.assertEqual(response.context["next_pk"], pks[i + 1])
+
+
+class CatalogueStatsTests(TestCase):
+    """목록 상단 통계가 DB 행(CatalogueState)에 남아서 저장/삭제/bulk 경로를 따라가는지"""
+
+    def test_signals_update_shared_row(self):
+        self.assertEqual(get_catalogue_stats(), {"total": 0, "tmdb": 0, "user": 0})
+        movie = Movie.objects.create(title="기생충", release_year=2019, genre="드라마", director="봉준호", actors="송강호")
+        Movie.objects.create(title="괴물", release_year=2006, genre="SF", director="봉준호", is_tmdb=True)
+        self.assertEqual(get_catalogue_stats(), {"total": 2, "tmdb": 1, "user": 1})
+
+        movie = Movie.objects.get(pk=movie.pk)
+        movie.is_tmdb = True
+        movie.save()
+        self.assertEqual(get_catalogue_stats(), {"total": 2, "tmdb": 2, "user": 0})
+
+        movie.delete()
+        # 다른 프로세스가 보는 것도 같은 행
+        self.assertEqual(
+            CatalogueState.objects.values_list("tmdb_count", "user_count").get(pk=STATE_PK), (1, 0),
+        )
+
+    def test_invalidate_recounts(self):
+        get_catalogue_stats()
+        seed_movies(5, random.Random(0))  # bulk_create: 시그널 없음
+        invalidate_catalogue_stats()
+        self.assertEqual(get_catalogue_stats()["total"], 5)
+
+
+class CatalogueReadyFlagTests(TestCase):
+    """준비 플래그가 DB에 있어서 다른 프로세스(import_tmdb)가 세운 것도 웹 프로세스가 보는지"""
+
+    def setUp(self):
+        saved = catalogue._status
+        self.addCleanup(setattr, catalogue, "_status", saved)
+
+    def test_flag_set_elsewhere_is_seen(self):
+        for status in (catalogue.LOADING, catalogue.FAILED):
+            with self.subTest(status=status):
+                CatalogueState.objects.filter(pk=STATE_PK).delete()
+                catalogue._status = status
+                self.assertEqual(catalogue.catalogue_status(), status)
+
+                # import_tmdb가 다른 프로세스에서 한 것과 같은 DB 갱신 (이 프로세스 메모리는 그대로)
+                CatalogueState.objects.update_or_create(pk=STATE_PK, defaults={"ready": True})
+                self.assertEqual(catalogue.catalogue_status(), catalogue.READY)
+
+    def test_ready_status_does_not_query(self):
+        mark_catalogue_ready()
+        with self.assertNumQueries(0):
+            self.assertEqual(catalogue.catalogue_status(), catalogue.READY)
+
+
+class MovieSearchTests(TestCase):
+    """FTS 검색: 단어 접두어는 FTS(관련도순), 한국어 어절 중간은 icontains로라도 찾는지"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.parasite = Movie.objects.create(
+            title="기생충", release_year=2019, genre="드라마", director="봉준호", actors="송강호, 이선균",
+        )
+        cls.ironman = Movie.objects.create(
+            title="아이언맨", release_year=2008, genre="액션", director="존 파브로", actors="로버트 다우니 주니어",
+        )
+
+    def _search(self, text):
+        return self.client.get(reverse("movie_list"), {"search": text})
+
+    def test_prefix_uses_fts_rank(self):
+        qs, ranked = search_movies(Movie.objects.all(), "봉준", rank=True)
+        self.assertTrue(ranked)
+        self.assertEqual(list(qs), [self.parasite])
+        self.assertEqual([m.pk for m in self._search("아이언").context["movies"]], [self.ironman.pk])
+
+    def test_korean_infix(self):
+        for text in ("준호", "생충", "강호"):
+            with self.subTest(text=text):
+                response = self._search(text)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([m.pk for m in response.context["movies"]], [self.parasite.pk])
 
-# Create your tests here.
+    def test_no_match(self):
+        self.assertEqual(list(self._search("없는영화").context["movies"]), [])
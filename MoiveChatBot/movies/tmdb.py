@@ -0,0 +1,71 @@
+"""
+TMDB 응답 -> Movie 변환과 일괄 저장 (catalogue / import_tmdb 명령이 같이 씀)
+"""
+
+TMDB_POSTER_BASE = "https://image.tmdb.org/t/p/w500"
+
+# TMDB genre_id -> 네 GENRE_CHOICES 텍스트로 간단 매핑
+TMDB_GENRE_MAP = {
+    28: "액션",
+    35: "코미디",
+    18: "드라마",
+    27: "공포",
+    878: "SF",
+    10749: "로맨스",
+    53: "스릴러",
+    16: "애니메이션",
+    14: "판타지",
+    99: "다큐멘터리",
+}
+
+# tmdb_id가 이미 있을 때 덮어쓸 필드 (사용자가 쓴 리뷰/별점 등은 건드리지 않음)
+TMDB_UPDATE_FIELDS = ["title", "release_year", "genre", "poster_url", "is_tmdb", "updated_at"]
+
+
+def pick_genre_from_tmdb(genre_ids):
+    """TMDB genre_ids(list)에서 가장 앞의 매핑 가능한 장르 하나 선택"""
+    for gid in genre_ids or ():
+        if gid in TMDB_GENRE_MAP:
+            return TMDB_GENRE_MAP[gid]
+    return "드라마"
+
+
+def tmdb_movie_fields(item: dict) -> dict:
+    """TMDB 목록 API 결과 한 건 -> Movie 필드 값"""
+    release_date = item.get("release_date") or ""
+    poster_path = item.get("poster_path") or ""
+    return {
+        "tmdb_id": item.get("id"),
+        "title": item.get("title") or "",
+        "release_year": int(release_date[:4]) if release_date[:4].isdigit() else 2000,  # year 필수라 임시값
+        "genre": pick_genre_from_tmdb(item.get("genre_ids")),
+        "poster_url": f"{TMDB_POSTER_BASE}{poster_path}" if poster_path else "",
+        "is_tmdb": True,
+    }
+
+
+def upsert_tmdb_movies(items, batch_size: int = 500) -> int:
+    """
+    TMDB 결과를 tmdb_id 기준으로 INSERT ... ON CONFLICT DO UPDATE 한 번에 batch_size개씩 저장.
+    (영화마다 SELECT + INSERT/UPDATE 하던 update_or_create 대신)
+    bulk_create는 post_save 시그널을 보내지 않으므로 검색 인덱스는 updated_at 기준 갱신으로 따라오고,
+    목록 통계는 여기서 직접 무효화
+    """
+    from .models import Movie
+    from .stats import invalidate_catalogue_stats
+
+    by_tmdb_id = {}
+    for item in items:
+        if item.get("id") is not None:
+            by_tmdb_id[item["id"]] = Movie(**tmdb_movie_fields(item))  # 같은 영화가 여러 목록에 있으면 하나만
+
+    Movie.objects.bulk_create(
+        list(by_tmdb_id.values()),
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=["tmdb_id"],
+        update_fields=TMDB_UPDATE_FIELDS,
+    )
+    invalidate_catalogue_stats()
+    return len(by_tmdb_id)
+
@@ -1,160 +1,113 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Q
 from django.conf import settings
 from django.core.paginator import Paginator
-import requests
+from django.utils.http import urlencode
 
 from .models import Movie
 from .forms import MovieForm
-from chatbot.upstage_utils import build_or_update_movie_embedding
+from .catalogue import catalogue_status
+from .pagination import DEFAULT_SORT, SORT_ORDERINGS, KeysetPaginator, with_neighbours
+from .search import RELEVANCE_ORDERING, RELEVANCE_SORT, search_movies
+from .stats import get_catalogue_stats
+from chatbot.jobs import enqueue_movie_embedding
 from chatbot.models import MovieEmbedding
+from chatbot.vector_index import movie_index
 
 
-# TMDB genre_id -> 네 GENRE_CHOICES 텍스트로 간단 매핑
-TMDB_GENRE_MAP = {
-    28: "액션",
-    35: "코미디",
-    18: "드라마",
-    27: "공포",
-    878: "SF",
-    10749: "로맨스",
-    53: "스릴러",
-    16: "애니메이션",
-    14: "판타지",
-    99: "다큐멘터리",
-}
-
-
-def _pick_genre_from_tmdb(genre_ids):
-    """TMDB genre_ids(list)에서 가장 앞의 매핑 가능한 장르 하나 선택"""
-    if not genre_ids:
-        return "드라마"
-    for gid in genre_ids:
-        if gid in TMDB_GENRE_MAP:
-            return TMDB_GENRE_MAP[gid]
-    return "드라마"
-
-
-def _sync_tmdb_popular_if_empty():
+def _list_queryset(params):
     """
-    DB에 영화가 0개일 때만 TMDB 인기영화를 가져와 저장.
-    (서버/페이지 접속 시 자동 1회 채우기용)
+    목록 GET 파라미터(search / filter / sort) -> (queryset, 정렬, 화면 상태).
+    상세 페이지의 이전/다음도 같은 파라미터로 목록과 같은 순서를 따름
     """
-    if Movie.objects.exists():
-        return 0
-
-    api_key = getattr(settings, "TMDB_API_KEY", None)
-    if not api_key:
-        return 0
-
-    url = "https://api.themoviedb.org/3/movie/popular"
-    params = {"api_key": api_key, "language": "ko-KR", "page": 1}
+    movies = Movie.objects.all()
 
-    r = requests.get(url, params=params, timeout=10)
-    data = r.json()
+    # 검색 (SQLite는 FTS5 + 관련도, 다른 DB는 icontains). 검색 중 기본 정렬은 관련도순
+    search_query = params.get("search", "")
+    sort_by = params.get("sort") or (RELEVANCE_SORT if search_query else DEFAULT_SORT)
+    ranked = False
+    if search_query:
+        movies, ranked = search_movies(movies, search_query, rank=sort_by == RELEVANCE_SORT)
 
-    saved = 0
-    for item in data.get("results", []):
-        tmdb_id = item.get("id")
-        title = item.get("title") or ""
-        release_date = item.get("release_date") or ""
-        year = int(release_date[:4]) if release_date[:4].isdigit() else 2000
+    # 필터 (전체, TMDB, 직접추가)
+    filter_type = params.get("filter", "all")
+    if filter_type == "tmdb":
+        movies = movies.filter(is_tmdb=True)
+    elif filter_type == "user":
+        movies = movies.filter(is_tmdb=False)
 
-        poster_path = item.get("poster_path") or ""
-        poster_url = f"https://image.tmdb.org/t/p/w500{poster_path}" if poster_path else ""
+    # 정렬 (같은 값끼리는 pk로 순서 고정)
+    if ranked:
+        ordering = RELEVANCE_ORDERING
+    else:
+        ordering = SORT_ORDERINGS.get(sort_by, SORT_ORDERINGS[DEFAULT_SORT])
 
-        genre = _pick_genre_from_tmdb(item.get("genre_ids", []))
+    state = {"search_query": search_query, "filter_type": filter_type, "sort_by": sort_by}
+    return movies, ordering, state
 
-        # 이미 tmdb_id가 있으면 업데이트, 없으면 생성
-        Movie.objects.update_or_create(
-            tmdb_id=tmdb_id,
-            defaults={
-                "title": title,
-                "release_year": year,
-                "genre": genre,
-                "poster_url": poster_url,
-                "is_tmdb": True,
-            },
-        )
-        saved += 1
 
-    return saved
+def _list_query_string(state) -> str:
+    """목록 상태를 상세 링크에 붙일 쿼리스트링으로 (기본값은 생략)"""
+    params = {}
+    if state["search_query"]:
+        params["search"] = state["search_query"]
+    if state["filter_type"] != "all":
+        params["filter"] = state["filter_type"]
+    if state["sort_by"] != (RELEVANCE_SORT if state["search_query"] else DEFAULT_SORT):
+        params["sort"] = state["sort_by"]
+    return urlencode(params)
 
 
 def movie_list(request):
     """영화 목록 페이지 (메인)"""
-    # ✅ DB가 비어있을 때만 TMDB에서 자동으로 채우기
-    _sync_tmdb_popular_if_empty()
+    movies, ordering, state = _list_queryset(request.GET)
 
-    movies = Movie.objects.all()
+    # 통계 (CatalogueState 행 pk 조회, 영화 저장/삭제 시그널로 갱신)
+    stats = get_catalogue_stats()
 
-    # 검색
-    search_query = request.GET.get("search", "")
-    if search_query:
-        movies = movies.filter(
-            Q(title__icontains=search_query)
-            | Q(director__icontains=search_query)
-            | Q(actors__icontains=search_query)
-        )
-
-    # 필터 (전체, TMDB, 직접추가)
-    filter_type = request.GET.get("filter", "all")
-    if filter_type == "tmdb":
-        movies = movies.filter(is_tmdb=True)
-    elif filter_type == "user":
-        movies = movies.filter(is_tmdb=False)
-
-    # 정렬
-    sort_by = request.GET.get("sort", "latest")
-    if sort_by == "latest":
-        movies = movies.order_by("-created_at")
-    elif sort_by == "title":
-        movies = movies.order_by("title")
-    elif sort_by == "rating":
-        movies = movies.order_by("-rating")
-    elif sort_by == "year":
-        movies = movies.order_by("-release_year")
-
-    # 통계
-    total_count = Movie.objects.count()
-    tmdb_count = Movie.objects.filter(is_tmdb=True).count()
-    user_count = Movie.objects.filter(is_tmdb=False).count()
-
-    # 페이지네이션
-    paginator = Paginator(movies, 12)
-    page = request.GET.get("page", 1)
-    movies = paginator.get_page(page)
+    # 페이지네이션 (cursor: COUNT/OFFSET 없이 몇 번째 페이지든 같은 비용, offset: 기존 페이지 번호 방식)
+    conf = getattr(settings, "MOVIES_PAGINATION", {})
+    pagination_mode = conf.get("MODE", "cursor")
+    per_page = conf.get("PER_PAGE", 12)
+    if pagination_mode == "cursor":
+        movies = KeysetPaginator(movies, per_page, ordering).get_page(request.GET.get("cursor"))
+    else:
+        paginator = Paginator(movies.order_by(*ordering), per_page)
+        movies = paginator.get_page(request.GET.get("page", 1))
 
     context = {
         "movies": movies,
-        "search_query": search_query,
-        "filter_type": filter_type,
-        "sort_by": sort_by,
-        "total_count": total_count,
-        "tmdb_count": tmdb_count,
-        "user_count": user_count,
+        **state,
+        "list_query": _list_query_string(state),
+        "pagination_mode": pagination_mode,
+        "total_count": stats["total"],
+        "tmdb_count": stats["tmdb"],
+        "user_count": stats["user"],
+        "catalogue_status": catalogue_status(),
     }
     return render(request, "movies/movie_list.html", context)
 
 
 def movie_detail(request, pk):
-    movie = get_object_or_404(Movie, pk=pk)
-
-    prev_movie = Movie.objects.filter(pk__lt=movie.pk).order_by("-pk").first()
-    next_movie = Movie.objects.filter(pk__gt=movie.pk).order_by("pk").first()
+    # 영화 + 목록(검색/필터/정렬) 순서상 이전/다음 영화 pk를 쿼리 한 번으로
+    movies, ordering, state = _list_queryset(request.GET)
+    movie = with_neighbours(movies, ordering).filter(pk=pk).first()
+    if movie is None:
+        # 지금 검색/필터 결과에 없는 영화(직접 들어온 링크 등)면 기본 목록 순서로
+        state = {"search_query": "", "filter_type": "all", "sort_by": DEFAULT_SORT}
+        movie = get_object_or_404(with_neighbours(Movie.objects.all(), SORT_ORDERINGS[DEFAULT_SORT]), pk=pk)
 
     return render(
         request,
         "movies/movie_detail.html",
         {
             "movie": movie,
-            "prev_movie": prev_movie,
-            "next_movie": next_movie,
+            "prev_pk": movie.prev_pk,
+            "next_pk": movie.next_pk,
+            "list_query": _list_query_string(state),
         },
     )
 
 
-
 def movie_create(request):
     if request.method == "POST":
         form = MovieForm(request.POST, request.FILES)
@@ -163,8 +116,8 @@ def movie_create(request):
             movie.is_tmdb = False  # 직접 입력
             movie.save()
 
-            # ✅ 여기서 임베딩 생성/갱신
-            build_or_update_movie_embedding(movie)
+            # ✅ 임베딩 생성/갱신은 워커가 처리 (여기선 예약만)
+            enqueue_movie_embedding(movie)
 
             return redirect("movie_detail", pk=movie.pk)
     else:
@@ -179,7 +132,7 @@ def movie_update(request, pk):
         form = MovieForm(request.POST, request.FILES, instance=movie)
         if form.is_valid():
             movie = form.save()
-            build_or_update_movie_embedding(movie)
+            enqueue_movie_embedding(movie)
             return redirect("movie_detail", pk=movie.pk)
     else:
         form = MovieForm(instance=movie)
@@ -190,7 +143,9 @@ def movie_update(request, pk):
 def movie_delete(request, pk):
     movie = get_object_or_404(Movie, pk=pk)
     if request.method == "POST":
+        movie_id = movie.pk
         MovieEmbedding.objects.filter(movie=movie).delete()
         movie.delete()
+        movie_index.remove(movie_id)
         return redirect("movie_list")
     return render(request, "movies/movie_confirm_delete.html", {"movie": movie})